@@ -3,13 +3,29 @@ from tkinter import simpledialog, messagebox, Toplevel, filedialog, ttk
 import networkx as nx
 import math
 import json
+import os
+import threading
 
 import config
-from utils import calculate_metric
-from components import InteractiveComparisonPanel, CreateToolTip
+from utils import cached_metric
+from node_metrics import get_node_metrics
+from graph_cache import structural_fingerprint, LRUCache
+from metric_jobs import MetricJobScheduler
+import graph_io
+import graph_binary
+from cycles import get_cycle_index
+from communities import get_partition
+from components import InteractiveComparisonPanel, CreateToolTip, LibraryPicker
+from renderer import GraphRenderer
+from redraw_scheduler import RedrawScheduler
+from graph_editor import GraphEditor
+from journal import EditJournal
+from library_index import LibraryIndex
 import metric_visualizations
 from PIL import ImageGrab
 
+GRAPH_FILETYPES = [("GraphData JSON", "*.json"), ("Binary architecture", "*" + graph_binary.EXTENSION)]
+
 class GraphBuilderApp:
     def __init__(self, root):
         self.root = root
@@ -19,8 +35,8 @@ class GraphBuilderApp:
         # --- Backend Data ---
         self.G = nx.DiGraph()
         self.saved_archs = {} 
-        self.undo_stack = []
-        self.redo_stack = []
+        self.library = LibraryIndex(config.LIBRARY_DIR) # Cached summaries for the Open/Compare pickers
+        self.editor = GraphEditor(self) # Applies edits to self.G/self.agents and keeps undo history
         
         # --- State ---
         self.selected_node = None     
@@ -28,7 +44,7 @@ class GraphBuilderApp:
         self.drag_node = None      
         self.drag_start_pos = None 
         self.is_dragging = False   
-        self.pre_drag_graph_state = None
+        self.pre_drag_pos = None # Dragged node's position before the drag, for undo
         self.sidebar_drag_data = None
         self.current_highlights = [] 
         self.active_vis_mode = None
@@ -47,7 +63,16 @@ class GraphBuilderApp:
         self.agents = config.DEFAULT_AGENTS.copy()
         self.current_agent = config.DEFAULT_CURRENT_AGENT
         
+        # --- Background Analytics ---
+        self.jobs = MetricJobScheduler(self.root)
+        self._job_snapshots = LRUCache(8)
+
+        # --- Crash Recovery ---
+        self.journal = None # Started by start_journal()
+        self.loading = None # Cancel event of the file load in progress
+        
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def setup_ui(self):
         # Toolbar
@@ -61,6 +86,9 @@ class GraphBuilderApp:
 
         self.canvas = tk.Canvas(main_container, bg="white")
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.renderer = GraphRenderer(self.canvas, config.NODE_RADIUS, self.get_draw_pos, self.to_screen, shorten_edges=True,
+                                      get_layer=lambda n: self.get_node_layer(self.G.nodes[n]))
+        self.redraw_scheduler = RedrawScheduler(self.canvas, self.render_frame)
         
         # Canvas Bindings
         self.canvas.bind("<Button-1>", self.on_mouse_down)
@@ -68,6 +96,8 @@ class GraphBuilderApp:
         self.canvas.bind("<ButtonRelease-1>", self.on_mouse_up)
         self.canvas.bind("<Double-Button-1>", self.on_double_click)
         
+        self.canvas.bind("<Configure>", lambda e: self.redraw_view())
+        
         # Zooming
         self.canvas.bind("<MouseWheel>", self.on_zoom)      
         self.canvas.bind("<Button-4>", lambda e: self.on_zoom(e, 1))  
@@ -95,24 +125,19 @@ class GraphBuilderApp:
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.scrollable_content.bind("<Configure>", lambda e: self.scroll_canvas.configure(scrollregion=self.scroll_canvas.bbox("all")))
 
+        self.build_dashboard()
+
         # Footer Status
         self.status_label = tk.Label(self.root, text="Mode: Select & Inspect", bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
         
-        self.redraw()
+        self.redraw(config.CHANGE_STRUCTURE)
 
     # --- Core Helpers ---
 
     def get_node_layer(self, data):
         """Returns the Y-axis layer name. Uses saved data or defaults based on type."""
-        # 1. Use existing layer if set
-        if 'layer' in data and data['layer'] in config.JSAT_LAYERS:
-            return data['layer']
-        
-        # 2. Fallback default
-        if data.get('type') == "Resource":
-            return "Base Environment" 
-        return "Distributed Work"
+        return graph_io.node_layer(data)
 
     def get_draw_pos(self, node_id):
         """Calculates WORLD coordinates based on current view mode."""
@@ -141,28 +166,30 @@ class GraphBuilderApp:
         wy = (sy - self.offset_y) / self.zoom
         return wx, wy
 
+    def node_at_screen(self, sx, sy):
+        """Topmost node under a canvas point, looked up in the renderer's spatial index."""
+        n = self.renderer.node_at(*self.to_world(sx, sy))
+        # The index follows the last render pass; the graph may have been replaced since
+        return n if n is not None and self.G.has_node(n) else None
+
     def on_zoom(self, event, direction=None):
         if direction is None:
             factor = 1.1 if event.delta > 0 else 0.9
         else:
             factor = 1.1 if direction > 0 else 0.9
         self.zoom *= factor
-        self.redraw()
+        # Zoom around the cursor: the world point under it stays in place
+        self.offset_x = event.x - (event.x - self.offset_x) * factor
+        self.offset_y = event.y - (event.y - self.offset_y) * factor
+        self.renderer.scale(factor, event.x, event.y)
+        self.redraw_view_settled()
 
     # --- Interaction Logic ---
 
     def on_mouse_down(self, event):
-        clicked_node = None
-        # Hit detection
-        for n in self.G.nodes:
-            wx, wy = self.get_draw_pos(n)
-            sx, sy = self.to_screen(wx, wy)
-            if math.hypot(event.x - sx, event.y - sy) <= (config.NODE_RADIUS * self.zoom):
-                clicked_node = n
-                break
-                
+        clicked_node = self.node_at_screen(event.x, event.y)
         if clicked_node is not None:
-            self.pre_drag_graph_state = self.G.copy()
+            self.pre_drag_pos = self.G.nodes[clicked_node].get('pos')
             self.drag_node = clicked_node
             self.drag_start_pos = (event.x, event.y)
             self.is_dragging = False
@@ -171,16 +198,15 @@ class GraphBuilderApp:
             if self.mode == "DELETE":
                 clicked_edge = self.find_edge_at(event.x, event.y)
                 if clicked_edge:
-                    self.save_state()
-                    self.G.remove_edge(*clicked_edge)
-                    self.redraw()
+                    self.editor.remove_edge(*clicked_edge)
+                    self.redraw(config.CHANGE_STRUCTURE)
                     return 
 
             # Background Click (Pan or Add)
             self.inspected_node = None
             self.pan_start = (event.x, event.y)
             self.is_dragging = False
-            self.redraw()
+            self.redraw(config.CHANGE_SELECTION)
 
     def on_mouse_drag(self, event):
         if self.drag_node is not None:
@@ -189,7 +215,7 @@ class GraphBuilderApp:
                 self.is_dragging = True
                 wx, wy = self.to_world(event.x, event.y)
                 self.G.nodes[self.drag_node]['pos'] = (wx, wy)
-                self.redraw()
+                self.redraw_scheduler.request("nodes", self.drag_node)
 
         elif self.pan_start is not None:
             if math.hypot(event.x - self.pan_start[0], event.y - self.pan_start[1]) > 5:
@@ -199,26 +225,25 @@ class GraphBuilderApp:
                 self.offset_x += dx
                 self.offset_y += dy
                 self.pan_start = (event.x, event.y)
-                self.redraw()
+                self.renderer.pan(dx, dy)
+                self.redraw_view_settled()
 
     def on_mouse_up(self, event):
         if self.drag_node is not None:
             if self.is_dragging: 
-                # Save history
-                self.undo_stack.append(self.pre_drag_graph_state)
-                if len(self.undo_stack) > config.HISTORY_LIMIT: 
-                    self.undo_stack.pop(0)
-                self.redo_stack.clear()
-                
-                # JSAT Snapping Logic
-                if self.view_mode == config.VIEW_MODE_JSAT:
-                    _, world_y = self.to_world(event.x, event.y)
-                    new_layer = self.get_layer_from_y(world_y)
-                    if new_layer:
-                        self.G.nodes[self.drag_node]['layer'] = new_layer
-                        world_x, _ = self.to_world(event.x, event.y)
-                        self.G.nodes[self.drag_node]['pos'] = (world_x, config.JSAT_LAYERS[new_layer])
-                        self.redraw()
+                with self.editor.transaction():
+                    # The drag moved the node in place; record the whole move as one step
+                    self.editor.set_node_attr(self.drag_node, 'pos', self.G.nodes[self.drag_node]['pos'], old=self.pre_drag_pos)
+
+                    # JSAT Snapping Logic
+                    if self.view_mode == config.VIEW_MODE_JSAT:
+                        _, world_y = self.to_world(event.x, event.y)
+                        new_layer = self.get_layer_from_y(world_y)
+                        if new_layer:
+                            self.editor.set_node_attr(self.drag_node, 'layer', new_layer)
+                            world_x, _ = self.to_world(event.x, event.y)
+                            self.editor.set_node_attr(self.drag_node, 'pos', (world_x, config.JSAT_LAYERS[new_layer]))
+                            self.redraw(config.CHANGE_LAYER)
             else: 
                 # It was just a click, not a drag
                 self.handle_click(self.drag_node)
@@ -230,9 +255,11 @@ class GraphBuilderApp:
             if not self.is_dragging:
                 # Background click -> Add Node?
                 if self.mode in ["ADD_FUNC", "ADD_RES"]:
-                    self.save_state()
                     wx, wy = self.to_world(event.x, event.y)
                     self.add_node(wx, wy)
+            else:
+                # Pan finished: re-render now instead of after the settle delay
+                self.redraw_scheduler.request_later("view", 0)
             self.pan_start = None
             self.is_dragging = False
 
@@ -240,18 +267,17 @@ class GraphBuilderApp:
         self.inspected_node = node_id
         
         if self.mode == "SELECT": 
-            self.redraw()
+            self.redraw(config.CHANGE_SELECTION)
             
         elif self.mode == "DELETE": 
-            self.save_state()
-            self.G.remove_node(node_id)
+            self.editor.remove_node(node_id)
             self.inspected_node = None
-            self.redraw()
+            self.redraw(config.CHANGE_STRUCTURE)
             
         elif self.mode == "ADD_EDGE":
             if not self.selected_node: 
                 self.selected_node = node_id
-                self.redraw()
+                self.redraw(config.CHANGE_SELECTION)
             else:
                 if self.selected_node != node_id:
                     # Enforce Alternating Types (Func <-> Res)
@@ -262,152 +288,107 @@ class GraphBuilderApp:
                         messagebox.showerror("Connection Error", 
                                              f"Cannot connect {type_start} to {type_end}.\nConnections must alternate (Func <-> Res).")
                     else:
-                        self.save_state()
-                        self.G.add_edge(self.selected_node, node_id)
+                        self.editor.add_edge(self.selected_node, node_id)
                 
                 self.selected_node = None
-                self.redraw()
+                self.redraw(config.CHANGE_STRUCTURE)
                 
         elif self.mode == "ASSIGN_AGENT":
             if self.G.nodes[node_id]['agent'] != self.current_agent:
-                self.save_state()
                 self.assign_agent_logic(node_id, self.current_agent)
-                self.redraw()
+                self.redraw(config.CHANGE_AGENTS, config.CHANGE_SELECTION)
 
-    def redraw(self):
-        self.canvas.delete("all")
+    def redraw(self, *changes):
+        """
+        Schedules a canvas repaint. 'changes' (config.CHANGE_*) say what was edited so the
+        matching sidebar sections update too; pan/zoom/view redraws pass none.
+        Several calls before the next frame are rendered in one pass.
+        """
+        self.redraw_scheduler.request("canvas")
+        if changes:
+            self.redraw_scheduler.request("dashboard", *changes)
 
-        # Add highlight first so it aapear behind the nodes/edges, with overlap highlighting
-        if self.current_highlights:
-            edge_counts = {}
-            
-            for h in self.current_highlights:
-                color = h.get('color', 'yellow')
-                width = h.get('width', 8) * self.zoom
-                
-                # 1. Draw Nodes (Halo) - Moved first to match components.py structure
-                for n in h.get('nodes', []):
-                    wx, wy = self.get_draw_pos(n)
-                    sx, sy = self.to_screen(wx, wy)
-                    rad = (config.NODE_RADIUS * self.zoom) + (width/2)
-                    self.canvas.create_oval(sx-rad, sy-rad, sx+rad, sy+rad, fill=color, outline=color)
-                
-                # 2. Draw Edges (Offset)
-                for u, v in h.get('edges', []):
-                    edge_key = tuple(sorted((u, v)))
-                    count = edge_counts.get(edge_key, 0)
-                    edge_counts[edge_key] = count + 1
-                    
-                    # Calculate Offset
-                    offset_step = width / 2
-                    current_offset = (count * width) - offset_step
-                    
-                    wx1, wy1 = self.get_draw_pos(u)
-                    wx2, wy2 = self.get_draw_pos(v)
-                    sx1, sy1 = self.to_screen(wx1, wy1)
-                    sx2, sy2 = self.to_screen(wx2, wy2)
-                    
-                    dx, dy = sx2 - sx1, sy2 - sy1
-                    length = math.hypot(dx, dy)
-                    if length == 0: continue
-                    
-                    nx, ny = -dy / length, dx / length
-                    
-                    os_x = nx * current_offset
-                    os_y = ny * current_offset
-                    
-                    self.canvas.create_line(sx1+os_x, sy1+os_y, sx2+os_x, sy2+os_y, 
-                                          fill=color, width=width, capstyle=tk.ROUND)
-        
-        # 1. Draw Layer Lines (JSAT Mode only)
-        if self.view_mode == config.VIEW_MODE_JSAT:
-            for layer_name in config.LAYER_ORDER:
-                world_y = config.JSAT_LAYERS[layer_name]
-                _, screen_y = self.to_screen(0, world_y)
-                self.canvas.create_line(0, screen_y, 20000, screen_y, fill="#ddd", dash=(4, 4))
-                self.canvas.create_text(10, screen_y - 10, text=layer_name, anchor="w", fill="#888", font=("Arial", 8, "italic"))
-
-        # 2. Draw Edges
-        r = config.NODE_RADIUS * self.zoom
-        for u, v in self.G.edges():
-            wx1, wy1 = self.get_draw_pos(u)
-            wx2, wy2 = self.get_draw_pos(v)
-            sx1, sy1 = self.to_screen(wx1, wy1)
-            sx2, sy2 = self.to_screen(wx2, wy2)
-            
-            dx, dy = sx2 - sx1, sy2 - sy1
-            dist = math.hypot(dx, dy)
-            if dist == 0: continue
-            
-            gap = r + 2
-            # Shorten line so arrow doesn't overlap node
-            tx = sx2 - (dx/dist)*gap
-            ty = sy2 - (dy/dist)*gap
-            self.canvas.create_line(sx1, sy1, tx, ty, arrow=tk.LAST, width=2*self.zoom)
-            
-        # 3. Draw Nodes
-        for n, d in self.G.nodes(data=True):
-            wx, wy = self.get_draw_pos(n)
-            sx, sy = self.to_screen(wx, wy)
-            
-            fill = self.agents.get(d.get('agent'), "white")
-            
-            # Outline logic
-            outline = "black"
-            width = 1
-            if n == self.selected_node:
-                outline, width = "blue", 3
-            elif n == self.inspected_node:
-                outline, width = "orange", 3
-            
-            # Shape logic
-            if d.get('type') == "Function":
-                self.canvas.create_rectangle(sx-r, sy-r, sx+r, sy+r, fill=fill, outline=outline, width=width)
-            else:
-                self.canvas.create_oval(sx-r, sy-r, sx+r, sy+r, fill=fill, outline=outline, width=width)
-            
-            font_size = max(15, int(10 * self.zoom))
-            label_offset = r + (5 * self.zoom)
-            self.canvas.create_text(sx, sy-label_offset, text=d.get('label',''), font=("Arial", font_size, "bold"), anchor = "s")
-            
-        self.rebuild_dashboard()
+    def redraw_view(self):
+        """Schedules a repaint after a pan/zoom/resize; only what enters or leaves the view changes."""
+        self.redraw_scheduler.request("view")
+
+    def redraw_view_settled(self):
+        """
+        Schedules the repaint for a pan/zoom gesture that was applied with native canvas
+        moves; it runs once no step came in for VIEW_SETTLE_MS, to fix widths, fonts and culling.
+        """
+        self.redraw_scheduler.request_later("view", config.VIEW_SETTLE_MS)
+
+    def visible_world_rect(self):
+        """World rectangle shown on the canvas, or None before the canvas has a size."""
+        w, h = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if w <= 1 or h <= 1: return None
+        x0, y0 = self.to_world(0, 0)
+        x1, y1 = self.to_world(w, h)
+        return x0, y0, x1, y1
+
+    def redraw_highlights(self):
+        """Schedules a repaint of the highlight layer only."""
+        self.redraw_scheduler.request("highlights")
+
+    def render_frame(self, dirty):
+        """One render pass for everything marked dirty since the last frame."""
+        if "canvas" in dirty:
+            # Retained drawing: only items whose geometry or style changed are touched
+            self.renderer.render(self.G, self.zoom, self.agents,
+                                 highlights=self.current_highlights,
+                                 layers=(self.view_mode == config.VIEW_MODE_JSAT),
+                                 selected=self.selected_node, inspected=self.inspected_node,
+                                 viewport=self.visible_world_rect())
+        else:
+            if "highlights" in dirty:
+                self.renderer.render_highlights(self.current_highlights)
+            if "view" in dirty:
+                self.renderer.render_view(self.zoom, self.visible_world_rect())
+            if "nodes" in dirty:
+                # Only the dragged nodes, their edges and their highlights move
+                self.renderer.update_nodes([n for n in dirty["nodes"] if self.G.has_node(n)])
+        if "dashboard" in dirty:
+            self.notify(*dirty["dashboard"])
 
     def trigger_visual_analytics(self, mode):
         # Toggle: If clicking same mode, turn off.
         if self.active_vis_mode == mode:
             self.current_highlights = []
             self.active_vis_mode = None
-            self.redraw()
+            self.redraw_highlights()
             return
 
         self.active_vis_mode = mode
+        fp = self.editor.structure_key()
         
         if mode == "cycles":
-            self.current_highlights = metric_visualizations.get_cycle_highlights(self.G)
+            self.current_highlights = metric_visualizations.get_cycle_highlights(self.G, fp)
         elif mode == "interdependence":
-            self.current_highlights = metric_visualizations.get_interdependence_highlights(self.G)
+            self.current_highlights = metric_visualizations.get_interdependence_highlights(self.G, fp)
         elif mode == "modularity":
-            self.current_highlights = metric_visualizations.get_modularity_highlights(self.G)
+            self.current_highlights = metric_visualizations.get_modularity_highlights(self.G, fp)
+        elif mode == "inter_community":
+            self.current_highlights = metric_visualizations.get_inter_community_highlights(self.G, fp)
             
-        self.redraw()
+        self.redraw_highlights()
 
     def _create_scrollable_list_ui(self, parent, label_text, items, colors, click_callback, label_click_callback=None):
         """
         Generic helper to create a scrollable list of clickable buttons.
         items: List of dictionaries [{'label': str, 'tooltip': str}]
         label_click_callback: Optional function to run when the main text is clicked.
+        The list can be refilled later with _update_scrollable_list_ui.
         """
-        container = tk.Frame(parent, bg=parent.cget('bg'))
+        bg = parent.cget('bg')
+        container = tk.Frame(parent, bg=bg)
         
-        # 1. Handle Empty Case
-        if not items:
-             tk.Label(container, text=f"{label_text} (None)", bg=parent.cget('bg')).pack(anchor="w")
-             return container
+        # 1. Empty Case (shown instead of the list when there are no items)
+        empty_lbl = tk.Label(container, bg=bg)
 
         # 2. Main Label (Fixed on Left)
         # We assign it to 'lbl' so we can configure it if a callback exists
-        lbl = tk.Label(container, text=f"{label_text} [", bg=parent.cget('bg'))
-        lbl.pack(side=tk.LEFT, anchor="n", pady=2)
+        lbl = tk.Label(container, bg=bg)
         
         # --- NEW: Make Label Clickable if requested ---
         if label_click_callback:
@@ -417,7 +398,6 @@ class GraphBuilderApp:
         
         # 3. Scrollable Window Setup
         scroll_wrapper = tk.Frame(container, bg="white")
-        scroll_wrapper.pack(side=tk.LEFT, fill=tk.X, expand=True, anchor="n")
 
         h_scroll = tk.Scrollbar(scroll_wrapper, orient=tk.HORIZONTAL)
         h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
@@ -429,125 +409,117 @@ class GraphBuilderApp:
         inner_frame = tk.Frame(h_canvas, bg="white")
         h_canvas.create_window((0, 0), window=inner_frame, anchor="nw")
         
-        # 4. Generate Buttons
-        for i, item in enumerate(items):
-            txt_color = colors[i % len(colors)]
-            
-            btn = tk.Label(inner_frame, text=str(item['label']), font=("Arial", 14, "bold"), 
-                           fg=txt_color, cursor="hand2", bg="white")
-            btn.pack(side=tk.LEFT)
-            
-            btn.bind("<Button-1>", lambda e, idx=i: click_callback(idx))
-            
-            if item.get('tooltip'):
-                CreateToolTip(btn, text=item['tooltip'])
-
-            if i < len(items) - 1:
-                tk.Label(inner_frame, text=", ", bg="white").pack(side=tk.LEFT)
-        
-        tk.Label(inner_frame, text=" ]", bg="white").pack(side=tk.LEFT)
-        
-        inner_frame.update_idletasks()
-        h_canvas.config(scrollregion=h_canvas.bbox("all"))
-        
         def _on_scroll(event):
             h_canvas.xview_scroll(int(-1*(event.delta/120)), "units")
         h_canvas.bind("<MouseWheel>", _on_scroll)
-        
+
+        container.list_parts = {
+            "empty": empty_lbl, "label": lbl, "wrapper": scroll_wrapper, "canvas": h_canvas,
+            "inner": inner_frame, "close": tk.Label(inner_frame, text=" ]", bg="white"),
+            "buttons": [], # (separator or None, button, tooltip) per item
+            "colors": colors, "click": click_callback,
+        }
+        self._update_scrollable_list_ui(container, label_text, items)
         return container
-    
-    def rebuild_dashboard(self):
-        """Refreshes the sidebar. Careful not to duplicate widgets."""
-        
-        # 1. Clear Inspector (we will rebuild it at the end)
-        for w in self.inspector_frame.winfo_children(): w.destroy()
 
-        # 2. Clear Scrollable Content (Stats & Agent List)
-        for w in self.scrollable_content.winfo_children(): w.destroy()
-        
+    def _update_scrollable_list_ui(self, container, label_text, items):
+        """Refills a list made by _create_scrollable_list_ui, reusing its buttons and tooltips."""
+        parts = container.list_parts
+
+        # 1. Handle Empty Case
+        if not items:
+            parts["empty"].config(text=f"{label_text} (None)")
+            self._show_only(container, (parts["empty"], {"anchor": "w"}))
+            return
+
+        parts["label"].config(text=f"{label_text} [")
+        self._show_only(container, (parts["label"], {"side": tk.LEFT, "anchor": "n", "pady": 2}),
+                        (parts["wrapper"], {"side": tk.LEFT, "fill": tk.X, "expand": True, "anchor": "n"}))
+
+        # 4. Buttons: drop extra ones, relabel the rest, add the missing ones
+        buttons, colors, inner = parts["buttons"], parts["colors"], parts["inner"]
+        for sep, btn, _ in buttons[len(items):]:
+            if sep is not None: sep.destroy()
+            btn.destroy()
+        del buttons[len(items):]
+
+        for i, item in enumerate(items):
+            txt_color = colors[i % len(colors)]
+            if i < len(buttons):
+                _, btn, tip = buttons[i]
+                btn.config(text=str(item['label']), fg=txt_color)
+                tip.text = item.get('tooltip', '')
+                continue
+
+            sep = tk.Label(inner, text=", ", bg="white") if i else None
+            if sep is not None: sep.pack(side=tk.LEFT)
+            btn = tk.Label(inner, text=str(item['label']), font=("Arial", 14, "bold"), 
+                           fg=txt_color, cursor="hand2", bg="white")
+            btn.pack(side=tk.LEFT)
+            btn.bind("<Button-1>", lambda e, idx=i: parts["click"](idx))
+            buttons.append((sep, btn, CreateToolTip(btn, text=item.get('tooltip', ''))))
+
+        # Keep the closing bracket after the last button
+        parts["close"].pack_forget()
+        parts["close"].pack(side=tk.LEFT)
+        
+        inner.update_idletasks()
+        parts["canvas"].config(scrollregion=parts["canvas"].bbox("all"))
+
+    # --- Section Widgets (created once, updated in place) ---
+
+    def _section_widget(self, body, key, create):
+        """Widget 'key' of a section body: made by create() on first use and reused afterwards."""
+        if not hasattr(body, "section_widgets"): body.section_widgets = {}
+        w = body.section_widgets.get(key)
+        if w is None:
+            w = body.section_widgets[key] = create()
+        return w
+
+    def _show_only(self, parent, *entries):
+        """Packs exactly the (widget, pack options) 'entries' in 'parent', in order. No-op if they already are."""
+        shown = [w for w, _ in entries]
+        if getattr(parent, "shown_widgets", None) == shown: return
+        for w in getattr(parent, "shown_widgets", []): w.pack_forget()
+        for w, opts in entries: w.pack(**opts)
+        parent.shown_widgets = shown
+
+    def _render_list(self, body, label_text, items, colors, click_callback, label_click_callback=None):
+        """Scrollable list of a section body: created on first use, refilled in place afterwards."""
+        if not hasattr(body, "section_widgets"): body.section_widgets = {}
+        ui = body.section_widgets.get("list")
+        if ui is None:
+            ui = body.section_widgets["list"] = self._create_scrollable_list_ui(body, label_text, items, colors,
+                                                                              click_callback, label_click_callback)
+        else:
+            self._update_scrollable_list_ui(ui, label_text, items)
+        return ui
+    
+    def build_dashboard(self):
+        """Creates the sidebar sections once; notify() later updates them in place."""
         # --- Stats Section ---
         tk.Label(self.scrollable_content, text="Network Statistics", font=("Arial", 14, "bold"), bg="#f0f0f0").pack(fill=tk.X, pady=(10, 5))
         stats_frame = tk.Frame(self.scrollable_content, bg="white", bd=1, relief=tk.SOLID)
         stats_frame.pack(fill=tk.X, padx=5)
-        
-        tk.Label(stats_frame, text=f"Density: {calculate_metric(self.G, 'Density')}", bg="white").pack(anchor="w", padx=5)
-        tk.Label(stats_frame, text=f"Avg Clustering: {calculate_metric(self.G, 'Avg Clustering')}", bg="white").pack(anchor="w", padx=5)
-        tk.Label(stats_frame, text=f"Cyclomatic No.: {calculate_metric(self.G, 'Cyclomatic Number')}", bg="white").pack(anchor="w", padx=5)
+
+        self.stat_widgets = {}
+        self.stat_widgets["Density"] = tk.Label(stats_frame, bg="white")
+        self.stat_widgets["Avg Clustering"] = tk.Frame(stats_frame, bg="white")
+        self.stat_widgets["Cyclomatic Number"] = tk.Label(stats_frame, bg="white")
         
         # --- Interdependence (Clickable) ---
-        int_val = calculate_metric(self.G, 'Interdependence')
-        lbl_int = tk.Label(stats_frame, text=f"Interdependence: {int_val}", bg="white", cursor="hand2", fg="blue")
-        lbl_int.pack(anchor="w", padx=5)
+        lbl_int = tk.Label(stats_frame, bg="white", cursor="hand2", fg="blue")
         lbl_int.bind("<Button-1>", lambda e: self.trigger_visual_analytics("interdependence"))
+        self.stat_widgets["Interdependence"] = lbl_int
 
-        # --- Total Cycles (Clickable) ---
-        cyc_val = calculate_metric(self.G, 'Total Cycles')
-        lbl_cyc = tk.Label(stats_frame, text=f"Total Cycles: {cyc_val}", bg="white", cursor="hand2", fg="blue")
-        lbl_cyc.pack(anchor="w", padx=5)
-        lbl_cyc.bind("<Button-1>", lambda e: self.trigger_visual_analytics("cycles"))
-
-        # --- Avg Cycle Length (Using Helper) ---
-        cycles = list(nx.simple_cycles(self.G))
-        cycle_items = []
-        if cycles:
-            lengths = [len(c) for c in cycles]
-            avg = sum(lengths) / len(lengths)
-            lbl_text = f"Avg Cycle Length: {avg:.2f}"
-            for i, c in enumerate(cycles):
-                # Tooltip: "NodeA -> NodeB -> NodeC"
-                path_str = " -> ".join([str(self.G.nodes[n].get('label', n)) for n in c])
-                cycle_items.append({'label': len(c), 'tooltip': f"Cycle {i+1}:\n{path_str}"})
-        else:
-            lbl_text = "Avg Cycle Length: 0.0"
-
-        cycle_colors = ["blue"]
-        
-        def on_main_cycle_click(idx): 
-            self.trigger_single_cycle_vis(idx)
-            
-        c_ui = self._create_scrollable_list_ui(stats_frame, lbl_text, cycle_items, cycle_colors, on_main_cycle_click)
-        c_ui.pack(fill=tk.X, padx=5, pady=2)
+        # --- Cycles (Total + Avg Length list), Global Efficiency, Modularity ---
+        self.stat_widgets["cycles"] = tk.Frame(stats_frame, bg="white")
+        self.stat_widgets["Global Efficiency"] = tk.Frame(stats_frame, bg="white")
+        self.stat_widgets["modularity"] = tk.Frame(stats_frame, bg="white")
 
-        # --- Global Efficiency ---
-        tk.Label(stats_frame, text=f"Global Efficiency: {calculate_metric(self.G, 'Global Efficiency')}", bg="white").pack(anchor="w", padx=5)
-
-        # --- Modularity (Using Helper) ---
-        # --- Modularity (Using Helper) ---
-        try:
-            mod_val = calculate_metric(self.G, 'Modularity')
-            comms = list(nx.community.greedy_modularity_communities(self.G.to_undirected()))
-            comms.sort(key=len, reverse=True)
-            
-            mod_items = []
-            for i, c in enumerate(comms):
-                node_names = [str(self.G.nodes[n].get('label', n)) for n in c]
-                tt_text = f"Group {i+1} ({len(c)} nodes):\n" + ", ".join(node_names)
-                mod_items.append({'label': len(c), 'tooltip': tt_text})
-
-            mod_colors = ["blue"] # <--- Fixed Variable Name
-            
-            # Click Handler 1: Individual Group
-            def on_main_mod_click(idx): 
-                self.trigger_single_modularity_vis(idx)
-
-            # Click Handler 2: All Modules (NEW)
-            def on_mod_label_click():
-                self.trigger_visual_analytics("modularity")
-
-            # Pass both callbacks
-            m_ui = self._create_scrollable_list_ui(
-                stats_frame, 
-                f"Modularity: {mod_val}", 
-                mod_items, 
-                mod_colors, 
-                on_main_mod_click,
-                label_click_callback=on_mod_label_click # <--- NEW Argument
-            )
-            m_ui.pack(fill=tk.X, padx=5, pady=2)
-            
-        except Exception as e:
-            print(f"Mod UI Error: {e}")
-            tk.Label(stats_frame, text="Modularity: Err", bg="white").pack(anchor="w", padx=5)
+        for w in self.stat_widgets.values():
+            if isinstance(w, tk.Label): w.pack(anchor="w", padx=5)
+            else: w.pack(fill=tk.X)
 
         # --- Agent Overview Section ---
         tk.Label(self.scrollable_content, text="Agent Overview", font=("Arial", 14, "bold"), bg="#f0f0f0").pack(fill=tk.X, pady=(15, 2))
@@ -557,103 +529,359 @@ class GraphBuilderApp:
         ctrl_frame.pack(fill=tk.X, padx=5, pady=5)
         tk.Button(ctrl_frame, text="New Agent", command=self.create_agent, bg="white").pack(pady=5)
 
+        self.agent_list_frame = tk.Frame(self.scrollable_content, bg="#f0f0f0")
+        self.agent_list_frame.pack(fill=tk.X)
+        self.agent_rows = {} # agent name -> widgets of its row
+
+        # --- Inspector Section ---
+        self.inspector_empty = tk.Label(self.inspector_frame, text="(Select a node to inspect)", bg="#fff8e1", fg="#888")
+        self.inspector_body = tk.Frame(self.inspector_frame, bg="#fff8e1")
+        
+        tk.Label(self.inspector_body, text="SELECTED NODE INSPECTOR", bg="#fff8e1", font=("Arial", 10, "bold")).pack(pady=2)
+        
+        # ID & Label
+        r1 = tk.Frame(self.inspector_body, bg="#fff8e1"); r1.pack(fill=tk.X, padx=5)
+        self.inspector_id_label = tk.Label(r1, bg="#fff8e1", font=("Arial", 9, "bold"))
+        self.inspector_id_label.pack(anchor="w")
+        
+        # Layer Selector
+        r2 = tk.Frame(self.inspector_body, bg="#fff8e1"); r2.pack(fill=tk.X, padx=5, pady=2)
+        tk.Label(r2, text="Layer:", bg="#fff8e1").pack(side=tk.LEFT)
+        
+        self.layer_var = tk.StringVar()
+        layer_box = ttk.Combobox(r2, textvariable=self.layer_var, values=config.LAYER_ORDER, state="readonly", width=18)
+        layer_box.pack(side=tk.LEFT, padx=5)
+        
+        def on_layer_change(event):
+            self.editor.set_node_attr(self.inspected_node, 'layer', self.layer_var.get())
+            self.redraw(config.CHANGE_LAYER)
+        layer_box.bind("<<ComboboxSelected>>", on_layer_change)
+
+        # Node Metrics
+        self.inspector_metrics = tk.Frame(self.inspector_body, bg="#fff8e1")
+        self.inspector_metrics.pack(fill=tk.X, padx=5, pady=5)
+
+
+    def notify(self, *changes):
+        """
+        Updates the sidebar sections affected by 'changes' (config.CHANGE_*).
+        Sections are updated in place; unaffected sections are not touched.
+        """
+        sections = set()
+        for change in changes:
+            sections.update(config.DASHBOARD_SECTIONS[change])
+        if not sections: return
+
+        # The editor's revision stands in for a fingerprint: no hashing of the graph per edit
+        fp = self.editor.structure_key()
+        self.jobs.retire("dashboard", fp)
+
+        if "stats" in sections: self.update_stats(fp)
+        if "agents" in sections: self.update_agent_list()
+        if "inspector" in sections: self.update_inspector(fp)
+
+    def update_stats(self, fp):
+        """Metric values are cached per revision, so edits that do not change them are lookups."""
+        w = self.stat_widgets
+        w["Density"].config(text=f"Density: {cached_metric(self.G, 'Density', fp)}")
+        self._fill_metric_holder(w["Avg Clustering"], "dashboard", "Avg Clustering", "Avg Clustering", "Avg Clustering", self.G, fp)
+        w["Cyclomatic Number"].config(text=f"Cyclomatic No.: {cached_metric(self.G, 'Cyclomatic Number', fp)}")
+        w["Interdependence"].config(text=f"Interdependence: {cached_metric(self.G, 'Interdependence', fp, agent_key=self.editor.agent_key())}")
+
+        # Filled in once the cycle index is ready
+        self._deferred_section(w["cycles"], "dashboard", "cycles", "Total Cycles", self.G, fp,
+                               get_cycle_index(self.G, fp, compute=False),
+                               lambda g: get_cycle_index(g, fp),
+                               self._render_cycle_stats)
+
+        self._fill_metric_holder(w["Global Efficiency"], "dashboard", "Global Efficiency", "Global Efficiency", "Global Efficiency", self.G, fp)
+
+        self._deferred_section(w["modularity"], "dashboard", "modularity", "Modularity", self.G, fp,
+                               get_partition(self.G, fp, compute=False),
+                               lambda g: get_partition(g, fp),
+                               self._render_modularity_stats)
+
+    def update_agent_list(self):
+        """Adds, removes and relabels agent rows and node buttons instead of rebuilding the list."""
         # Group Nodes by Agent
         agent_map = {name: [] for name in self.agents.keys()}
         for node, data in self.G.nodes(data=True):
             ag = data.get('agent', 'Unassigned')
             agent_map.setdefault(ag, []).append(node)
 
-        # Render Agent List
+        for agent_name in [a for a in self.agent_rows if a not in self.agents]:
+            self.agent_rows.pop(agent_name)["frame"].destroy()
+
         for agent_name, color in self.agents.items():
-            af = tk.Frame(self.scrollable_content, bg="#e0e0e0", bd=1, relief=tk.RAISED)
-            af.pack(fill=tk.X, pady=2, padx=5)
-            # Store name on widget for drag-and-drop detection
-            af.agent_name = agent_name 
-            
-            # Header (Color + Name)
-            hf = tk.Frame(af, bg="#e0e0e0")
-            hf.pack(fill=tk.X)
-            hf.agent_name = agent_name
-            
-            # Color Box
-            cb = tk.Label(hf, bg=color, width=3)
-            cb.pack(side=tk.LEFT, padx=5)
-            cb.bind("<Button-1>", lambda e, a=agent_name: self.edit_agent(a))
-            
-            # Name Label
-            lbl = tk.Label(hf, text=agent_name, bg="#e0e0e0", font=("Arial", 10, "bold"))
-            lbl.pack(side=tk.LEFT, fill=tk.X)
-            lbl.bind("<Button-1>", lambda e, a=agent_name: self.edit_agent(a))
-
-            # Nodes List
-            nodes_list = agent_map.get(agent_name, [])
-            if nodes_list:
-                for nid in nodes_list:
-                    nlbl = self.G.nodes[nid].get('label', str(nid))
-                    btn = tk.Button(af, text=f"• {nlbl}", anchor="w", bg="white", relief=tk.FLAT, font=("Arial", 9),
-                                    command=lambda n=nid: self.handle_click(n))
-                    btn.pack(fill=tk.X, padx=10, pady=1)
-                    
-                    # Sidebar Drag Events
-                    btn.bind("<Button-1>", lambda e, n=nid: self.on_sidebar_node_press(e, n))
-                    btn.bind("<B1-Motion>", lambda e: None) 
-                    btn.bind("<ButtonRelease-1>", self.on_sidebar_node_release)
-            else:
-                tk.Label(af, text="(Empty)", bg="#e0e0e0", fg="#666", font=("Arial", 8, "italic")).pack(anchor="w", padx=10)
+            row = self.agent_rows.get(agent_name)
+            if row is None:
+                row = self._create_agent_row(agent_name)
+            if row["color"].cget("bg") != color:
+                row["color"].config(bg=color)
+            self._sync_agent_nodes(row, agent_map.get(agent_name, []))
+
+        # Keep rows in agent order (a renamed agent moves to the end of self.agents)
+        order = list(self.agents)
+        if list(self.agent_rows) != order:
+            for name in order: self.agent_rows[name]["frame"].pack_forget()
+            for name in order: self.agent_rows[name]["frame"].pack(fill=tk.X, pady=2, padx=5)
+            self.agent_rows = {name: self.agent_rows[name] for name in order}
+
+    def _create_agent_row(self, agent_name):
+        af = tk.Frame(self.agent_list_frame, bg="#e0e0e0", bd=1, relief=tk.RAISED)
+        af.pack(fill=tk.X, pady=2, padx=5)
+        # Store name on widget for drag-and-drop detection
+        af.agent_name = agent_name 
+        
+        # Header (Color + Name)
+        hf = tk.Frame(af, bg="#e0e0e0")
+        hf.pack(fill=tk.X)
+        hf.agent_name = agent_name
+        
+        # Color Box
+        cb = tk.Label(hf, bg=self.agents[agent_name], width=3)
+        cb.pack(side=tk.LEFT, padx=5)
+        cb.bind("<Button-1>", lambda e, a=agent_name: self.edit_agent(a))
+        
+        # Name Label
+        lbl = tk.Label(hf, text=agent_name, bg="#e0e0e0", font=("Arial", 10, "bold"))
+        lbl.pack(side=tk.LEFT, fill=tk.X)
+        lbl.bind("<Button-1>", lambda e, a=agent_name: self.edit_agent(a))
+
+        empty = tk.Label(af, text="(Empty)", bg="#e0e0e0", fg="#666", font=("Arial", 8, "italic"))
+        row = {"frame": af, "color": cb, "empty": empty, "buttons": {}}
+        self.agent_rows[agent_name] = row
+        return row
+
+    def _sync_agent_nodes(self, row, nodes):
+        """One button per node of the agent, in node order."""
+        buttons = row["buttons"]
+        wanted = set(nodes)
+        for nid in [n for n in buttons if n not in wanted]:
+            buttons.pop(nid).destroy()
+
+        for nid in nodes:
+            text = f"• {self.G.nodes[nid].get('label', str(nid))}"
+            btn = buttons.get(nid)
+            if btn is None:
+                btn = tk.Button(row["frame"], text=text, anchor="w", bg="white", relief=tk.FLAT, font=("Arial", 9),
+                                command=lambda n=nid: self.handle_click(n))
+                btn.pack(fill=tk.X, padx=10, pady=1)
+                
+                # Sidebar Drag Events
+                btn.bind("<Button-1>", lambda e, n=nid: self.on_sidebar_node_press(e, n))
+                btn.bind("<B1-Motion>", lambda e: None) 
+                btn.bind("<ButtonRelease-1>", self.on_sidebar_node_release)
+                buttons[nid] = btn
+            elif btn.cget("text") != text:
+                btn.config(text=text)
+
+        # Nodes that joined from another agent were appended; restore node order
+        if list(buttons) != nodes:
+            for nid in nodes: buttons[nid].pack_forget()
+            for nid in nodes: buttons[nid].pack(fill=tk.X, padx=10, pady=1)
+            row["buttons"] = {nid: buttons[nid] for nid in nodes}
+
+        if nodes:
+            row["empty"].pack_forget()
+        else:
+            row["empty"].pack(anchor="w", padx=10)
 
-        # --- Inspector Section (Built only once!) ---
-        if self.inspected_node is not None and self.G.has_node(self.inspected_node):
-            d = self.G.nodes[self.inspected_node]
-            
-            tk.Label(self.inspector_frame, text="SELECTED NODE INSPECTOR", bg="#fff8e1", font=("Arial", 10, "bold")).pack(pady=2)
-            
-            # ID & Label
-            r1 = tk.Frame(self.inspector_frame, bg="#fff8e1"); r1.pack(fill=tk.X, padx=5)
-            tk.Label(r1, text=f"ID: {self.inspected_node} | Lbl: {d.get('label')}", bg="#fff8e1", font=("Arial", 9, "bold")).pack(anchor="w")
-            
-            # Layer Selector
-            r2 = tk.Frame(self.inspector_frame, bg="#fff8e1"); r2.pack(fill=tk.X, padx=5, pady=2)
-            tk.Label(r2, text="Layer:", bg="#fff8e1").pack(side=tk.LEFT)
-            
-            current_layer = self.get_node_layer(d)
-            layer_var = tk.StringVar(value=current_layer)
-            layer_box = ttk.Combobox(r2, textvariable=layer_var, values=config.LAYER_ORDER, state="readonly", width=18)
-            layer_box.pack(side=tk.LEFT, padx=5)
-            
-            def on_layer_change(event):
-                self.save_state()
-                self.G.nodes[self.inspected_node]['layer'] = layer_var.get()
-                self.redraw()
-            layer_box.bind("<<ComboboxSelected>>", on_layer_change)
-
-            # Node Metrics
-            r3 = tk.Frame(self.inspector_frame, bg="#fff8e1"); r3.pack(fill=tk.X, padx=5, pady=5)
-            
-            in_d = self.G.in_degree(self.inspected_node)
-            out_d = self.G.out_degree(self.inspected_node)
-            
-            try: deg_c = nx.degree_centrality(self.G)[self.inspected_node]
-            except: deg_c = 0.0
-            
-            try: eig_c = nx.eigenvector_centrality(self.G, max_iter=100, tol=1e-04).get(self.inspected_node, 0)
-            except: eig_c = 0.0
+    def update_inspector(self, fp):
+        node = self.inspected_node
+        if node is None or not self.G.has_node(node):
+            self.inspector_body.pack_forget()
+            self.inspector_empty.pack(pady=5)
+            return
 
-            try: 
-                # Betweenness finds "Bottlenecks"
-                bet_c = nx.betweenness_centrality(self.G)[self.inspected_node]
-            except: bet_c = 0.0
-            
-            stat_txt = (f"In-Degree:     {in_d}\n"
-                        f"Out-Degree:    {out_d}\n"
-                        f"Degree Cent.:  {deg_c:.3f}\n"
-                        f"Eigenvector:   {eig_c:.3f}\n"
-                        f"Betweenness:   {bet_c:.3f}\n"
-                        )
-            
-            tk.Label(r3, text=stat_txt, bg="#fff8e1", justify=tk.LEFT, font=("Consolas", 13)).pack(anchor="w")
+        self.inspector_empty.pack_forget()
+        self.inspector_body.pack(fill=tk.X)
+
+        d = self.G.nodes[node]
+        self.inspector_id_label.config(text=f"ID: {node} | Lbl: {d.get('label')}")
+        self.layer_var.set(self.get_node_layer(d))
+
+        # One table per revision covers every node, so re-selecting or dragging is a lookup
+        self._deferred_section(self.inspector_metrics, "dashboard", "node_metrics", "Node metrics", self.G, fp,
+                               get_node_metrics(self.G, fp, compute=False),
+                               lambda g: get_node_metrics(g, fp),
+                               lambda body, table: self._render_node_stats(body, table, node, fp))
+
+    def _render_node_stats(self, body, table, node, fp):
+        row = table.row(node) if table is not None else None
+        if row is None:
+            err = self._section_widget(body, "error", lambda: tk.Label(body, text="Node metrics: Err", bg="#fff8e1"))
+            self._show_only(body, (err, {"anchor": "w"}))
+            return
+        stat_txt = (f"In-Degree:     {row['in_degree']}\n"
+                    f"Out-Degree:    {row['out_degree']}\n"
+                    f"Degree Cent.:  {row['degree']:.3f}\n"
+                    f"Eigenvector:   {row['eigenvector']:.3f}\n"
+                    f"Betweenness:   {self._format_betweenness(row)}\n"
+                    )
+        stats = self._section_widget(body, "stats", lambda: tk.Label(body, bg="#fff8e1", justify=tk.LEFT, font=("Consolas", 13)))
+        stats.config(text=stat_txt)
+        
+        # Sampled estimate on large graphs -> offer the exact O(n*m) computation
+        if row['betweenness_exact']:
+            self._show_only(body, (stats, {"anchor": "w"}))
+            return
+
+        def refine():
+            refine_btn.config(text="Refining…", state=tk.DISABLED)
+            snapshot = self._job_snapshot(self.G, fp)
+            def done(column):
+                # Tk thread: the shared table changes only here, in one step
+                if column is not None: table.use_exact_betweenness(column)
+                self.notify(config.CHANGE_SELECTION)
+            self.jobs.submit(("dashboard", "refine_betweenness"), fp,
+                             lambda: table.exact_betweenness(snapshot), done)
+        refine_btn = self._section_widget(body, "refine", lambda: tk.Button(body, bg="white"))
+        # The button is reused, so the command is rebound to this node's table each time
+        refine_btn.config(text="Refine to exact", state=tk.NORMAL, command=refine)
+        self._show_only(body, (stats, {"anchor": "w"}), (refine_btn, {"anchor": "w"}))
+
+    def _job_snapshot(self, graph, fp):
+        """Private copy of 'graph' for background jobs, shared by every job of the same revision."""
+        snap = self._job_snapshots.peek(fp)
+        if snap is None:
+            snap = graph.copy()
+            self._job_snapshots.put(fp, snap)
+        return snap
+
+    def _deferred_section(self, parent, owner, name, title, graph, fp, cached_value, compute, render):
+        """
+        Shows render(body, value) in 'parent'. When the value is not cached yet, shows
+        "<title>: computing…" (or just "computing…" if title is None) instead and runs
+        compute(snapshot) on the metric worker first.
+        The placeholder and body frame are made on the first call; render() gets the same body
+        every time and updates the widgets it made before (see _section_widget).
+        Jobs for an older revision of the graph are cancelled by jobs.retire().
+        """
+        bg = parent.cget('bg')
+        body = self._section_widget(parent, "body", lambda: tk.Frame(parent, bg=bg))
+
+        def show(value):
+            self._show_only(parent, (body, {"fill": tk.BOTH, "expand": True}))
+            render(body, value)
+
+        if cached_value is not None:
+            self.jobs.cancel((owner, name)) # A pending job would overwrite this with an older render
+            show(cached_value)
+            return
+
+        placeholder = self._section_widget(parent, "placeholder", lambda: tk.Label(parent, bg=bg, fg="#888"))
+        placeholder.config(text="computing…" if title is None else f"{title}: computing…")
+        self._show_only(parent, (placeholder, {"anchor": "w", "padx": 5}))
+        
+        def on_done(value):
+            if not parent.winfo_exists(): return # Window was closed meanwhile
+            show(value)
+
+        snapshot = self._job_snapshot(graph, fp)
+        self.jobs.submit((owner, name), fp, lambda: compute(snapshot), on_done)
+
+    def _deferred_metric_label(self, parent, owner, job_name, metric_name, title, graph, fp, **label_opts):
+        """A 'title: value' label (just 'value' if title is None) filled in by the metric worker if not cached."""
+        holder = tk.Frame(parent, bg=parent.cget('bg'))
+        holder.pack(fill=tk.X)
+        self._fill_metric_holder(holder, owner, job_name, metric_name, title, graph, fp, **label_opts)
+        return holder
+
+    def _fill_metric_holder(self, holder, owner, job_name, metric_name, title, graph, fp, **label_opts):
+        """(Re)fills an existing holder frame with the metric label."""
+        def render(body, value):
+            if value is None: value = "Err"
+            text = str(value) if title is None else f"{title}: {value}"
+            label = self._section_widget(body, "value", lambda: tk.Label(body, bg=body.cget('bg'), **label_opts))
+            label.config(text=text)
+            self._show_only(body, (label, {"anchor": "w", "padx": 5}))
+        
+        self._deferred_section(holder, owner, job_name, title, graph, fp,
+                               cached_metric(graph, metric_name, fp, compute=False),
+                               lambda g: cached_metric(g, metric_name, fp),
+                               render)
+
+    def _format_betweenness(self, row):
+        """Exact value, or the sampled estimate with its standard error ("SE ?" when too few samples reached the node)."""
+        if row['betweenness_exact']:
+            return f"{row['betweenness']:.3f}"
+        error = row['betweenness_error']
+        return f"≈ {row['betweenness']:.3f} (SE {'?' if math.isnan(error) else f'{error:.3f}'})"
+
+    def _clickable_label(self, parent, command):
+        """Blue hand-cursor label that runs command() when clicked."""
+        lbl = tk.Label(parent, bg="white", cursor="hand2", fg="blue")
+        lbl.bind("<Button-1>", lambda e: command())
+        return lbl
+
+    def _render_cycle_stats(self, body, cycle_index):
+        """Total Cycles label and the clickable Avg Cycle Length list."""
+        if cycle_index is None:
+            err = self._section_widget(body, "error", lambda: tk.Label(body, text="Total Cycles: Err", bg="white"))
+            self._show_only(body, (err, {"anchor": "w", "padx": 5}))
+            return
 
+        # --- Total Cycles (Clickable) ---
+        lbl_cyc = self._section_widget(body, "total", lambda: self._clickable_label(body, lambda: self.trigger_visual_analytics("cycles")))
+        lbl_cyc.config(text=f"Total Cycles: {cycle_index.count_label()}")
+
+        # --- Avg Cycle Length (Using Helper) ---
+        cycle_items = []
+        if len(cycle_index):
+            lbl_text = f"Avg Cycle Length: {cycle_index.average_label()}"
+            # Buttons only for the first few; the average still covers every enumerated cycle
+            for i, c in enumerate(cycle_index.paths[:config.CYCLE_DISPLAY_LIMIT]):
+                # Tooltip: "NodeA -> NodeB -> NodeC"
+                path_str = " -> ".join([str(self.G.nodes[n].get('label', n)) for n in c if self.G.has_node(n)])
+                cycle_items.append({'label': len(c), 'tooltip': f"Cycle {i+1}:\n{path_str}"})
         else:
-            tk.Label(self.inspector_frame, text="(Select a node to inspect)", bg="#fff8e1", fg="#888").pack(pady=5)
+            lbl_text = "Avg Cycle Length: 0.0"
+
+        cycle_colors = ["blue"]
+        
+        def on_main_cycle_click(idx): 
+            self.trigger_single_cycle_vis(idx)
+            
+        c_ui = self._render_list(body, lbl_text, cycle_items, cycle_colors, on_main_cycle_click)
+        self._show_only(body, (lbl_cyc, {"anchor": "w", "padx": 5}), (c_ui, {"fill": tk.X, "padx": 5, "pady": 2}))
+
+    def _render_modularity_stats(self, body, partition):
+        """Clickable Modularity group list plus the Inter-Group Edges toggle."""
+        if partition is None:
+            err = self._section_widget(body, "error", lambda: tk.Label(body, text="Modularity: Err", bg="white"))
+            self._show_only(body, (err, {"anchor": "w", "padx": 5}))
+            return
+
+        mod_items = []
+        for i, c in enumerate(partition.groups):
+            node_names = [str(self.G.nodes[n].get('label', n)) for n in c if self.G.has_node(n)]
+            tt_text = f"Group {i+1} ({len(c)} nodes):\n" + ", ".join(node_names)
+            mod_items.append({'label': len(c), 'tooltip': tt_text})
+
+        mod_colors = ["blue"]
+        
+        # Click Handler 1: Individual Group
+        def on_main_mod_click(idx): 
+            self.trigger_single_modularity_vis(idx)
+
+        # Click Handler 2: All Modules
+        def on_mod_label_click():
+            self.trigger_visual_analytics("modularity")
+
+        m_ui = self._render_list(
+            body, 
+            f"Modularity: {partition.label()}", 
+            mod_items, 
+            mod_colors, 
+            on_main_mod_click,
+            label_click_callback=on_mod_label_click
+        )
+
+        # --- Inter-Group Edges (Clickable) ---
+        lbl_inter = self._section_widget(body, "inter", lambda: self._clickable_label(body, lambda: self.trigger_visual_analytics("inter_community")))
+        lbl_inter.config(text=f"Inter-Group Edges: {len(partition.inter_edges)}")
+        self._show_only(body, (m_ui, {"fill": tk.X, "padx": 5, "pady": 2}), (lbl_inter, {"anchor": "w", "padx": 5}))
 
     def toggle_view(self):
         if self.view_mode == config.VIEW_MODE_FREE:
@@ -690,6 +918,7 @@ class GraphBuilderApp:
         
         tk.Label(r2, text="| RAM:", fg="#888").pack(side=tk.LEFT, padx=5)
         tk.Button(r2, text="Store Architecture", command=self.save_architecture_internal).pack(side=tk.LEFT, padx=2)
+        tk.Button(r2, text="Import Folder", command=self.import_folder).pack(side=tk.LEFT, padx=2)
         tk.Button(r2, text="Compare Architecture", command=self.open_comparison_dialog, bg="#ffd700", font=("Arial", 9, "bold")).pack(side=tk.LEFT, padx=5)
         
         tk.Label(r2, text="| Disk:", fg="#888").pack(side=tk.LEFT, padx=5)
@@ -726,22 +955,15 @@ class GraphBuilderApp:
     # --- Node/Agent Logic ---
 
     def assign_agent_logic(self, node_id, agent_name):
-        self.G.nodes[node_id]['agent'] = agent_name
-        # Propagate agent to connected nodes if they are functions
-        if self.G.nodes[node_id]['type'] == "Function":
-            for n in self.G.successors(node_id): 
-                self.G.nodes[n]['agent'] = agent_name
+        with self.editor.transaction():
+            self.editor.set_node_attr(node_id, 'agent', agent_name)
+            # Propagate agent to connected nodes if they are functions
+            if self.G.nodes[node_id]['type'] == "Function":
+                for n in self.G.successors(node_id): 
+                    self.editor.set_node_attr(n, 'agent', agent_name)
 
     def on_double_click(self, event):
-        # Find clicked node
-        r_screen = config.NODE_RADIUS * self.zoom
-        clicked = None
-        for n in self.G.nodes:
-            dwx, dwy = self.get_draw_pos(n)
-            sx, sy = self.to_screen(dwx, dwy)
-            if math.hypot(event.x - sx, event.y - sy) <= r_screen:
-                clicked = n
-                break
+        clicked = self.node_at_screen(event.x, event.y)
         if clicked is not None:
             self.open_node_editor(clicked)
             
@@ -756,10 +978,9 @@ class GraphBuilderApp:
         e_lbl.pack()
         
         def save():
-            self.save_state()
-            self.G.nodes[nid]['label'] = e_lbl.get()
+            self.editor.set_node_attr(nid, 'label', e_lbl.get())
             win.destroy()
-            self.redraw()
+            self.redraw(config.CHANGE_LABELS)
             
         tk.Button(win, text="Save", command=save).pack(pady=10)
 
@@ -768,20 +989,20 @@ class GraphBuilderApp:
         typ = "Function" if self.mode == "ADD_FUNC" else "Resource"
         default_layer = "Base Environment" if typ == "Resource" else "Distributed Work"
         
-        self.G.add_node(nid, 
-                        pos=(x, y), 
-                        type=typ, 
-                        agent="Unassigned", 
-                        label="F" if typ=="Function" else "R",
-                        layer=default_layer)
-        self.redraw()
+        self.editor.add_node(nid, 
+                             pos=(x, y), 
+                             type=typ, 
+                             agent="Unassigned", 
+                             label="F" if typ=="Function" else "R",
+                             layer=default_layer)
+        self.redraw(config.CHANGE_STRUCTURE)
 
     def create_agent(self):
         n = simpledialog.askstring("Input", "Name:")
         if n and n not in self.agents:
             c = simpledialog.askstring("Input", "Color:") or "grey"
-            self.agents[n] = c
-            self.rebuild_dashboard()
+            self.editor.set_agent(n, c)
+            self.redraw(config.CHANGE_AGENTS)
     
     def edit_agent(self, agent_name):
         win = Toplevel(self.root)
@@ -797,16 +1018,15 @@ class GraphBuilderApp:
         def save():
             new_name, new_color = ne.get(), ce.get()
             if new_name and new_color:
-                self.save_state()
-                del self.agents[agent_name]
-                self.agents[new_name] = new_color
-                
-                # Update nodes linked to old agent name
-                for n, d in self.G.nodes(data=True): 
-                    if d.get('agent') == agent_name: 
-                        self.G.nodes[n]['agent'] = new_name
+                with self.editor.transaction():
+                    self.editor.remove_agent(agent_name)
+                    self.editor.set_agent(new_name, new_color)
+
+                    # Update nodes linked to old agent name
+                    for n in [n for n, d in self.G.nodes(data=True) if d.get('agent') == agent_name]:
+                        self.editor.set_node_attr(n, 'agent', new_name)
                 
-                self.redraw()
+                self.redraw(config.CHANGE_AGENTS)
                 win.destroy()
 
         def delete_this_agent():
@@ -815,37 +1035,48 @@ class GraphBuilderApp:
                 return
 
             if messagebox.askyesno("Delete Agent", f"Delete '{agent_name}'? Nodes will revert to Unassigned."):
-                self.save_state()
-                for n, d in self.G.nodes(data=True):
-                    if d.get('agent') == agent_name:
-                        self.G.nodes[n]['agent'] = "Unassigned"
-                
-                del self.agents[agent_name]
-                self.redraw()
+                with self.editor.transaction():
+                    for n in [n for n, d in self.G.nodes(data=True) if d.get('agent') == agent_name]:
+                        self.editor.set_node_attr(n, 'agent', "Unassigned")
+                    self.editor.remove_agent(agent_name)
+                self.redraw(config.CHANGE_AGENTS)
                 win.destroy()
 
         tk.Button(win, text="Save Changes", command=save, bg="#e1bee7").pack(pady=(15, 5), fill=tk.X, padx=20)
         tk.Button(win, text="Delete Agent", command=delete_this_agent, bg="#ffcccc", fg="red").pack(pady=5, fill=tk.X, padx=20)
 
+    # --- Crash Recovery ---
+
+    def start_journal(self):
+        """Offers to restore edits left by a session that did not close normally, then journals this one."""
+        self.journal = EditJournal()
+        try:
+            if self.journal.has_recovery() and messagebox.askyesno(
+                    "Recover Work", "The previous session did not close normally.\nRestore its unsaved work?"):
+                self.editor.reset(*self.journal.recover())
+                self.redraw(config.CHANGE_STRUCTURE)
+        except Exception as e:
+            messagebox.showerror("Recovery Error", f"Could not restore the previous session:\n{str(e)}")
+            print(f"Full error: {e}")
+        self.journal.start(self)
+        self.editor.journal = self.journal
+
+    def on_close(self):
+        # Closing normally: nothing to recover next time
+        if self.journal is not None:
+            self.journal.close(discard=True)
+        self.jobs.shutdown()
+        self.root.destroy()
+
     # --- File Operations ---
 
-    def save_state(self):
-        self.undo_stack.append(self.G.copy())
-        if len(self.undo_stack) > config.HISTORY_LIMIT: 
-            self.undo_stack.pop(0)
-        self.redo_stack.clear()
-    
     def undo(self):
-        if self.undo_stack: 
-            self.redo_stack.append(self.G.copy())
-            self.G = self.undo_stack.pop()
-            self.redraw()
+        if self.editor.undo():
+            self.redraw(config.CHANGE_STRUCTURE)
             
     def redo(self):
-        if self.redo_stack: 
-            self.undo_stack.append(self.G.copy())
-            self.G = self.redo_stack.pop()
-            self.redraw()
+        if self.editor.redo():
+            self.redraw(config.CHANGE_STRUCTURE)
 
     # Place this method inside the GraphBuilderApp class (e.g., near save_architecture_internal)
     def export_as_image(self):
@@ -856,6 +1087,7 @@ class GraphBuilderApp:
             title="Save Graph Image"
         )
         if not fp: return
+        self.redraw_scheduler.flush()
 
         try:
             # 2. Get canvas coordinates relative to the screen
@@ -881,178 +1113,169 @@ class GraphBuilderApp:
         
     def finalize_json_save(self, g, n):
         # ask for file location
-        fp = filedialog.asksaveasfilename(initialfile=n, defaultextension=".json")
+        fp = filedialog.asksaveasfilename(initialfile=n, defaultextension=".json",
+                                          filetypes=GRAPH_FILETYPES)
         if not fp: return
 
-        # build nodes dictionary
-        nodes_dict = {}
-        
-        # Pre-calculate Agent Authorities (Which agent owns which node label?)
-        agent_authorities = {name: [] for name in self.agents.keys()}
-
-        for nid, d in g.nodes(data=True):
-            label = d.get('label', f"Node_{nid}")
-            layer = d.get('layer', "Base Environment")
-            n_type = d.get('type', "Function")
-            
-            # Format Type string: e.g. "Distributed Work" -> "DistributedWork"
-            formatted_layer = layer.replace(" ", "")
-            combined_type = f"{formatted_layer}{n_type}" # e.g., "DistributedWorkFunction"
-            
-            nodes_dict[label] = {
-                "Type": combined_type,
-                "UserData": label
-            }
-
-            # Add to agent authority list
-            agent_name = d.get('agent', 'Unassigned')
-            if agent_name in agent_authorities:
-                agent_authorities[agent_name].append(label)
-
-        # Build the edge list
-        edges_list = []
-        for u, v in g.edges():
-            u_lbl = g.nodes[u].get('label', f"Node_{u}")
-            v_lbl = g.nodes[v].get('label', f"Node_{v}")
-            
-            edges_list.append({
-                "Source": u_lbl,
-                "Target": v_lbl,
-                "UserData": {"QOS": ""}
-            })
-
-        # Build the agents dictionary
-        agents_dict = {}
-        for name, _ in self.agents.items():
-            agents_dict[name] = {
-                "Authority": agent_authorities.get(name, [])
-            }
-
-        # Construct Final JSON Structure
-        final_data = {
-            "GraphData": {
-                "Nodes": nodes_dict,
-                "Edges": edges_list,
-                "Agents": agents_dict
-            }
-        }
-
-        # Save to Disk
+        # Save to Disk (.jsatb also keeps node positions and agent colors)
+        if fp.lower().endswith(graph_binary.EXTENSION):
+            graph_binary.save_graph(fp, g, self.agents)
+            return
         with open(fp, 'w') as f:
-            json.dump(final_data, f, indent=4)
+            json.dump(graph_io.serialize_graph_data(g, self.agents), f, indent=4)
                 
     def load_from_json(self):
-        fp = filedialog.askopenfilename()
+        if self.loading is not None:
+            messagebox.showinfo("Loading", "Another file is still being loaded.")
+            return
+        LibraryPicker(self.root, self.library, lambda paths: self.load_in_background(paths[0]),
+                      title="Open Network", action="Open", browse=self.browse_for_network,
+                      on_folder=self.set_library)
+
+    def browse_for_network(self):
+        """Open Network for a file outside the library folder."""
+        fp = filedialog.askopenfilename(filetypes=GRAPH_FILETYPES + [("All files", "*")])
         if not fp: return
-        
-        try:
-            # Use 'utf-8-sig' to handle potential invisible characters
-            with open(fp, 'r', encoding='utf-8-sig') as f:
-                data = json.load(f)
-                
-            if "GraphData" not in data:
-                messagebox.showerror("Error", "Invalid file format: Missing 'GraphData' key.")
-                return
+        self.load_in_background(fp)
 
-            self.save_state()
-            self.G.clear()
-            self.agents = config.DEFAULT_AGENTS.copy()
-            
-            graph_data = data["GraphData"]
-            
-            # --- 1. Load Agents ---
-            raw_agents = graph_data.get("Agents", {})
-            import random
-            
-            def get_random_color():
-                return "#" + ''.join([random.choice('ABCDEF89') for _ in range(6)])
+    def set_library(self, index):
+        """Keeps the folder last picked in a library window for the next one."""
+        self.library = index
 
-            label_to_agent = {} 
-            
-            for agent_name, agent_data in raw_agents.items():
-                if agent_name not in self.agents:
-                    self.agents[agent_name] = get_random_color()
-                
-                for node_label in agent_data.get("Authority", []):
-                    label_to_agent[node_label] = agent_name
+    def load_in_background(self, fp):
+        """
+        Parses fp on a worker thread while a progress dialog is shown, so the window stays
+        responsive. The current graph is untouched until the load has finished; then the new
+        one is swapped in as a single undoable step.
+        """
+        state = {"progress": 0.0, "result": None, "error": None, "done": False}
+        cancel = threading.Event()
 
-            # --- 2. Load Nodes ---
-            nodes_data = graph_data.get("Nodes", {})
-            label_to_id = {} 
-            
-            # Initialize counters for all known layers
-            layer_x_counters = {l: 100 for l in config.LAYER_ORDER}
-            
-            for i, (label_key, node_props) in enumerate(nodes_data.items()):
-                combined_type = node_props.get("Type", "BaseEnvironmentResource")
-                user_data_lbl = node_props.get("UserData", label_key)
-                
-                # --- PARSING LOGIC START ---
-                node_type = "Resource" # Default
-                layer_prefix = combined_type
-                
-                # 1. Determine Type (Function vs Resource)
-                if combined_type.endswith("Function"):
-                    node_type = "Function"
-                    layer_prefix = combined_type.replace("Function", "")
-                elif combined_type.endswith("Resource"):
-                    node_type = "Resource"
-                    layer_prefix = combined_type.replace("Resource", "")
-                
-                # 2. Determine Layer
-                # We normalize both strings to ignore spaces and casing for comparison
-                # e.g. "DistributedWork" matches "Distributed Work"
-                node_layer = "Base Environment" # Default fallback
-                
-                normalized_prefix = layer_prefix.lower().replace(" ", "")
-                
-                for known_layer in config.LAYER_ORDER:
-                    normalized_known = known_layer.lower().replace(" ", "")
-                    if normalized_known == normalized_prefix:
-                        node_layer = known_layer
-                        break
-                # --- PARSING LOGIC END ---
+        win = Toplevel(self.root)
+        win.title("Loading")
+        win.transient(self.root)
+        tk.Label(win, text=f"Loading {os.path.basename(fp)}...").pack(padx=20, pady=(15, 5))
+        bar = ttk.Progressbar(win, length=300, maximum=1.0)
+        bar.pack(padx=20, pady=5)
+        tk.Button(win, text="Cancel", command=cancel.set).pack(pady=(5, 15))
+        win.protocol("WM_DELETE_WINDOW", cancel.set)
+        self.loading = cancel
+
+        def work():
+            # Worker thread: no Tk calls here, results are picked up by poll()
+            try:
+                if fp.lower().endswith(graph_binary.EXTENSION):
+                    state["result"] = graph_binary.load_graph(fp) # Fast enough to need no progress
+                else:
+                    state["result"] = graph_io.stream_graph_file(
+                        fp, progress=lambda f: state.update(progress=f), cancelled=cancel.is_set)
+            except Exception as e:
+                state["error"] = e
+            state["done"] = True
+
+        def poll():
+            if not state["done"]:
+                bar["value"] = state["progress"]
+                self.root.after(50, poll)
+                return
+            win.destroy()
+            self.loading = None
 
-                # Safety check: if layer not in counters, init it
-                if node_layer not in layer_x_counters:
-                    layer_x_counters[node_layer] = 100
+            e = state["error"]
+            if isinstance(e, graph_io.LoadCancelled):
+                return
+            if isinstance(e, ValueError):
+                messagebox.showerror("Error", str(e))
+                return
+            if e is not None:
+                messagebox.showerror("Critical Error", f"Failed to load file:\n{str(e)}")
+                print(f"Full error: {e}")
+                return
 
-                pos_y = config.JSAT_LAYERS.get(node_layer, 550)
-                pos_x = layer_x_counters[node_layer]
-                layer_x_counters[node_layer] += 120 
-                
-                assigned_agent = label_to_agent.get(label_key, "Unassigned")
-                
-                self.G.add_node(i, 
-                                pos=(pos_x, pos_y), 
-                                layer=node_layer, 
-                                type=node_type, 
-                                label=user_data_lbl, 
-                                agent=assigned_agent)
-                
-                label_to_id[label_key] = i
+            G, agents = state["result"]
+            self.editor.replace_graph(G, agents)
+            self.redraw(config.CHANGE_STRUCTURE)
 
-            # --- 3. Load Edges ---
-            edges_data = graph_data.get("Edges", [])
-            for edge in edges_data:
-                src_lbl = edge.get("Source")
-                tgt_lbl = edge.get("Target")
-                
-                if src_lbl in label_to_id and tgt_lbl in label_to_id:
-                    u = label_to_id[src_lbl]
-                    v = label_to_id[tgt_lbl]
-                    self.G.add_edge(u, v)
-                    
-            self.redraw()
-            
-        except Exception as e:
-            messagebox.showerror("Critical Error", f"Failed to load file:\n{str(e)}")
-            print(f"Full error: {e}")
+        threading.Thread(target=work, name="graph-load", daemon=True).start()
+        self.root.after(50, poll)
             
     def save_architecture_internal(self):
         n = simpledialog.askstring("Name", "Name:")
         if n: 
             self.saved_archs[n] = self.G.copy()
+
+    def import_folder(self):
+        """Stores every architecture file of a folder for comparison."""
+        directory = filedialog.askdirectory(initialdir=self.library.directory)
+        if not directory: return
+        paths = graph_io.list_architecture_files(directory)
+        if not paths:
+            messagebox.showinfo("Import", "No .json or .jsatb files in that folder.")
+            return
+        self.import_architectures(paths, on_done=lambda names: messagebox.showinfo(
+            "Import", f"Stored {len(names)} architectures for Compare Architecture."))
+
+    def import_architectures(self, paths, on_done=None):
+        """
+        Parses paths on a worker thread (a process pool for many files) and stores each graph in
+        saved_archs under its file stem, replacing an architecture of the same name. Agents the
+        app does not know yet are added with their file's color, as one undoable step.
+        on_done(names) gets the stored names.
+        """
+        state = {"done": 0, "results": None, "error": None}
+
+        win = Toplevel(self.root)
+        win.title("Importing")
+        win.transient(self.root)
+        tk.Label(win, text=f"Importing {len(paths)} architectures...").pack(padx=20, pady=(15, 5))
+        bar = ttk.Progressbar(win, length=300, maximum=len(paths))
+        bar.pack(padx=20, pady=(5, 15))
+
+        def work():
+            # Worker thread: no Tk calls here, results are picked up by poll()
+            try:
+                state["results"] = graph_io.load_many(paths, progress=lambda done, total: state.update(done=done))
+            except Exception as e:
+                state["error"] = e
+
+        def poll():
+            if thread.is_alive():
+                bar["value"] = state["done"]
+                self.root.after(50, poll)
+                return
+            win.destroy()
+            if state["error"] is not None:
+                messagebox.showerror("Import Error", f"Could not import:\n{state['error']}")
+                return
+
+            names, failed, new_agents = [], [], {}
+            for fp, result, error in state["results"]:
+                if error is not None:
+                    failed.append(f"{os.path.basename(fp)}: {error}")
+                    continue
+                g, agents = result
+                stem = name = os.path.splitext(os.path.basename(fp))[0]
+                copy = 2
+                while name in names: # e.g. HP_1.json and HP_1.jsatb in one import
+                    name = f"{stem} ({copy})"
+                    copy += 1
+                self.saved_archs[name] = g
+                names.append(name)
+                for agent, color in agents.items():
+                    if agent not in self.agents: new_agents.setdefault(agent, color)
+
+            if new_agents:
+                with self.editor.transaction():
+                    for agent, color in new_agents.items():
+                        self.editor.set_agent(agent, color)
+                self.redraw(config.CHANGE_AGENTS)
+            if failed:
+                messagebox.showwarning("Import", "Some files could not be imported:\n" + "\n".join(failed[:20]))
+            if on_done: on_done(names)
+
+        thread = threading.Thread(target=work, name="bulk-import", daemon=True)
+        thread.start()
+        self.root.after(50, poll)
     
     def open_comparison_dialog(self):
         av = ["Current"] + list(self.saved_archs.keys())
@@ -1069,6 +1292,22 @@ class GraphBuilderApp:
             lb.insert(tk.END, o)
         
         lb.selection_set(0)
+
+        def added(names):
+            if not w.winfo_exists(): return
+            for name in names:
+                if name not in av:
+                    av.append(name)
+                    lb.insert(tk.END, name)
+                lb.selection_set(av.index(name))
+
+        def add_from_library(paths):
+            # Library files join the stored architectures under their file name
+            self.import_architectures(paths, on_done=added)
+
+        tk.Button(w, text="Add from Library...",
+                  command=lambda: LibraryPicker(w, self.library, add_from_library, title="Add to Comparison",
+                                                action="Add", multiple=True, on_folder=self.set_library)).pack()
         
         def go():
             idx = lb.curselection()
@@ -1101,6 +1340,10 @@ class GraphBuilderApp:
         
         tk.Label(header_row, text="Comparative Analytics", font=("Arial", 16, "bold")).pack(side=tk.LEFT, padx=10)
         
+        # Background jobs of this window are keyed by 'owner' and dropped when it closes
+        owner = f"compare-{id(w)}"
+        w.bind("<Destroy>", lambda e: self.jobs.cancel_owner(owner) if e.widget is w else None)
+        
         def export_graphs_ps():
             # Saves each visible panel as a .ps file
             for name, panel in panels:
@@ -1130,17 +1373,19 @@ class GraphBuilderApp:
         paned.add(inspector_frame, minsize=200)
 
         panels = []
+        # Compared graphs never change structure (panels only move nodes): fingerprint each once
+        fps = [structural_fingerprint(g) for _, g in gs]
 
         def toggle_compare_vis(metric_name):
-            for name, panel in panels:
+            for c, (name, panel) in enumerate(panels):
                 if metric_name == "Total Cycles":
-                    hl = metric_visualizations.get_cycle_highlights(panel.G)
+                    hl = metric_visualizations.get_cycle_highlights(panel.G, fps[c])
                     panel.set_highlights(hl)
                 elif metric_name == "Interdependence":
-                    hl = metric_visualizations.get_interdependence_highlights(panel.G)
+                    hl = metric_visualizations.get_interdependence_highlights(panel.G, fps[c])
                     panel.set_highlights(hl)
                 elif metric_name == "Modularity":
-                    hl = metric_visualizations.get_modularity_highlights(panel.G)
+                    hl = metric_visualizations.get_modularity_highlights(panel.G, fps[c])
                     panel.set_highlights(hl)
                 else:
                     panel.set_highlights([]) # Clear
@@ -1152,9 +1397,7 @@ class GraphBuilderApp:
             grid_f = tk.Frame(tf)
             grid_f.pack(fill=tk.X, padx=10)
             
-            metrics = ["Nodes", "Edges", "Density", "Avg Clustering", "Cyclomatic Number", 
-                       "Critical Loop Nodes", "Total Cycles", "Avg Cycle Length", 
-                       "Interdependence", "Modularity", "Global Efficiency"]
+            metrics = config.COMPARISON_METRICS
             
             # Headers
             tk.Label(grid_f, text="Metric", font=("Arial", 12, "bold"), width=18, relief="solid", bd=1, bg="#e0e0e0").grid(row=0, column=0, sticky="nsew")
@@ -1180,54 +1423,68 @@ class GraphBuilderApp:
                         cell_frame = tk.Frame(grid_f, bd=1, relief="solid", bg="#f0f0f0")
                         cell_frame.grid(row=r+1, column=c+1, sticky="nsew")
                         
-                        cycles = list(nx.simple_cycles(g))
-                        items = []
-                        label = "0.0"
-                        
-                        if cycles:
-                            lengths = [len(x) for x in cycles]
-                            avg = sum(lengths) / len(lengths)
-                            label = f"{avg:.2f}"
+                        def render_cycles(body, cycle_index, gr=g, col=c):
+                            items = []
+                            label = "0.0" if cycle_index is not None else "Err"
                             
-                            for i, cyc in enumerate(cycles):
-                                path_str = " -> ".join([str(g.nodes[n].get('label', n)) for n in cyc])
-                                items.append({'label': len(cyc), 'tooltip': f"Cycle {i+1}:\n{path_str}"})
-
-                        def on_c_click(idx, gr=g, col=c):
-                             if col < len(panels):
-                                 panels[col][1].set_highlights(self.trigger_single_cycle_vis(idx, gr))
-
-                        # CHANGE: Pass only "blue" so all buttons are blue text
-                        # (Graph highlights will still be multicolored)
-                        mod_colors_colors = ["blue"] 
-                        self._create_scrollable_list_ui(cell_frame, label, items, cycle_colors, on_c_click).pack(fill=tk.BOTH, expand=True)
+                            if cycle_index is not None and len(cycle_index):
+                                label = cycle_index.average_label()
+                                
+                                for i, cyc in enumerate(cycle_index.paths[:config.CYCLE_DISPLAY_LIMIT]):
+                                    path_str = " -> ".join([str(gr.nodes[n].get('label', n)) for n in cyc])
+                                    items.append({'label': len(cyc), 'tooltip': f"Cycle {i+1}:\n{path_str}"})
+
+                            def on_c_click(idx):
+                                 if col < len(panels):
+                                     panels[col][1].set_highlights(self.trigger_single_cycle_vis(idx, gr, fps[col]))
+
+                            # CHANGE: Pass only "blue" so all buttons are blue text
+                            # (Graph highlights will still be multicolored)
+                            cycle_colors = ["blue"]
+                            ui = self._render_list(body, label, items, cycle_colors, on_c_click)
+                            self._show_only(body, (ui, {"fill": tk.BOTH, "expand": True}))
+
+                        self._deferred_section(cell_frame, owner, f"{m}:{c}", None, g, fps[c],
+                                               get_cycle_index(g, fps[c], compute=False),
+                                               lambda snap, f=fps[c]: get_cycle_index(snap, f),
+                                               render_cycles)
 
                     # --- B. Modularity (Individual Buttons) ---
                     elif m == "Modularity":
                         cell_frame = tk.Frame(grid_f, bd=1, relief="solid", bg="#f0f0f0")
                         cell_frame.grid(row=r+1, column=c+1, sticky="nsew")
                         
-                        mod_val = calculate_metric(g, 'Modularity')
-                        items = []
-                        try:
-                            comms = list(nx.community.greedy_modularity_communities(g.to_undirected()))
-                            comms.sort(key=len, reverse=True)
-                            for i, comm in enumerate(comms):
-                                names = [str(g.nodes[n].get('label', n)) for n in comm]
-                                items.append({'label': len(comm), 'tooltip': f"Group {i+1}:\n" + ", ".join(names)})
-                        except: pass
-                        
-                        def on_m_click(idx, gr=g, col=c):
-                             if col < len(panels):
-                                 panels[col][1].set_highlights(self.trigger_single_modularity_vis(idx, gr))
-
-                        # CHANGE: Pass only "blue" here as well
-                        mod_colors = ["blue"]
-                        self._create_scrollable_list_ui(cell_frame, str(mod_val), items, mod_colors, on_m_click).pack(fill=tk.BOTH, expand=True)
+                        def render_modularity(body, partition, gr=g, col=c):
+                            items = []
+                            mod_val = partition.label() if partition is not None else "Err"
+                            if partition is not None:
+                                for i, comm in enumerate(partition.groups):
+                                    names = [str(gr.nodes[n].get('label', n)) for n in comm]
+                                    items.append({'label': len(comm), 'tooltip': f"Group {i+1}:\n" + ", ".join(names)})
+                            
+                            def on_m_click(idx):
+                                 if col < len(panels):
+                                     panels[col][1].set_highlights(self.trigger_single_modularity_vis(idx, gr, fps[col]))
+
+                            # CHANGE: Pass only "blue" here as well
+                            mod_colors = ["blue"]
+                            ui = self._render_list(body, mod_val, items, mod_colors, on_m_click)
+                            self._show_only(body, (ui, {"fill": tk.BOTH, "expand": True}))
+
+                        self._deferred_section(cell_frame, owner, f"{m}:{c}", None, g, fps[c],
+                                               get_partition(g, fps[c], compute=False),
+                                               lambda snap, f=fps[c]: get_partition(snap, f),
+                                               render_modularity)
+
+                    # --- C. Slow Metrics (filled in by the worker) ---
+                    elif m in config.BACKGROUND_METRICS:
+                        cell_frame = tk.Frame(grid_f, bd=1, relief="solid", bg="white")
+                        cell_frame.grid(row=r+1, column=c+1, sticky="nsew")
+                        self._deferred_metric_label(cell_frame, owner, f"{m}:{c}", m, None, g, fps[c], font=("Arial", 12))
 
-                    # --- C. Standard Metrics ---
+                    # --- D. Standard Metrics ---
                     else:
-                        val = calculate_metric(g, m)
+                        val = cached_metric(g, m, fps[c])
                         tk.Label(grid_f, text=str(val), font=("Arial", 12), relief="solid", bd=1).grid(row=r+1, column=c+1, sticky="nsew")
 
         def refresh_inspector(label):
@@ -1273,28 +1530,37 @@ class GraphBuilderApp:
                     vals.append(g.in_degree(target_node))
                     vals.append(g.out_degree(target_node))
                     
-                    # Degree Centrality
-                    try: dc = f"{nx.degree_centrality(g)[target_node]:.3f}"
-                    except: dc = "0.00"
-                    vals.append(dc)
-                    
-                    # Eigenvector
-                    try: ec = f"{nx.eigenvector_centrality(g, max_iter=500, tol=1e-04).get(target_node, 0):.3f}"
-                    except: ec = "0.00"
-                    vals.append(ec)
-
-                    # Betweenness (Added)
-                    try: bc = f"{nx.betweenness_centrality(g)[target_node]:.3f}"
-                    except: bc = "0.00"
-                    vals.append(bc)
+                    # Centralities (Degree, Eigenvector, Betweenness) come from the per-revision table
+                    g_fp = fps[r]
+                    table = get_node_metrics(g, g_fp, compute=False)
+                    row = table.row(target_node) if table is not None else None
+                    if row is not None:
+                        vals.extend([f"{row['degree']:.3f}", f"{row['eigenvector']:.3f}", self._format_betweenness(row)])
+                    else:
+                        vals.extend(["computing…"] * 3)
 
                 else:
                     # If node doesn't exist in this graph variation
                     vals.extend(["(Not Found)", "-", "-", "-", "-", "-", "-"])
                 
                 # Render Row
+                cells = []
                 for c, v in enumerate(vals):
-                    tk.Label(grid_f, text=str(v), font=("Arial", 14), relief="solid", bd=1, bg="white").grid(row=r+1, column=c, sticky="nsew")
+                    cell = tk.Label(grid_f, text=str(v), font=("Arial", 14), relief="solid", bd=1, bg="white")
+                    cell.grid(row=r+1, column=c, sticky="nsew")
+                    cells.append(cell)
+
+                if target_node is not None and row is None:
+                    def on_table(table, cent_cells=cells[4:7], n=target_node):
+                        row = table.row(n) if table is not None else None
+                        texts = [f"{row['degree']:.3f}", f"{row['eigenvector']:.3f}", self._format_betweenness(row)] if row else ["Err"] * 3
+                        for cell, text in zip(cent_cells, texts):
+                            if cell.winfo_exists(): cell.config(text=text)
+                    
+                    snapshot = self._job_snapshot(g, g_fp)
+                    self.jobs.submit((owner, f"node_metrics:{r}"), g_fp,
+                                     lambda snap=snapshot, f=g_fp: get_node_metrics(snap, f),
+                                     on_table)
 
         # Initial Render
         refresh_metrics()
@@ -1341,46 +1607,27 @@ class GraphBuilderApp:
             if curr == self.root: break
             
         if found_agent:
-            self.save_state()
             self.assign_agent_logic(self.sidebar_drag_data, found_agent)
-            self.redraw()
+            self.redraw(config.CHANGE_AGENTS)
         self.sidebar_drag_data = None
 
-    def distance_point_to_segment(self, px, py, x1, y1, x2, y2):
-        """Math helper for edge detection."""
-        dx, dy = x2 - x1, y2 - y1
-        if dx == 0 and dy == 0:
-            return math.hypot(px - x1, py - y1)
-        
-        t = ((px - x1) * dx + (py - y1) * dy) / (dx*dx + dy*dy)
-        t = max(0, min(1, t))
-        
-        nearest_x = x1 + t * dx
-        nearest_y = y1 + t * dy
-        return math.hypot(px - nearest_x, py - nearest_y)
-    
     def find_edge_at(self, x, y):
+        """Nearest edge within a few pixels of a canvas point, looked up in the renderer's edge index."""
         threshold = 8 
-        for u, v in self.G.edges():
-            wx1, wy1 = self.get_draw_pos(u)
-            wx2, wy2 = self.get_draw_pos(v)
-            sx1, sy1 = self.to_screen(wx1, wy1)
-            sx2, sy2 = self.to_screen(wx2, wy2)
-            
-            dist = self.distance_point_to_segment(x, y, sx1, sy1, sx2, sy2)
-            if dist < threshold:
-                return (u, v)
-        return None
+        edge = self.renderer.edge_at(*self.to_world(x, y), threshold / self.zoom)
+        return edge if edge is not None and self.G.has_edge(*edge) else None
 
-    def trigger_single_cycle_vis(self, index, graph_source=None):
+    def trigger_single_cycle_vis(self, index, graph_source=None, fingerprint=None):
         """
         index: The index of the cycle in the list [0, 1, 2...]
         graph_source: Used for comparison window to know WHICH graph to highlight
+        fingerprint: graph_source's structural fingerprint, if already known
         """
         # If no graph provided, use the main self.G
         target_graph = graph_source if graph_source else self.G
+        if not graph_source: fingerprint = self.editor.structure_key()
         
-        hl = metric_visualizations.get_single_cycle_highlight(target_graph, index)
+        hl = metric_visualizations.get_single_cycle_highlight(target_graph, index, fingerprint)
         
         if graph_source:
             # logic for comparison window (handled via callback later)
@@ -1389,20 +1636,21 @@ class GraphBuilderApp:
             # logic for main window
             self.current_highlights = hl
             self.active_vis_mode = f"cycle_{index}"
-            self.redraw()
+            self.redraw_highlights()
     
-    def trigger_single_modularity_vis(self, index, graph_source=None):
+    def trigger_single_modularity_vis(self, index, graph_source=None, fingerprint=None):
         """
         Highlights a specific modularity group.
         """
         target_graph = graph_source if graph_source else self.G
+        if not graph_source: fingerprint = self.editor.structure_key()
         
         # Call our new function
-        hl = metric_visualizations.get_single_modularity_highlight(target_graph, index)
+        hl = metric_visualizations.get_single_modularity_highlight(target_graph, index, fingerprint)
         
         if graph_source:
             return hl
         else:
             self.current_highlights = hl
             self.active_vis_mode = f"mod_group_{index}"
-            self.redraw()
\ No newline at end of file
+            self.redraw_highlights()
\ No newline at end of file
@@ -0,0 +1,133 @@
+# batch_metrics.py
+# Headless metric runner. Computes the comparison-window metrics for every
+# architecture file in a directory, spread over a process pool, and streams
+# one row per file as CSV or NDJSON.
+#
+# Usage:
+#   python batch_metrics.py "Network Architectures" --format csv > metrics.csv
+#   python batch_metrics.py a.json b.json --format ndjson --workers 4
+
+import argparse
+import csv
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import config
+from graph_io import list_architecture_files, load_architecture
+from utils import calculate_metric
+
+FIELDS = ["File"] + config.COMPARISON_METRICS + ["Seconds", "Error"]
+
+class MetricTimeout(BaseException):
+    """Raised by the alarm handler. BaseException so calculate_metric's 'except Exception' handlers let it through."""
+
+def _timed_metric(G, metric_name, timeout):
+    """
+    Runs one metric with a wall-clock limit so a pathological cycle count
+    only costs that cell ("Timeout") instead of the whole file.
+    The limit needs SIGALRM, so on Windows metrics run unbounded.
+    """
+    if not timeout or not hasattr(signal, "setitimer"):
+        return calculate_metric(G, metric_name)
+
+    def on_alarm(signum, frame):
+        raise MetricTimeout()
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        val = calculate_metric(G, metric_name)
+    except MetricTimeout:
+        val = "Timeout"
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+    return val
+
+def compute_file_metrics(path, metric_timeout=None):
+    """Worker entry point: parses one file and returns a row dict keyed by FIELDS."""
+    row = {"File": path, "Error": ""}
+    start = time.perf_counter()
+
+    try:
+        G, _ = load_architecture(path)
+    except Exception as e:
+        row["Error"] = f"Load failed: {e}"
+        return row
+
+    for m in config.COMPARISON_METRICS:
+        row[m] = _timed_metric(G, m, metric_timeout)
+
+    row["Seconds"] = f"{time.perf_counter() - start:.3f}"
+    return row
+
+def collect_files(paths):
+    """Expands directories into their .json/.jsatb files. Plain files are passed through."""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(list_architecture_files(p))
+        else:
+            files.append(p)
+    return files
+
+def run_batch(files, out, fmt="csv", workers=None, metric_timeout=None):
+    """
+    Submits every file to the pool and writes rows as they finish (completion order).
+    Returns the number of files that failed to load.
+    """
+    failures = 0
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(compute_file_metrics, f, metric_timeout): f for f in files}
+        for fut in as_completed(futures):
+            try:
+                row = fut.result()
+            except Exception as e:
+                # Worker crashed (e.g. killed); report it and keep going
+                row = {"File": futures[fut], "Error": f"Worker failed: {e}"}
+
+            if row.get("Error"): failures += 1
+
+            if writer:
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(row) + "\n")
+            out.flush()
+
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute architecture metrics for many GraphData files.")
+    parser.add_argument("paths", nargs="+", help="Architecture .json/.jsatb files or directories containing them")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: all cores)")
+    parser.add_argument("--metric-timeout", type=float, default=30.0,
+                        help="Seconds allowed per metric before it is reported as 'Timeout' (0 = no limit)")
+    parser.add_argument("-o", "--output", help="Write to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.paths)
+    if not files:
+        print("No architecture files found.", file=sys.stderr)
+        return 1
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        failures = run_batch(files, out, args.format, args.workers, args.metric_timeout)
+    finally:
+        if args.output: out.close()
+
+    print(f"Processed {len(files)} files ({failures} failed).", file=sys.stderr)
+    return 1 if failures else 0 # Lets scripts detect a partially failed batch
+
+if __name__ == "__main__":
+    sys.exit(main())
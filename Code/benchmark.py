@@ -0,0 +1,263 @@
+# benchmark.py
+# Performance baseline for metrics, highlights, JSON/binary load/save, undo history and canvas redraws.
+# Runs against the bundled "Network Architectures" files and synthetic graphs,
+# and writes machine-readable JSON so two commits can be compared.
+#
+# Usage:
+#   python benchmark.py -o before.json
+#   python benchmark.py -o after.json --compare before.json
+#   xvfb-run python benchmark.py --render      (canvas redraws need a display)
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+import networkx as nx
+
+import config
+import graph_binary
+import graph_io
+import metric_visualizations
+import synthetic
+from graph_cache import clear_all_caches
+from graph_editor import GraphEditor
+from utils import calculate_metric
+
+ARCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Network Architectures")
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+HIGHLIGHT_BUILDERS = {
+    "cycles": metric_visualizations.get_cycle_highlights,
+    "single_cycle": lambda G: metric_visualizations.get_single_cycle_highlight(G, 0),
+    "interdependence": metric_visualizations.get_interdependence_highlights,
+    "modularity": metric_visualizations.get_modularity_highlights,
+    "inter_community": metric_visualizations.get_inter_community_highlights,
+}
+
+def load_targets(sizes):
+    """(name, graph, agents, raw_json_text or None) for every bundled file and synthetic size."""
+    targets = []
+    for fp in sorted(glob.glob(os.path.join(ARCH_DIR, "*.json"))):
+        with open(fp, 'r', encoding='utf-8-sig') as f:
+            text = f.read()
+        G, agents = graph_io.parse_graph_data(json.loads(text)["GraphData"])
+        targets.append((os.path.basename(fp), G, agents, text))
+    for n in sizes:
+        G, agents = synthetic.generate(n)
+        targets.append((f"synthetic_{n}", G, agents, None))
+    return targets
+
+def time_call(fn, repeats, cold=True):
+    """Runs fn 'repeats' times; clears the analysis caches first when cold=True."""
+    samples = []
+    for _ in range(repeats):
+        if cold: clear_all_caches()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+class Runner:
+    def __init__(self, repeats, max_seconds):
+        self.repeats = repeats
+        self.max_seconds = max_seconds
+        self.results = []
+        self.counters = {}
+        self.too_slow = set() # (group, name) pairs that exceeded max_seconds on a smaller graph
+
+    def run(self, group, name, target, G, fn, cold=True):
+        key = (group, name)
+        if key in self.too_slow and target.startswith("synthetic_"):
+            return # Scaling curve stops once a size gets too slow
+        samples = time_call(fn, self.repeats, cold)
+        if target.startswith("synthetic_") and min(samples) > self.max_seconds:
+            self.too_slow.add(key)
+        self.results.append({
+            "group": group, "name": name, "target": target,
+            "nodes": G.number_of_nodes(), "edges": G.number_of_edges(),
+            "repeats": len(samples), "min_s": min(samples), "median_s": statistics.median(samples),
+        })
+        print(f"{group:10s} {name:22s} {target:28s} {min(samples) * 1000:10.2f} ms", file=sys.stderr)
+
+def bench_analytics(runner, targets):
+    metric_names = config.COMPARISON_METRICS + ["Avg Degree"]
+    for target, G, agents, text in targets:
+        for m in metric_names:
+            runner.run("metric", m, target, G, lambda: calculate_metric(G, m))
+        for name, builder in HIGHLIGHT_BUILDERS.items():
+            runner.run("highlight", name, target, G, lambda: builder(G))
+
+        # JSON load = parse text + build graph (the body of load_from_json)
+        if text is None:
+            text = json.dumps(graph_io.serialize_graph_data(G, agents))
+        runner.run("io", "load_json", target, G, lambda: graph_io.parse_graph_data(json.loads(text)["GraphData"]))
+        # JSON save = build structure + dump (the body of finalize_json_save)
+        runner.run("io", "save_json", target, G,
+                   lambda: json.dumps(graph_io.serialize_graph_data(G, agents), indent=4))
+
+        # Binary save/load through a real file, as the .jsatb round trip in the app
+        with tempfile.TemporaryDirectory() as tmp:
+            fp = os.path.join(tmp, "bench" + graph_binary.EXTENSION)
+            runner.run("io", "save_jsatb", target, G, lambda: graph_binary.save_graph(fp, G, agents))
+            runner.run("io", "load_jsatb", target, G, lambda: graph_binary.load_graph(fp))
+
+        # One recorded edit and its undo (the graph ends up unchanged)
+        if G.number_of_nodes():
+            editor = GraphEditor(types.SimpleNamespace(G=G, agents=agents))
+            n = next(iter(G.nodes))
+            label = G.nodes[n].get('label', '')
+            runner.run("history", "edit_undo", target, G,
+                       lambda: (editor.set_node_attr(n, 'label', label + "*"), editor.undo()), cold=False)
+
+def bench_render(runner, targets):
+    """Times GraphBuilderApp.redraw and InteractiveComparisonPanel.redraw. Needs a display (e.g. Xvfb)."""
+    import tkinter as tk
+    from app import GraphBuilderApp
+    from components import InteractiveComparisonPanel
+    from cycles import get_cycle_index
+    from communities import get_partition
+    from node_metrics import get_node_metrics
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipping render benchmarks (no display): {e}", file=sys.stderr)
+        return
+
+    app = GraphBuilderApp(root)
+    for target, G, agents, _ in targets:
+        # Warm the analysis caches so only drawing is measured
+        for m in config.COMPARISON_METRICS:
+            calculate_metric(G, m)
+        for warm in (get_cycle_index, get_partition, get_node_metrics):
+            try: warm(G)
+            except Exception: pass
+
+        app.G, app.agents = G, agents
+        app.view_mode = config.VIEW_MODE_FREE
+        app.renderer.render(G, app.zoom, agents) # Current graph, so clear() below removes its items
+        frames = app.redraw_scheduler
+        full = lambda: (app.renderer.clear(), app.redraw(), frames.flush())
+        runner.run("render", "app_redraw_free", target, G, full, cold=False)
+        app.view_mode = config.VIEW_MODE_JSAT
+        runner.run("render", "app_redraw_jsat", target, G, full, cold=False)
+        runner.run("render", "app_redraw_unchanged", target, G, lambda: (app.redraw(), frames.flush()), cold=False)
+
+        def pan_step():
+            app.offset_x -= 50
+            app.redraw_view()
+            frames.flush()
+        runner.run("render", "app_pan", target, G, pan_step, cold=False)
+        # Same, zoomed out to the aggregate level-of-detail tier
+        zoom = app.zoom
+        app.zoom = config.LOD_AGGREGATE_MIN_ZOOM / 2
+        runner.run("render", "app_pan_overview", target, G, pan_step, cold=False)
+        app.zoom = zoom
+
+        def pan_gesture():
+            # One motion event while panning: native canvas move, re-render deferred
+            app.offset_x -= 5
+            app.renderer.pan(-5, 0)
+        runner.run("render", "app_pan_gesture", target, G, pan_gesture, cold=False)
+        app.redraw_view(); frames.flush() # Settle
+
+        if G.number_of_nodes():
+            # One drag step: move the best connected node and update its items
+            hub = max(G.nodes, key=G.degree)
+            hub_x, hub_y = app.to_screen(*app.get_draw_pos(hub))
+            runner.run("render", "app_hit_test", target, G, lambda: app.node_at_screen(hub_x, hub_y), cold=False)
+            if G.degree(hub):
+                u, v = next(iter(G.in_edges(hub))) if G.in_degree(hub) else next(iter(G.out_edges(hub)))
+                (ux, uy), (vx, vy) = app.to_screen(*app.get_draw_pos(u)), app.to_screen(*app.get_draw_pos(v))
+                runner.run("render", "app_edge_pick", target, G,
+                           lambda: app.find_edge_at((ux + vx) / 2, (uy + vy) / 2), cold=False)
+
+            def drag_step(hub=hub):
+                x, y = G.nodes[hub]['pos']
+                G.nodes[hub]['pos'] = (x + 1, y)
+                app.renderer.update_nodes([hub])
+            runner.run("render", "app_drag_node", target, G, drag_step, cold=False)
+
+            # 20 motion events arriving within one frame are rendered once
+            def drag_burst(hub=hub):
+                for _ in range(20):
+                    x, y = G.nodes[hub]['pos']
+                    G.nodes[hub]['pos'] = (x + 1, y)
+                    frames.request("nodes", hub)
+                frames.flush()
+            runner.run("render", "app_drag_burst", target, G, drag_burst, cold=False)
+
+        panel_parent = tk.Frame(root)
+        panel = InteractiveComparisonPanel(panel_parent, G.copy(), target, config.NODE_RADIUS, agents, None, None)
+        runner.run("render", "panel_redraw", target, G,
+                   lambda: (panel.renderer.clear(), panel.redraw(), panel.redraw_scheduler.flush()), cold=False)
+        panel_parent.destroy()
+        root.update()
+
+    runner.counters["app_redraw_requests"] = app.redraw_scheduler.stats()
+    app.jobs.shutdown()
+    root.destroy()
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return ""
+
+def compare(current, baseline_path):
+    """Prints baseline/current ratios for entries present in both runs (>1 means faster now)."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r["group"], r["name"], r["target"]): r["min_s"] for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('commit') or baseline_path}:", file=sys.stderr)
+    for r in current["results"]:
+        key = (r["group"], r["name"], r["target"])
+        if key in old and r["min_s"] > 0:
+            print(f"{r['group']:10s} {r['name']:22s} {r['target']:28s} {old[key] / r['min_s']:8.2f}x", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Interactive-JSAT metrics, I/O and rendering.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES, help="Synthetic graph node counts")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="Stop a benchmark's scaling curve after a size takes longer than this")
+    parser.add_argument("--render", action="store_true", help="Also time canvas redraws (needs a display)")
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    targets = load_targets(args.sizes)
+    runner = Runner(args.repeats, args.max_seconds)
+    bench_analytics(runner, targets)
+    if args.render:
+        bench_render(runner, targets)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "networkx": nx.__version__,
+        "results": runner.results,
+        "counters": runner.counters,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    if args.compare:
+        compare(report, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
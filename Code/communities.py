@@ -0,0 +1,66 @@
+# communities.py
+# Shared community detection.
+# Greedy modularity runs once per structural revision; the Modularity metric,
+# the dashboard, the highlight builders and the comparison grid all read the
+# same partition, so group numbers and colors agree everywhere.
+
+import networkx as nx
+
+import config
+from graph_cache import structural_fingerprint, LRUCache
+
+def split_edges(G, node_group, num_groups):
+    """
+    Single O(m) pass that labels each edge by the groups of its endpoints.
+    Returns (intra, inter): intra[i] lists the edges that stay inside group i,
+    inter lists the edges that cross between groups.
+    """
+    intra = [[] for _ in range(num_groups)]
+    inter = []
+    for u, v in G.edges():
+        gu = node_group.get(u)
+        if gu is not None and gu == node_group.get(v):
+            intra[gu].append((u, v))
+        else:
+            inter.append((u, v))
+    return intra, inter
+
+class CommunityPartition:
+    """
+    Communities of one graph revision, ordered largest first (ties by smallest node)
+    so group i is the same group in every view.
+    groups[i]: node list, intra_edges[i]: edges inside group i, node_group: node -> i,
+    inter_edges: edges joining two different groups.
+    """
+    def __init__(self, G, communities):
+        ordered = sorted((sorted(c) for c in communities), key=lambda c: (-len(c), c[0]))
+        self.groups = ordered
+        self.ids = list(range(len(ordered)))
+        self.node_group = {n: i for i, c in enumerate(ordered) for n in c}
+        self.q_score = nx.community.modularity(G.to_undirected(), ordered) if ordered else 0.0
+
+        self.intra_edges, self.inter_edges = split_edges(G, self.node_group, len(ordered))
+
+    def __len__(self):
+        return len(self.groups)
+
+    def label(self):
+        return f"Q={self.q_score:.2f} ({len(self.groups)} Grps)"
+
+_partition_cache = LRUCache(config.PARTITION_CACHE_SIZE)
+
+def get_partition(G, fingerprint=None, compute=True):
+    """
+    Returns the CommunityPartition for G's current structure, detecting only on a cache miss.
+    With compute=False, returns None on a miss instead.
+    """
+    if fingerprint is None:
+        fingerprint = structural_fingerprint(G)
+    if not compute:
+        return _partition_cache.peek(fingerprint)
+
+    def compute():
+        communities = nx.community.greedy_modularity_communities(G.to_undirected())
+        return CommunityPartition(G, communities)
+
+    return _partition_cache.get_or_compute(fingerprint, compute)
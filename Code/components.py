@@ -2,8 +2,19 @@
 # Contains custom UI widgets. The InteractiveComparisonPanel is isolated here. 
 # This makes it reusable and easier to fix drawing bugs.
 
+import os
+import re
+import time
 import tkinter as tk
-import math
+from tkinter import filedialog, ttk
+
+import config
+from library_index import LibraryIndex
+from renderer import GraphRenderer
+from redraw_scheduler import RedrawScheduler
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_DIGITS = re.compile(r"(\d+)")
 
 class InteractiveComparisonPanel:
     """
@@ -32,6 +43,9 @@ class InteractiveComparisonPanel:
         tk.Label(self.outer, text=name, font=("Arial", 13, "bold"), bg="#ddd").pack(fill=tk.X)
         self.canvas = tk.Canvas(self.outer, bg="white")
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.renderer = GraphRenderer(self.canvas, node_radius,
+                                      lambda n: self.G.nodes[n].get('pos', (0,0)), self.to_screen)
+        self.redraw_scheduler = RedrawScheduler(self.canvas, self.render_frame)
         
         # Bindings
         self.canvas.bind("<Button-1>", self.on_mouse_down)
@@ -47,15 +61,17 @@ class InteractiveComparisonPanel:
         self.canvas.bind("<Configure>", self.on_resize)
 
     def set_highlights(self, highlights):
-            """Updates the visual highlights and triggers a redraw."""
+            """Updates the visual highlights and schedules a repaint of them."""
             self.highlights = highlights
-            self.redraw()
+            self.redraw_scheduler.request("highlights")
 
     def on_resize(self, event):
         if not self.initialized:
             self.center_view(event.width, event.height)
             self.initialized = True
-        self.redraw()
+            self.redraw()
+        else:
+            self.redraw_scheduler.request("view")
 
     def center_view(self, width, height):
         if self.G.number_of_nodes() == 0: return
@@ -81,77 +97,28 @@ class InteractiveComparisonPanel:
         wy = (sy - self.offset_y) / self.zoom
         return wx, wy
 
+    def visible_world_rect(self):
+        w, h = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if w <= 1 or h <= 1: return None
+        x0, y0 = self.to_world(0, 0)
+        x1, y1 = self.to_world(w, h)
+        return x0, y0, x1, y1
+
     def redraw(self):
-        self.canvas.delete("all")
-        r = self.node_radius * self.zoom 
-        
-        # --- 1. DRAW HIGHLIGHTS (This is the part likely missing) ---
-        if self.highlights:
-            edge_counts = {}
-            
-            for h in self.highlights:
-                color = h.get('color', 'yellow')
-                width = h.get('width', 8) * self.zoom
-                
-                # Draw Nodes (Halo)
-                for n in h.get('nodes', []):
-                    wx, wy = self.G.nodes[n].get('pos', (0,0))
-                    sx, sy = self.to_screen(wx, wy)
-                    rad = r + (width / 2) 
-                    self.canvas.create_oval(sx-rad, sy-rad, sx+rad, sy+rad, fill=color, outline=color)
-
-                # Draw Edges (Offset)
-                for u, v in h.get('edges', []):
-                    edge_key = tuple(sorted((u, v)))
-                    count = edge_counts.get(edge_key, 0)
-                    edge_counts[edge_key] = count + 1
-                    
-                    offset_step = width / 2
-                    current_offset = (count * width) - offset_step
-                    
-                    p1 = self.G.nodes[u].get('pos', (0,0))
-                    p2 = self.G.nodes[v].get('pos', (0,0))
-                    sx1, sy1 = self.to_screen(p1[0], p1[1])
-                    sx2, sy2 = self.to_screen(p2[0], p2[1])
-                    
-                    dx, dy = sx2 - sx1, sy2 - sy1
-                    length = math.hypot(dx, dy)
-                    if length == 0: continue
-                    
-                    nx, ny = -dy / length, dx / length
-                    os_x = nx * current_offset
-                    os_y = ny * current_offset
-                    
-                    self.canvas.create_line(sx1+os_x, sy1+os_y, sx2+os_x, sy2+os_y, 
-                                          fill=color, width=width, capstyle=tk.ROUND, joinstyle=tk.ROUND)
-
-        # --- 2. DRAW STANDARD GRAPH (Edges & Nodes) ---
-        # Edges
-        for u, v in self.G.edges():
-            p1 = self.G.nodes[u].get('pos', (0,0))
-            p2 = self.G.nodes[v].get('pos', (0,0))
-            sx1, sy1 = self.to_screen(p1[0], p1[1])
-            sx2, sy2 = self.to_screen(p2[0], p2[1])
-            self.canvas.create_line(sx1, sy1, sx2, sy2, arrow=tk.LAST, width=2*self.zoom)
-
-        # Nodes
-        for n, d in self.G.nodes(data=True):
-            wx, wy = d.get('pos', (0,0))
-            sx, sy = self.to_screen(wx, wy)
-            
-            ag = d.get('agent', "Unassigned")
-            fill = self.agents.get(ag, "white")
-            if '_color_cache' in d: fill = d['_color_cache']
-
-            if d.get('type') == "Function":
-                self.canvas.create_rectangle(sx-r, sy-r, sx+r, sy+r, fill=fill, outline="black")
-            else:
-                self.canvas.create_oval(sx-r, sy-r, sx+r, sy+r, fill=fill, outline="black")
-            
-            lbl = d.get('label', '')
-            font_size = max(15, int(10 * self.zoom))
-            label_offset = r + (5*self.zoom)
-            self.canvas.create_text(sx, sy-label_offset, text=lbl, font=("Arial", font_size, "bold",), anchor="s")
+        """Schedules a full repaint; repeated calls within a frame are rendered once."""
+        self.redraw_scheduler.request("canvas")
+
+    def render_frame(self, dirty):
+        if "canvas" in dirty:
+            self.renderer.render(self.G, self.zoom, self.agents, highlights=self.highlights,
+                                 viewport=self.visible_world_rect())
+        else:
+            if "highlights" in dirty:
+                self.renderer.render_highlights(self.highlights)
+            if "view" in dirty:
+                self.renderer.render_view(self.zoom, self.visible_world_rect())
+            if "nodes" in dirty:
+                self.renderer.update_nodes(dirty["nodes"])
 
     def on_zoom(self, event, direction=None):
         if direction is None:
@@ -159,17 +126,17 @@ class InteractiveComparisonPanel:
         else:
             factor = 1.1 if direction > 0 else 0.9
         self.zoom *= factor
-        self.redraw()
+        # Zoom around the cursor, natively; items are re-rendered once the wheel stops
+        self.offset_x = event.x - (event.x - self.offset_x) * factor
+        self.offset_y = event.y - (event.y - self.offset_y) * factor
+        self.renderer.scale(factor, event.x, event.y)
+        self.redraw_scheduler.request_later("view", config.VIEW_SETTLE_MS)
 
     def on_mouse_down(self, event):
         mx, my = event.x, event.y
-        clicked_node = None
-        r_screen = self.node_radius * self.zoom
-        for n, d in self.G.nodes(data=True):
-            wx, wy = d.get('pos', (0,0))
-            sx, sy = self.to_screen(wx, wy)
-            if math.hypot(mx-sx, my-sy) <= r_screen:
-                clicked_node = n; break
+        clicked_node = self.renderer.node_at(*self.to_world(mx, my))
+        if clicked_node is not None and not self.G.has_node(clicked_node):
+            clicked_node = None # Stale index entry until the next render pass
         
         if clicked_node is not None:
             self.drag_mode = "NODE"; self.drag_data = clicked_node
@@ -183,16 +150,19 @@ class InteractiveComparisonPanel:
         if self.drag_mode == "NODE":
             wx, wy = self.to_world(mx, my)
             self.G.nodes[self.drag_data]['pos'] = (wx, wy)
-            self.redraw()
+            self.redraw_scheduler.request("nodes", self.drag_data)
             if self.redraw_callback: self.redraw_callback()
         elif self.drag_mode == "PAN":
             start_x, start_y = self.drag_data
             dx = mx - start_x; dy = my - start_y
             self.offset_x += dx; self.offset_y += dy
             self.drag_data = (mx, my)
-            self.redraw()
+            self.renderer.pan(dx, dy)
+            self.redraw_scheduler.request_later("view", config.VIEW_SETTLE_MS)
 
     def on_mouse_up(self, event):
+        if self.drag_mode == "PAN":
+            self.redraw_scheduler.request_later("view", 0)
         self.drag_mode = None; self.drag_data = None
 
 class CreateToolTip(object):
@@ -246,4 +216,160 @@ class CreateToolTip(object):
         tw = self.tw
         self.tw = None
         if tw:
-            tw.destroy()
\ No newline at end of file
+            tw.destroy()
+
+class LibraryPicker:
+    """
+    Searchable, sortable list of the architectures in a LibraryIndex.
+    Opens at once with the cached summaries and fills in new or changed files as the
+    background refresh gets to them. on_choose(paths) is called with the chosen files.
+    """
+    def __init__(self, parent, index, on_choose, title="Architecture Library", action="Open",
+                 multiple=False, browse=None, on_folder=None):
+        self.index = index
+        self.on_choose = on_choose
+        self.on_folder = on_folder
+        self.sort_column = "Name"
+        self.sort_reverse = False
+        self.shown_version = None
+
+        self.win = tk.Toplevel(parent)
+        self.win.title(title)
+        self.win.geometry("1000x500")
+
+        top = tk.Frame(self.win)
+        top.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(top, text="Search:").pack(side=tk.LEFT)
+        self.search = tk.StringVar(self.win, value="")
+        self.search.trace_add("write", lambda *a: self.fill())
+        search_entry = tk.Entry(top, textvariable=self.search, width=40)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.focus_set()
+        self.folder_label = tk.Label(top, text=index.directory, fg="#555")
+        self.folder_label.pack(side=tk.LEFT, padx=10)
+        tk.Button(top, text="Folder...", command=self.choose_folder).pack(side=tk.RIGHT)
+
+        self.columns = ["Name", "Nodes", "Edges", "Agents", "Layers"] + config.LIBRARY_METRICS + ["Modified"]
+        body = tk.Frame(self.win)
+        body.pack(fill=tk.BOTH, expand=True, padx=5)
+        self.tree = ttk.Treeview(body, columns=self.columns, show="headings",
+                                 selectmode="extended" if multiple else "browse")
+        for c in self.columns:
+            self.tree.heading(c, text=c, command=lambda c=c: self.sort_by(c))
+            self.tree.column(c, width=200 if c in ("Name", "Agents") else 90, anchor=tk.W)
+        scroll = tk.Scrollbar(body, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", lambda e: self.choose())
+
+        bottom = tk.Frame(self.win)
+        bottom.pack(fill=tk.X, padx=5, pady=5)
+        self.status = tk.Label(bottom, text="", anchor=tk.W)
+        self.status.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(bottom, text=action, command=self.choose, bg="#ffd700").pack(side=tk.RIGHT, padx=2)
+        if browse:
+            tk.Button(bottom, text="Browse...", command=lambda: (self.win.destroy(), browse())).pack(side=tk.RIGHT, padx=2)
+
+        self.fill()
+        self.index.start_refresh()
+        self.poll()
+
+    # --- Rows ---
+
+    def row_values(self, path, entry):
+        """Display values for one file, in self.columns order."""
+        name = os.path.basename(path)
+        modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["mtime"]))
+        if "summary" not in entry:
+            blanks = [""] * len(config.LIBRARY_METRICS)
+            return [name, "", "", f"Error: {entry.get('error', '')}", ""] + blanks + [modified]
+        s = entry["summary"]
+        agents = ", ".join(a for a in s["agents"] if a != "Unassigned")
+        # Layer histogram by initials, e.g. "S2 CG4 DW10 BE3"
+        layers = " ".join("".join(w[0] for w in layer.split()) + str(count) for layer, count in s["layers"].items())
+        metrics = [s["metrics"].get(m, "") for m in config.LIBRARY_METRICS]
+        return [name, s["nodes"], s["edges"], agents, layers] + metrics + [modified]
+
+    def fill(self):
+        """Rebuilds the rows from the index, filtered by the search text and sorted."""
+        query = self.search.get().strip().lower()
+        rows = []
+        for path, entry in self.index.entries():
+            values = self.row_values(path, entry)
+            if query and query not in (values[0] + " " + str(values[3])).lower():
+                continue
+            rows.append((path, entry, values))
+
+        col = self.columns.index(self.sort_column)
+        if self.sort_column == "Modified":
+            key = lambda r: r[1]["mtime"]
+        elif self.sort_column in ("Name", "Agents", "Layers"):
+            key = lambda r: _natural_key(r[2][col])
+        else: # Counts and metrics
+            key = lambda r: _number_key(r[2][col])
+        rows.sort(key=key, reverse=self.sort_reverse)
+
+        selected = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        for path, _, values in rows:
+            self.tree.insert("", tk.END, iid=path, values=values)
+        keep = [p for p, _, _ in rows if p in selected]
+        if keep: self.tree.selection_set(keep)
+
+    def sort_by(self, column):
+        """Sorts by a column; clicking the same heading again reverses the order."""
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column, self.sort_reverse = column, False
+        self.fill()
+
+    def poll(self):
+        """Shows files indexed since the last look, while the window is open."""
+        if not self.win.winfo_exists():
+            return
+        refreshing = self.index.refreshing
+        if self.index.version != self.shown_version:
+            self.shown_version = self.index.version
+            self.fill()
+        count = len(self.tree.get_children())
+        self.status.config(text=f"{count} architectures" + (" (indexing...)" if refreshing else ""))
+        if refreshing:
+            self.win.after(config.LIBRARY_POLL_MS, self.poll)
+        elif self.index.version != self.shown_version:
+            self.poll() # Last changes came in after the check above
+
+    # --- Actions ---
+
+    def choose(self):
+        entries = dict(self.index.entries())
+        paths = [p for p in self.tree.selection() if "summary" in entries.get(p, {})] # Skip unreadable files
+        if not paths: return
+        self.win.destroy()
+        self.on_choose(paths)
+
+    def choose_folder(self):
+        directory = filedialog.askdirectory(initialdir=self.index.directory, parent=self.win)
+        if not directory: return
+        self.index.stop()
+        self.index = LibraryIndex(directory)
+        if self.on_folder: self.on_folder(self.index)
+        self.folder_label.config(text=self.index.directory)
+        self.shown_version = None
+        self.fill()
+        self.index.start_refresh()
+        self.poll()
+
+def _number_key(value):
+    """Counts and metric strings (12, "0.250", "Q=0.66 (6 Grps)") sort by their number; blanks go last."""
+    match = _NUMBER.search(str(value))
+    if match:
+        return (0, float(match.group()))
+    return (1, 0.0)
+
+def _natural_key(text):
+    """Case-insensitive text order with digit runs compared as numbers (HP_2 before HP_10)."""
+    parts = _DIGITS.split(str(text).lower())
+    parts[1::2] = [int(p) for p in parts[1::2]]
+    return parts
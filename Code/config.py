@@ -1,9 +1,54 @@
 # config.py
 # Stores all your "Magic Numbers" and settings.
 
+import os
+
 # --- Graph Settings ---
 NODE_RADIUS = 20
-HISTORY_LIMIT = 40
+HISTORY_MEMORY_BUDGET = 32 * 1024 * 1024  # Bytes of undo/redo history kept (oldest steps dropped first)
+METRIC_CACHE_SIZE = 512       # Cached metric values (shared across windows)
+REDRAW_FRAME_MS = 16          # Minimum time between two canvas render passes (~60 fps)
+SPATIAL_CELL_SIZE = 200       # World units per spatial index cell (viewport culling)
+VIEW_SETTLE_MS = 150          # Pause after the last pan/zoom step before items are re-rendered
+
+# --- Edit Journal ---
+# Crash recovery: edits are appended to a journal here and offered for restore on the next start
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".interactive_jsat")
+JOURNAL_FLUSH_MS = 500          # Edits are written and fsync'd in batches at most this often
+JOURNAL_COMPACT_EVERY = 5000    # Journal lines before the graph is rewritten as a snapshot
+
+# --- Architecture Library ---
+# Folder listed by the Open/Compare library picker, and where its cached file summaries are kept
+LIBRARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Network Architectures")
+LIBRARY_CACHE_PATH = os.path.join(JOURNAL_DIR, "library_index.json")
+LIBRARY_METRICS = ["Density", "Cyclomatic Number", "Interdependence", "Modularity"] # Picker columns
+LIBRARY_POLL_MS = 200           # How often an open picker shows newly indexed files
+BULK_IMPORT_PARALLEL_BYTES = 2 * 1024 * 1024  # Total file size from which an import is parsed by a process pool
+
+# --- Level of Detail ---
+# Canvas render tiers, picked from the zoom and the number of nodes in view
+LOD_LABEL_MIN_ZOOM = 0.6        # Node labels are dropped below this zoom...
+LOD_LABEL_MAX_NODES = 300       # ...or with more nodes than this in view
+LOD_DETAIL_MIN_ZOOM = 0.35      # Arrowheads and node outlines are dropped below this zoom...
+LOD_DETAIL_MAX_NODES = 800      # ...or with more nodes than this in view
+LOD_AGGREGATE_MIN_ZOOM = 0.12   # Nodes collapse into one blob per agent (per layer in JSAT view) below this zoom...
+LOD_AGGREGATE_MAX_NODES = 1500  # ...or with more nodes than this in view
+
+# --- Cycle Enumeration Limits ---
+# Cycle counts explode on densely bidirectional graphs; results past these limits are marked truncated
+CYCLE_LENGTH_BOUND = None       # Longest cycle to look for (None = any length)
+CYCLE_MAX_COUNT = 1000          # Stop after this many cycles
+CYCLE_TIME_BUDGET = 2.0         # Seconds spent enumerating before giving up
+CYCLE_DISPLAY_LIMIT = 50        # Cycle buttons shown in the dashboard / comparison grid
+CYCLE_INDEX_CACHE_SIZE = 16     # Graph revisions whose cycle index is kept
+PARTITION_CACHE_SIZE = 16       # Graph revisions whose community partition is kept
+NODE_METRICS_CACHE_SIZE = 16    # Graph revisions whose node metrics table is kept
+
+# --- Approximate Betweenness ---
+# Exact betweenness is O(n*m); bigger graphs are estimated from sampled source nodes
+BETWEENNESS_APPROX_THRESHOLD = 1000  # Node count above which betweenness is sampled
+BETWEENNESS_SAMPLES = 128            # Source pivots per estimate
+BETWEENNESS_SEED = 0                 # Fixed seed so estimates don't jump between redraws
 
 # --- Default Agents ---
 DEFAULT_AGENTS = {"Unassigned": "white"}
@@ -28,4 +73,40 @@ LAYER_ORDER = [
     "Coordination Grounding", 
     "Distributed Work", 
     "Base Environment"
-]
\ No newline at end of file
+]
+
+# --- Background Metrics ---
+# Computed on the metric worker thread; their cells show "computing…" until ready
+BACKGROUND_METRICS = [
+    "Avg Clustering", "Critical Loop Nodes", "Total Cycles",
+    "Avg Cycle Length", "Modularity", "Global Efficiency"
+]
+
+# --- Agent Metrics ---
+# Metrics that depend on which agent each node belongs to; cached per agent assignment as well as per structure
+AGENT_METRICS = ["Interdependence"]
+
+# --- Comparison Metrics ---
+# Rows of the comparison grid, also the columns written by batch_metrics.py
+COMPARISON_METRICS = [
+    "Nodes", "Edges", "Density", "Avg Clustering", "Cyclomatic Number",
+    "Critical Loop Nodes", "Total Cycles", "Avg Cycle Length",
+    "Interdependence", "Modularity", "Global Efficiency"
+]
+
+# --- Dashboard Updates ---
+# Kinds of change passed to GraphBuilderApp.redraw()/notify(); each refreshes only these sidebar sections.
+# Pan, zoom and position-only drags pass none, so they never touch the sidebar.
+CHANGE_STRUCTURE = "structure"  # Nodes or edges added/removed, or the whole graph replaced
+CHANGE_AGENTS = "agents"        # Agents created/edited/deleted or nodes reassigned
+CHANGE_LABELS = "labels"        # A node label was edited
+CHANGE_SELECTION = "selection"  # The inspected node changed
+CHANGE_LAYER = "layer"          # A node moved to another JSAT layer
+
+DASHBOARD_SECTIONS = {
+    CHANGE_STRUCTURE: ("stats", "agents", "inspector"),
+    CHANGE_AGENTS: ("stats", "agents"),     # Interdependence depends on agent boundaries
+    CHANGE_LABELS: ("stats", "agents", "inspector"), # Labels appear in tooltips, agent list and inspector
+    CHANGE_SELECTION: ("inspector",),
+    CHANGE_LAYER: ("inspector",),
+}
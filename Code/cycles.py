@@ -0,0 +1,213 @@
+# cycles.py
+# Bounded cycle enumeration.
+# Densely bidirectional architectures can have exponentially many simple cycles,
+# so every caller goes through here with a length bound, a count cap and a
+# wall-clock budget.
+
+import time
+import networkx as nx
+
+import config
+from graph_cache import structural_fingerprint, LRUCache
+
+# Steps of the cycle search between two looks at the clock
+_CLOCK_EVERY = 2000
+
+class BoundedCycles:
+    """
+    Lazy, limited iterator over the simple cycles of G.
+    After iteration, 'exact' tells whether every cycle (up to length_bound) was seen,
+    and 'reason' names the limit that stopped it ("count" or "time").
+    Iterating again restarts the enumeration.
+
+    The search is done here rather than by nx.simple_cycles so the time budget is checked
+    while searching, not only when a cycle is found: a large graph with few cycles could
+    otherwise search far past the budget without yielding anything.
+    """
+    def __init__(self, G, length_bound=None, max_count=None, time_budget=None):
+        self.G = G
+        self.length_bound = length_bound if length_bound is not None else config.CYCLE_LENGTH_BOUND
+        self.max_count = max_count if max_count is not None else config.CYCLE_MAX_COUNT
+        self.time_budget = time_budget if time_budget is not None else config.CYCLE_TIME_BUDGET
+        self.exact = True
+        self.reason = None
+
+    def __iter__(self):
+        self.exact = True
+        self.reason = None
+        self._deadline = time.perf_counter() + self.time_budget if self.time_budget else None
+        self._steps = 0
+        self._stopped = False # Set by _tick when the budget runs out mid-search
+        count = 0
+
+        for cycle in self._cycles():
+            if self.max_count and count >= self.max_count:
+                # There is at least one more cycle than we are allowed to report
+                self.exact, self.reason = False, "count"
+                return
+            count += 1
+            yield cycle
+        if self._stopped:
+            self.exact, self.reason = False, "time"
+
+    def _tick(self, every=_CLOCK_EVERY):
+        """Counts one search step; True (from then on) once the time budget is used up."""
+        self._steps += 1
+        if not self._stopped and self._deadline is not None and self._steps % every == 0:
+            self._stopped = time.perf_counter() > self._deadline
+        return self._stopped
+
+    def _cycles(self):
+        """
+        Every simple cycle, one strongly connected component at a time: all cycles through
+        one node of the component, then that node is removed and what remains is split again.
+        Stops early, with _stopped set, when the time is up.
+        """
+        G = self.G
+        for v in G:
+            if G.has_edge(v, v):
+                yield [v]
+        adj = {v: set(G.successors(v)) - {v} for v in G}
+        components = [c for c in nx.strongly_connected_components(G) if len(c) > 1]
+        while components:
+            if self._tick(every=1): return
+            component = components.pop()
+            s = next(iter(component))
+            sub = {v: adj[v] & component for v in component}
+            if self.length_bound is None:
+                yield from self._johnson(s, sub)
+            else:
+                yield from self._bounded(s, sub)
+            if self._stopped: return
+            component.discard(s)
+            rest = nx.DiGraph((v, w) for v in component for w in sub[v] if w != s)
+            components.extend(c for c in nx.strongly_connected_components(rest) if len(c) > 1)
+
+    def _johnson(self, s, sub):
+        """Johnson's circuit search: all cycles through s in the component 'sub'."""
+        path = [s]
+        blocked = {s}
+        B = {}
+        stack = [iter(sub[s])]
+        closed = [False]
+        while stack:
+            if self._tick(): return
+            for w in stack[-1]:
+                if w == s:
+                    yield path[:]
+                    closed[-1] = True
+                elif w not in blocked:
+                    path.append(w)
+                    closed.append(False)
+                    stack.append(iter(sub[w]))
+                    blocked.add(w)
+                    break
+            else: # All neighbors of path[-1] done
+                stack.pop()
+                v = path.pop()
+                if closed.pop():
+                    if closed: closed[-1] = True
+                    # Unblock v and everything waiting on it
+                    pending = [v]
+                    while pending:
+                        u = pending.pop()
+                        if u in blocked:
+                            blocked.discard(u)
+                            pending.extend(B.pop(u, ()))
+                else:
+                    for w in sub[v]:
+                        B.setdefault(w, set()).add(v)
+
+    def _bounded(self, s, sub):
+        """Cycles through s of at most length_bound nodes (depth-limited search, no blocking)."""
+        bound = self.length_bound
+        path = [s]
+        on_path = {s}
+        stack = [iter(sub[s])]
+        while stack:
+            if self._tick(): return
+            for w in stack[-1]:
+                if w == s:
+                    yield path[:]
+                elif w not in on_path and len(path) < bound:
+                    path.append(w)
+                    on_path.add(w)
+                    stack.append(iter(sub[w]))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(path.pop())
+
+class CycleResult:
+    """Materialized output of BoundedCycles."""
+    def __init__(self, cycles, exact, reason=None, length_bound=None):
+        self.cycles = cycles
+        self.exact = exact
+        self.reason = reason
+        self.length_bound = length_bound
+
+def enumerate_cycles(G, length_bound=None, max_count=None, time_budget=None):
+    """Collects cycles under the configured limits. Check .exact before trusting totals."""
+    it = BoundedCycles(G, length_bound, max_count, time_budget)
+    cycles = list(it)
+    return CycleResult(cycles, it.exact, it.reason, it.length_bound)
+
+class CycleIndex:
+    """
+    Every (bounded) cycle of one graph revision plus the data derived from it:
+    node paths, lengths, edge lists and how many cycles each node takes part in.
+    Built once per structural fingerprint and shared by metrics, dashboard and highlights.
+    """
+    def __init__(self, result):
+        self.paths = result.cycles
+        self.exact = result.exact
+        self.reason = result.reason
+        self.lengths = [len(p) for p in self.paths]
+        # Connect last node back to first
+        self.edges = [[(p[j], p[(j + 1) % len(p)]) for j in range(len(p))] for p in self.paths]
+        self.node_counts = {}
+        for p in self.paths:
+            for n in p:
+                self.node_counts[n] = self.node_counts.get(n, 0) + 1
+
+    def __len__(self):
+        return len(self.paths)
+
+    def cycle(self, index):
+        """Node path of cycle 'index', or None if out of range."""
+        if 0 <= index < len(self.paths): return self.paths[index]
+        return None
+
+    def cycle_edges(self, index):
+        if 0 <= index < len(self.edges): return self.edges[index]
+        return []
+
+    def participation(self, node):
+        """Number of enumerated cycles passing through 'node'."""
+        return self.node_counts.get(node, 0)
+
+    def count_label(self):
+        """Cycle count for display, e.g. "12" or "1000+" when truncated."""
+        return f"{len(self.paths)}" if self.exact else f"{len(self.paths)}+"
+
+    def average_length(self):
+        if not self.lengths: return 0.0
+        return sum(self.lengths) / len(self.lengths)
+
+    def average_label(self):
+        """Average cycle length; '~' marks an average over a truncated cycle set."""
+        return f"{'' if self.exact else '~'}{self.average_length():.2f}"
+
+# One index per structural revision; copies of a graph (comparison panels) share it
+_index_cache = LRUCache(config.CYCLE_INDEX_CACHE_SIZE)
+
+def get_cycle_index(G, fingerprint=None, compute=True):
+    """
+    Returns the CycleIndex for G's current structure, enumerating only on a cache miss.
+    With compute=False, returns None on a miss instead.
+    """
+    if fingerprint is None:
+        fingerprint = structural_fingerprint(G)
+    if not compute:
+        return _index_cache.peek(fingerprint)
+    return _index_cache.get_or_compute(fingerprint, lambda: CycleIndex(enumerate_cycles(G)))
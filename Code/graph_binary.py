@@ -0,0 +1,151 @@
+# graph_binary.py
+# Compact binary architecture format (.jsatb). Unlike GraphData JSON it keeps
+# node positions and agent colors, and it is read without any text parsing:
+# the file is memory-mapped and each column is copied straight into an array.
+#
+# Layout (little-endian):
+#   header      magic, version, node count, edge count, table size, label bytes
+#   table       JSON: {"types": [...], "layers": [...], "agents": [[name, color], ...]}
+#   nodes       id int64[n], x float64[n], y float64[n],
+#               type/layer/agent uint16[n] (indices into the table, MISSING = absent),
+#               label offsets uint32[n + 1]
+#   edges       source uint32[m], target uint32[m] (node positions, not ids)
+#   labels      UTF-8 bytes of all labels back to back
+
+import gc
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+import networkx as nx
+
+EXTENSION = ".jsatb"
+MAGIC = b"JSATB\0"
+VERSION = 1
+HEADER = struct.Struct("<6sHIIII")
+MISSING = 0xFFFF # Index value for a node without that attribute
+
+_SWAP = sys.byteorder != "little" # Arrays are stored little-endian
+
+def _column(values, typecode):
+    a = array(typecode, values)
+    if _SWAP: a.byteswap()
+    return a.tobytes()
+
+def _read_column(buf, offset, typecode, count):
+    a = array(typecode)
+    end = offset + a.itemsize * count
+    a.frombytes(buf[offset:end])
+    if _SWAP: a.byteswap()
+    return a, end
+
+def save_graph(fp, G, agents):
+    """Writes G and its agent colors. Node ids must be integers (as the editor creates them)."""
+    types, layers, agent_names = {}, {}, {name: i for i, name in enumerate(agents)}
+    ids, xs, ys, type_idx, layer_idx, agent_idx, label_parts = [], [], [], [], [], [], []
+    position = {}
+
+    def index_of(table, value):
+        if value is None: return MISSING
+        return table.setdefault(value, len(table))
+
+    for i, (n, d) in enumerate(G.nodes(data=True)):
+        if not isinstance(n, int):
+            raise ValueError(f"Node id {n!r} is not an integer.")
+        position[n] = i
+        ids.append(n)
+        x, y = d.get('pos', (0, 0))
+        xs.append(x)
+        ys.append(y)
+        type_idx.append(index_of(types, d.get('type')))
+        layer_idx.append(index_of(layers, d.get('layer')))
+        # Nodes may name an agent that has no color entry; it is kept, without a color
+        agent_idx.append(index_of(agent_names, d.get('agent')))
+        label_parts.append(d.get('label', '').encode("utf-8"))
+
+    label_offsets = [0]
+    for part in label_parts:
+        label_offsets.append(label_offsets[-1] + len(part))
+    labels = b"".join(label_parts)
+
+    table = json.dumps({
+        "types": list(types), "layers": list(layers),
+        "agents": [[name, agents.get(name)] for name in agent_names],
+        "listed": len(agents), # The first 'listed' agents are the agent table itself
+    }).encode("utf-8")
+
+    edges = list(G.edges())
+    with open(fp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(ids), len(edges), len(table), len(labels)))
+        f.write(table)
+        f.write(_column(ids, 'q'))
+        f.write(_column(xs, 'd'))
+        f.write(_column(ys, 'd'))
+        f.write(_column(type_idx, 'H'))
+        f.write(_column(layer_idx, 'H'))
+        f.write(_column(agent_idx, 'H'))
+        f.write(_column(label_offsets, 'I'))
+        f.write(_column((position[u] for u, _ in edges), 'I'))
+        f.write(_column((position[v] for _, v in edges), 'I'))
+        f.write(labels)
+
+def load_graph(fp):
+    """Reads a .jsatb file. Returns (G, agents) like graph_io.load_graph_file."""
+    with open(fp, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        if len(buf) < HEADER.size:
+            raise ValueError("Invalid file format: file is too short.")
+        magic, version, n, m, table_len, labels_len = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError("Invalid file format: not a .jsatb architecture.")
+        if version != VERSION:
+            raise ValueError(f"Unsupported .jsatb version {version}.")
+
+        offset = HEADER.size
+        table = json.loads(buf[offset:offset + table_len].decode("utf-8"))
+        offset += table_len
+        ids, offset = _read_column(buf, offset, 'q', n)
+        xs, offset = _read_column(buf, offset, 'd', n)
+        ys, offset = _read_column(buf, offset, 'd', n)
+        type_idx, offset = _read_column(buf, offset, 'H', n)
+        layer_idx, offset = _read_column(buf, offset, 'H', n)
+        agent_idx, offset = _read_column(buf, offset, 'H', n)
+        label_offsets, offset = _read_column(buf, offset, 'I', n + 1)
+        sources, offset = _read_column(buf, offset, 'I', m)
+        targets, offset = _read_column(buf, offset, 'I', m)
+        labels = buf[offset:offset + labels_len]
+        if len(labels) != labels_len:
+            raise ValueError("Invalid file format: file is truncated.")
+
+    types, layers = table["types"], table["layers"]
+    agent_table = table["agents"]
+    agents = {name: color for name, color in agent_table[:table["listed"]]}
+    agent_names = [name for name, _ in agent_table]
+
+    # The graph is filled through DiGraph's own dicts (node -> attrs, successors,
+    # predecessors, sharing one data dict per edge). add_nodes_from/add_edges_from
+    # check every item and would take most of the load time.
+    # The collector is paused meanwhile: the many small dicts created here would
+    # otherwise trigger repeated full scans that cost as much as the build itself.
+    G = nx.DiGraph()
+    node_attrs, succ, pred = G._node, G._succ, G._pred
+    ids = ids.tolist()
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for i, nid in enumerate(ids):
+            d = {"pos": (xs[i], ys[i]),
+                 "label": labels[label_offsets[i]:label_offsets[i + 1]].decode("utf-8")}
+            if type_idx[i] != MISSING: d["type"] = types[type_idx[i]]
+            if layer_idx[i] != MISSING: d["layer"] = layers[layer_idx[i]]
+            if agent_idx[i] != MISSING: d["agent"] = agent_names[agent_idx[i]]
+            node_attrs[nid] = d
+            succ[nid] = {}
+            pred[nid] = {}
+        for s, t in zip(sources, targets):
+            u, v = ids[s], ids[t]
+            succ[u][v] = pred[v][u] = {}
+    finally:
+        if collecting: gc.enable()
+    return G, agents
@@ -0,0 +1,100 @@
+# graph_cache.py
+# Memoization helpers for graph analytics.
+# Results are keyed by a structural fingerprint of the nodes and edges, so edits
+# that only move, relabel, retype or reassign nodes reuse everything that was
+# already computed. The editor's own graph is keyed by GraphEditor revision keys instead.
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import config
+
+def structural_fingerprint(G):
+    """
+    Hashes nodes and edges only; node attributes are ignored, since the cycle index,
+    partition and centralities do not depend on them.
+    Insertion order is part of the hash because cycle/community ordering depends on it.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(b"D" if G.is_directed() else b"U")
+    h.update(repr(list(G.nodes())).encode())
+    h.update(repr(list(G.edges())).encode())
+    return h.hexdigest()
+
+def agent_fingerprint(G):
+    """Hashes which agent each node belongs to, for metrics that depend on it (config.AGENT_METRICS)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr([(n, d.get('agent')) for n, d in G.nodes(data=True)]).encode())
+    return h.hexdigest()
+
+# Every LRUCache registers here so benchmarks can start from a cold state
+_all_caches = []
+
+def clear_all_caches():
+    for cache in _all_caches:
+        cache.clear()
+
+class LRUCache:
+    """
+    Small least-recently-used cache with hit/miss counters.
+    Thread-safe, since background metric jobs fill it while the Tk thread reads it.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        _all_caches.append(self)
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.data:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return self.data[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        """Like get, but a miss is not counted (used to check before scheduling work)."""
+        with self.lock:
+            if key in self.data:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return self.data[key]
+            return default
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def get_or_compute(self, key, compute_fn):
+        with self.lock:
+            if key in self.data:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return self.data[key]
+            self.misses += 1
+        # Compute outside the lock; two threads racing just compute twice
+        value = compute_fn()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self.data), "maxsize": self.maxsize}
+
+# Shared by the main window and every comparison window
+metric_cache = LRUCache(config.METRIC_CACHE_SIZE)
@@ -0,0 +1,247 @@
+# graph_editor.py
+# Undo/redo as recorded changes instead of whole-graph copies.
+# Edits go through a GraphEditor, which applies them to the editor's graph and
+# keeps just enough to reverse them, so history grows with the edits made
+# rather than with the size of the graph.
+
+import itertools
+import sys
+from collections import deque
+from contextlib import contextmanager
+
+import networkx as nx
+
+import config
+
+MISSING = object() # Marks an attribute or agent that did not exist
+
+# Rough cost of one node or edge of a graph kept whole in the history (e.g. before a load)
+_GRAPH_ELEMENT_BYTES = 400
+
+_STRUCTURE_OPS = {"add_node", "remove_node", "add_edge", "remove_edge", "graph"}
+_editor_ids = itertools.count() # Keeps revision keys of two editors apart
+
+class GraphEditor:
+    """
+    Applies edits to owner.G and owner.agents and records how to reverse them.
+
+    Recorded operations:
+      ("add_node", n, attrs)            ("remove_node", n, attrs, in_edges, out_edges)
+      ("add_edge", u, v, attrs)         ("remove_edge", u, v, attrs)
+      ("node_attr", n, key, old, new)   ("agent", name, old_color, new_color)
+      ("graph", old_G, old_agents, new_G, new_agents)
+
+    Edits inside one transaction() are undone and redone as one step; an edit made
+    outside a transaction is a step of its own. Once the estimated size of the
+    history passes 'budget' bytes the oldest steps are dropped (the newest is always kept).
+    Edits, undos and redos are also passed to the journal, when one is attached.
+
+    'revision' goes up whenever nodes or edges change (including by undo/redo) and
+    'agent_revision' whenever a node's agent may have changed. structure_key() and
+    agent_key() turn them into cache keys, so the analysis caches can tell whether the
+    graph changed without hashing it.
+    """
+    def __init__(self, owner, budget=None, journal=None):
+        self.owner = owner
+        self.journal = journal    # Gets every applied operation (see journal.EditJournal)
+        self.budget = config.HISTORY_MEMORY_BUDGET if budget is None else budget
+        self.undo_stack = deque() # (ops, estimated bytes) per step
+        self.redo_stack = deque()
+        self.size = 0             # Estimated bytes held by both stacks
+        self._open = None         # Ops of the transaction being recorded
+        self._depth = 0
+        self._id = next(_editor_ids)
+        self.revision = 0
+        self.agent_revision = 0
+
+    def structure_key(self):
+        """Cache key of the current nodes and edges (see graph_cache.structural_fingerprint)."""
+        return ("edit", self._id, self.revision)
+
+    def agent_key(self):
+        """Cache key of the current agent assignment (see graph_cache.agent_fingerprint)."""
+        return ("edit", self._id, self.agent_revision)
+
+    @contextmanager
+    def transaction(self):
+        """Groups the edits made in the with-block into one undo step. Nesting is allowed."""
+        self._depth += 1
+        if self._depth == 1:
+            self._open = []
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                ops, self._open = self._open, None
+                if ops: self._push(ops)
+
+    # --- Edits ---
+
+    def add_node(self, n, **attrs):
+        self.owner.G.add_node(n, **attrs)
+        self._record(("add_node", n, dict(attrs)))
+
+    def remove_node(self, n):
+        G = self.owner.G
+        op = ("remove_node", n, dict(G.nodes[n]),
+              [(u, dict(d)) for u, _, d in G.in_edges(n, data=True)],
+              [(v, dict(d)) for _, v, d in G.out_edges(n, data=True)])
+        G.remove_node(n)
+        self._record(op)
+
+    def add_edge(self, u, v, **attrs):
+        if self.owner.G.has_edge(u, v): return
+        self.owner.G.add_edge(u, v, **attrs)
+        self._record(("add_edge", u, v, dict(attrs)))
+
+    def remove_edge(self, u, v):
+        G = self.owner.G
+        op = ("remove_edge", u, v, dict(G.edges[u, v]))
+        G.remove_edge(u, v)
+        self._record(op)
+
+    def set_node_attr(self, n, key, value, old=MISSING):
+        """
+        Sets G.nodes[n][key]. Pass 'old' when the attribute was already changed in place,
+        e.g. a node's position while it was being dragged.
+        """
+        d = self.owner.G.nodes[n]
+        if old is MISSING:
+            old = d.get(key, MISSING)
+        if old == value: return
+        d[key] = value
+        self._record(("node_attr", n, key, old, value))
+
+    def set_agent(self, name, color):
+        """Adds an agent or changes its color."""
+        old = self.owner.agents.get(name, MISSING)
+        if old == color: return
+        self.owner.agents[name] = color
+        self._record(("agent", name, old, color))
+
+    def remove_agent(self, name):
+        old = self.owner.agents.pop(name)
+        self._record(("agent", name, old, MISSING))
+
+    def reset(self, G, agents):
+        """Swaps in a graph without recording it (e.g. restored work); history is cleared."""
+        self.owner.G, self.owner.agents = G, agents
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.size = 0
+        self._touched(("graph",))
+
+    def replace_graph(self, G, agents):
+        """Swaps in a whole new graph (e.g. a loaded file); undo brings the previous one back."""
+        op = ("graph", self.owner.G, self.owner.agents, G, agents)
+        self.owner.G, self.owner.agents = G, agents
+        self._record(op)
+
+    # --- Undo / Redo ---
+
+    def undo(self):
+        """Reverts the last step. Returns False when there is nothing to undo."""
+        if not self.undo_stack: return False
+        step = self.undo_stack.pop()
+        for op in reversed(step[0]):
+            revert_op(self.owner, op)
+            self._touched(op)
+            if self.journal: self.journal.append(op, forward=False)
+        self.redo_stack.append(step)
+        return True
+
+    def redo(self):
+        """Re-applies the last undone step. Returns False when there is nothing to redo."""
+        if not self.redo_stack: return False
+        step = self.redo_stack.pop()
+        for op in step[0]:
+            apply_op(self.owner, op)
+            self._touched(op)
+            if self.journal: self.journal.append(op)
+        self.undo_stack.append(step)
+        return True
+
+    # --- Internals ---
+
+    def _touched(self, op):
+        """Bumps the revisions an applied or reverted op invalidates."""
+        if op[0] in _STRUCTURE_OPS:
+            self.revision += 1
+            self.agent_revision += 1 # New or restored nodes bring their own agents
+        elif op[0] == "node_attr" and op[2] == "agent":
+            self.agent_revision += 1
+
+    def _record(self, op):
+        self._touched(op)
+        if self.journal: self.journal.append(op)
+        if self._open is not None:
+            self._open.append(op)
+        else:
+            self._push([op])
+
+    def _push(self, ops):
+        step = (ops, sum(_estimate_size(op) for op in ops))
+        self.undo_stack.append(step)
+        self.size += step[1]
+        # A new edit makes the undone steps unreachable
+        while self.redo_stack:
+            self.size -= self.redo_stack.pop()[1]
+        while self.size > self.budget and len(self.undo_stack) > 1:
+            self.size -= self.undo_stack.popleft()[1]
+
+def apply_op(owner, op):
+    """Performs a recorded operation on owner.G / owner.agents."""
+    G, kind = owner.G, op[0]
+    if kind == "add_node":
+        G.add_node(op[1], **op[2])
+    elif kind == "remove_node":
+        G.remove_node(op[1])
+    elif kind == "add_edge":
+        G.add_edge(op[1], op[2], **op[3])
+    elif kind == "remove_edge":
+        G.remove_edge(op[1], op[2])
+    elif kind == "node_attr":
+        _set_or_delete(G.nodes[op[1]], op[2], op[4])
+    elif kind == "agent":
+        _set_or_delete(owner.agents, op[1], op[3])
+    elif kind == "graph":
+        owner.G, owner.agents = op[3], op[4]
+
+def revert_op(owner, op):
+    """Reverses a recorded operation."""
+    G, kind = owner.G, op[0]
+    if kind == "add_node":
+        G.remove_node(op[1])
+    elif kind == "remove_node":
+        _, n, attrs, in_edges, out_edges = op
+        G.add_node(n, **attrs)
+        G.add_edges_from((u, n, d) for u, d in in_edges)
+        G.add_edges_from((n, v, d) for v, d in out_edges)
+    elif kind == "add_edge":
+        G.remove_edge(op[1], op[2])
+    elif kind == "remove_edge":
+        G.add_edge(op[1], op[2], **op[3])
+    elif kind == "node_attr":
+        _set_or_delete(G.nodes[op[1]], op[2], op[3])
+    elif kind == "agent":
+        _set_or_delete(owner.agents, op[1], op[2])
+    elif kind == "graph":
+        owner.G, owner.agents = op[1], op[2]
+
+def _set_or_delete(d, key, value):
+    if value is MISSING:
+        d.pop(key, None)
+    else:
+        d[key] = value
+
+def _estimate_size(obj):
+    """Approximate bytes held by a recorded operation (shallow sizes of its parts)."""
+    if isinstance(obj, nx.Graph):
+        return _GRAPH_ELEMENT_BYTES * (obj.number_of_nodes() + obj.number_of_edges())
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_estimate_size(x) for x in obj)
+    return size
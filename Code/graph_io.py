@@ -0,0 +1,395 @@
+# graph_io.py
+# Reads and writes "GraphData" architecture files without touching Tk.
+# Shared by the GUI loader and the headless tools so both follow the same parsing rules.
+
+import json
+import os
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import networkx as nx
+
+import config
+import graph_binary
+
+def get_random_color():
+    return "#" + ''.join([random.choice('ABCDEF89') for _ in range(6)])
+
+def parse_node_type(combined_type):
+    """
+    Splits a combined JSON type (e.g. "DistributedWorkFunction") into (node_type, layer).
+    The suffix picks Function/Resource, the prefix is matched against the known layers
+    ignoring spaces and casing.
+    """
+    node_type = "Resource" # Default
+    layer_prefix = combined_type
+
+    # 1. Determine Type (Function vs Resource)
+    if combined_type.endswith("Function"):
+        node_type = "Function"
+        layer_prefix = combined_type.replace("Function", "")
+    elif combined_type.endswith("Resource"):
+        node_type = "Resource"
+        layer_prefix = combined_type.replace("Resource", "")
+
+    # 2. Determine Layer
+    # e.g. "DistributedWork" matches "Distributed Work"
+    node_layer = "Base Environment" # Default fallback
+    normalized_prefix = layer_prefix.lower().replace(" ", "")
+
+    for known_layer in config.LAYER_ORDER:
+        normalized_known = known_layer.lower().replace(" ", "")
+        if normalized_known == normalized_prefix:
+            node_layer = known_layer
+            break
+
+    return node_type, node_layer
+
+class GraphDataBuilder:
+    """
+    Builds (G, agents) from the pieces of a "GraphData" section, in any order:
+    add_agent / add_node / add_edge for each entry, then finish().
+    Used for whole parsed files and for files streamed entry by entry, so both follow the same rules.
+    Nodes are laid out left to right on their layer since the format has no positions.
+    """
+    def __init__(self):
+        self.G = nx.DiGraph()
+        self.agents = config.DEFAULT_AGENTS.copy()
+        self.label_to_agent = {}
+        self.label_to_id = {}
+        self.edges = [] # (source label, target label); resolved once all nodes are known
+        # Initialize counters for all known layers
+        self.layer_x_counters = {l: 100 for l in config.LAYER_ORDER}
+
+    def add_agent(self, agent_name, agent_data):
+        if agent_name not in self.agents:
+            self.agents[agent_name] = get_random_color()
+
+        for node_label in agent_data.get("Authority", []):
+            self.label_to_agent[node_label] = agent_name
+
+    def add_node(self, label_key, node_props):
+        combined_type = node_props.get("Type", "BaseEnvironmentResource")
+        user_data_lbl = node_props.get("UserData", label_key)
+        node_type, node_layer = parse_node_type(combined_type)
+
+        # A repeated key replaces the earlier node, as json.load keeps the last value
+        i = self.label_to_id.get(label_key)
+        if i is not None and self.G.nodes[i]['layer'] == node_layer:
+            pos_x, pos_y = self.G.nodes[i]['pos']
+        else:
+            pos_y = config.JSAT_LAYERS.get(node_layer, 550)
+            pos_x = self.layer_x_counters.setdefault(node_layer, 100)
+            self.layer_x_counters[node_layer] += 120
+        if i is None:
+            i = self.G.number_of_nodes()
+
+        self.G.add_node(i,
+                        pos=(pos_x, pos_y),
+                        layer=node_layer,
+                        type=node_type,
+                        label=user_data_lbl,
+                        agent="Unassigned")
+        self.label_to_id[label_key] = i
+
+    def add_edge(self, edge):
+        self.edges.append((edge.get("Source"), edge.get("Target")))
+
+    def finish(self):
+        """Assigns agents and resolves edges now that every section has been read."""
+        G, label_to_id = self.G, self.label_to_id
+        for node_label, agent_name in self.label_to_agent.items():
+            if node_label in label_to_id:
+                G.nodes[label_to_id[node_label]]['agent'] = agent_name
+
+        for src_lbl, tgt_lbl in self.edges:
+            if src_lbl in label_to_id and tgt_lbl in label_to_id:
+                G.add_edge(label_to_id[src_lbl], label_to_id[tgt_lbl])
+        return G, self.agents
+
+def parse_graph_data(graph_data):
+    """
+    Builds a DiGraph from the contents of the "GraphData" key.
+    Returns (G, agents) where agents maps agent name -> color.
+    """
+    builder = GraphDataBuilder()
+    for agent_name, agent_data in graph_data.get("Agents", {}).items():
+        builder.add_agent(agent_name, agent_data)
+    for label_key, node_props in graph_data.get("Nodes", {}).items():
+        builder.add_node(label_key, node_props)
+    for edge in graph_data.get("Edges", []):
+        builder.add_edge(edge)
+    return builder.finish()
+
+def serialize_graph_data(g, agents):
+    """
+    Builds the {"GraphData": ...} structure for g. Nodes are keyed by label,
+    so positions and agent colors are not stored.
+    """
+    # build nodes dictionary
+    nodes_dict = {}
+    
+    # Pre-calculate Agent Authorities (Which agent owns which node label?)
+    agent_authorities = {name: [] for name in agents.keys()}
+
+    for nid, d in g.nodes(data=True):
+        label = d.get('label', f"Node_{nid}")
+        layer = d.get('layer', "Base Environment")
+        n_type = d.get('type', "Function")
+        
+        # Format Type string: e.g. "Distributed Work" -> "DistributedWork"
+        formatted_layer = layer.replace(" ", "")
+        combined_type = f"{formatted_layer}{n_type}" # e.g., "DistributedWorkFunction"
+        
+        nodes_dict[label] = {
+            "Type": combined_type,
+            "UserData": label
+        }
+
+        # Add to agent authority list
+        agent_name = d.get('agent', 'Unassigned')
+        if agent_name in agent_authorities:
+            agent_authorities[agent_name].append(label)
+
+    # Build the edge list
+    edges_list = []
+    for u, v in g.edges():
+        u_lbl = g.nodes[u].get('label', f"Node_{u}")
+        v_lbl = g.nodes[v].get('label', f"Node_{v}")
+        
+        edges_list.append({
+            "Source": u_lbl,
+            "Target": v_lbl,
+            "UserData": {"QOS": ""}
+        })
+
+    # Build the agents dictionary
+    agents_dict = {}
+    for name in agents.keys():
+        agents_dict[name] = {
+            "Authority": agent_authorities.get(name, [])
+        }
+
+    # Construct Final JSON Structure
+    return {
+        "GraphData": {
+            "Nodes": nodes_dict,
+            "Edges": edges_list,
+            "Agents": agents_dict
+        }
+    }
+
+def load_graph_file(fp):
+    """Reads a GraphData JSON file from disk. Raises ValueError if the key is missing."""
+    # Use 'utf-8-sig' to handle potential invisible characters
+    with open(fp, 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+
+    if "GraphData" not in data:
+        raise ValueError("Invalid file format: Missing 'GraphData' key.")
+
+    return parse_graph_data(data["GraphData"])
+
+def load_architecture(fp):
+    """Reads a GraphData .json or binary .jsatb file, picked by extension. Returns (G, agents)."""
+    if fp.lower().endswith(graph_binary.EXTENSION):
+        return graph_binary.load_graph(fp)
+    return load_graph_file(fp)
+
+def list_architecture_files(directory):
+    """The .json and .jsatb files directly inside directory, sorted by name."""
+    return [os.path.join(directory, n) for n in sorted(os.listdir(directory))
+            if n.lower().endswith((".json", graph_binary.EXTENSION))]
+
+def node_layer(data):
+    """JSAT layer of a node: its saved layer, or a default based on its type."""
+    if data.get('layer') in config.JSAT_LAYERS:
+        return data['layer']
+    if data.get('type') == "Resource":
+        return "Base Environment"
+    return "Distributed Work"
+
+# --- Streaming Load ---
+
+class LoadCancelled(Exception):
+    pass
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+class _JsonStream:
+    """
+    Walks a JSON document read from a file in chunks. Structure ({, [, keys) is
+    stepped through by hand; each entry is decoded with raw_decode, so memory stays
+    at one chunk plus one entry however big the file is.
+    """
+    CHUNK = 1 << 20
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.consumed = 0 # Characters dropped from the front of buf
+        self.decoder = json.JSONDecoder()
+
+    def _more(self):
+        chunk = self.f.read(self.CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been parsed so the buffer does not grow with the file
+        self.consumed += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def offset(self):
+        """Characters parsed so far."""
+        return self.consumed + self.pos
+
+    def peek(self):
+        """Next non-whitespace character (without consuming it), or '' at the end."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf): return self.buf[self.pos]
+            if not self._more(): return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Invalid JSON: expected '{char}' at character {self.offset()}")
+        self.pos += 1
+
+    def value(self):
+        """Decodes the next complete value, reading more of the file as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._more(): raise # Cut off by the end of the file
+                continue
+            # A number ending the buffer may continue in the next chunk
+            if end == len(self.buf) and isinstance(value, (int, float)) and self._more():
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """Yields key by key of an object; the caller must consume each member's value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("}")
+                return
+
+    def items(self):
+        """Yields the values of an array one by one."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
+
+def stream_graph_file(fp, progress=None, cancelled=None):
+    """
+    Like load_graph_file, but parses the file entry by entry, for big files and
+    background threads. progress(fraction) is called now and then; when
+    cancelled() returns True, LoadCancelled is raised.
+    """
+    size = max(1, os.path.getsize(fp))
+    builder = GraphDataBuilder()
+    found = False
+    count = 0
+
+    def tick():
+        nonlocal count
+        count += 1
+        if count % 2000: return
+        if cancelled is not None and cancelled():
+            raise LoadCancelled()
+        if progress is not None:
+            progress(min(1.0, stream.offset() / size)) # Characters ~ bytes for these files
+
+    with open(fp, 'r', encoding='utf-8-sig') as f:
+        stream = _JsonStream(f)
+        for key in stream.members():
+            if key != "GraphData":
+                stream.value()
+                continue
+            found = True
+            for section in stream.members():
+                if section == "Agents":
+                    for agent_name in stream.members():
+                        builder.add_agent(agent_name, stream.value())
+                        tick()
+                elif section == "Nodes":
+                    for label_key in stream.members():
+                        builder.add_node(label_key, stream.value())
+                        tick()
+                elif section == "Edges":
+                    for edge in stream.items():
+                        builder.add_edge(edge)
+                        tick()
+                else:
+                    stream.value()
+
+    if not found:
+        raise ValueError("Invalid file format: Missing 'GraphData' key.")
+    if progress is not None: progress(1.0)
+    return builder.finish()
+
+# --- Bulk Import ---
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def load_many(paths, workers=None, progress=None):
+    """
+    Loads many architecture files with load_architecture. Returns [(path, (G, agents) or None,
+    error message or None)] in the order of 'paths'. Once the files add up to
+    config.BULK_IMPORT_PARALLEL_BYTES they are parsed by a process pool; smaller sets are
+    read in this process, where starting the pool would cost more than it saves.
+    progress(done, total) is called after each file.
+    """
+    results = [None] * len(paths)
+    done = 0
+    def finished(i, graph, error):
+        nonlocal done
+        results[i] = (paths[i], graph, error)
+        done += 1
+        if progress is not None: progress(done, len(paths))
+
+    if sum(_file_size(p) for p in paths) < config.BULK_IMPORT_PARALLEL_BYTES:
+        for i, path in enumerate(paths):
+            try:
+                finished(i, load_architecture(path), None)
+            except Exception as e:
+                finished(i, None, str(e))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(load_architecture, path): i for i, path in enumerate(paths)}
+            for fut in as_completed(futures):
+                try:
+                    finished(futures[fut], fut.result(), None)
+                except Exception as e:
+                    finished(futures[fut], None, str(e))
+
+    return results
@@ -0,0 +1,213 @@
+# journal.py
+# Crash recovery for the editor. Every operation the GraphEditor applies is
+# appended to a journal file; every so often the whole graph is written as a
+# snapshot and the journal starts over. Files are written and fsync'd in
+# batches on a background thread, so editing never waits for the disk.
+
+import json
+import os
+import queue
+import threading
+import time
+import types
+
+import networkx as nx
+
+import config
+from graph_editor import MISSING, apply_op, revert_op
+
+_MISSING_JSON = {"$missing": True}
+
+class EditJournal:
+    """
+    journal.jsonl holds one line per applied operation, [seq, forward, op], where
+    forward is 0 when an undo reverted op. snapshot.json holds the whole graph as of
+    sequence number 'seq'; journal lines up to that number are already part of it.
+    Loading a file (a "graph" operation) is written as a snapshot instead of a line.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or config.JOURNAL_DIR
+        self.journal_path = os.path.join(self.directory, "journal.jsonl")
+        self.snapshot_path = os.path.join(self.directory, "snapshot.json")
+        self.owner = None
+        self.seq = 0
+        self.since_snapshot = 0
+        self.queue = queue.Queue()
+        self.thread = None
+
+    # --- Recovery ---
+
+    def has_recovery(self):
+        """True if a previous session left edits or a non-empty snapshot behind."""
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+            return True
+        snapshot = self._read_snapshot()
+        return bool(snapshot and snapshot["nodes"])
+
+    def recover(self):
+        """Rebuilds (G, agents) from the snapshot and the journal lines written after it."""
+        snapshot = self._read_snapshot()
+        state = types.SimpleNamespace(G=nx.DiGraph(), agents=config.DEFAULT_AGENTS.copy())
+        last_seq = 0
+        if snapshot:
+            state.G.add_nodes_from((n, _decode_attrs(d)) for n, d in snapshot["nodes"])
+            state.G.add_edges_from((u, v, d) for u, v, d in snapshot["edges"])
+            state.agents = snapshot["agents"]
+            last_seq = snapshot["seq"]
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        seq, forward, op = json.loads(line)
+                    except ValueError:
+                        break # Line cut short by the crash; everything before it is intact
+                    if seq <= last_seq: continue
+                    op = _decode_op(op)
+                    if forward: apply_op(state, op)
+                    else: revert_op(state, op)
+        return state.G, state.agents
+
+    # --- Recording ---
+
+    def start(self, owner):
+        """Begins journaling owner's edits, starting from a snapshot of its current graph."""
+        self.owner = owner
+        if self.thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.thread = threading.Thread(target=self._run, name="edit-journal", daemon=True)
+            self.thread.start()
+        self.snapshot()
+
+    def append(self, op, forward=True):
+        """Queues one applied operation. Called on the Tk thread right after the change."""
+        if self.owner is None: return
+        if op[0] == "graph":
+            self.snapshot() # A whole new graph is cheaper to store as a snapshot
+            return
+        self.seq += 1
+        self.queue.put(("op", self.seq, forward, op))
+        self.since_snapshot += 1
+        if self.since_snapshot >= config.JOURNAL_COMPACT_EVERY:
+            self.snapshot()
+
+    def snapshot(self):
+        """Queues a snapshot of the owner's graph; the journal restarts after it is written."""
+        G, agents = self.owner.G, self.owner.agents
+        # Copied here, on the Tk thread, so later edits cannot change it while it is written
+        data = {"seq": self.seq, "agents": dict(agents),
+                "nodes": [[n, dict(d)] for n, d in G.nodes(data=True)],
+                "edges": [[u, v, dict(d)] for u, v, d in G.edges(data=True)]}
+        self.since_snapshot = 0
+        self.queue.put(("snapshot", data))
+
+    def close(self, discard=False):
+        """Writes what is queued and stops the writer; discard=True also deletes the files."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+            self.thread = None
+        self.owner = None
+        if discard:
+            for path in (self.journal_path, self.snapshot_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    # --- Writer thread ---
+
+    def _run(self):
+        f = open(self.journal_path, "a", encoding="utf-8")
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            # Gather whatever arrives within the flush interval, then write it in one go
+            deadline = time.monotonic() + config.JOURNAL_FLUSH_MS / 1000
+            while batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                lines = []
+                for item in batch:
+                    if item is None:
+                        running = False
+                    elif item[0] == "op":
+                        _, seq, forward, op = item
+                        lines.append(json.dumps([seq, int(forward), _encode_op(op)]))
+                    else:
+                        # Lines before the snapshot must be on disk first (the snapshot's seq covers them)
+                        self._write_lines(f, lines)
+                        lines = []
+                        self._write_snapshot(item[1])
+                        f.close()
+                        f = open(self.journal_path, "w", encoding="utf-8")
+                self._write_lines(f, lines)
+            except Exception as e:
+                print(f"Edit journal write failed: {e}")
+        f.close()
+
+    def _write_lines(self, f, lines):
+        if not lines: return
+        f.write("\n".join(lines) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _write_snapshot(self, data):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path) # Atomic: a crash leaves either the old or the new snapshot
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+# --- Encoding ---
+# Ops are JSON arrays. MISSING (absent attribute/agent) gets a marker, and positions,
+# which JSON turns into lists, are made tuples again on the way back.
+
+def _encode_op(op):
+    kind = op[0]
+    if kind == "node_attr":
+        return [kind, op[1], op[2], _encode_value(op[3]), _encode_value(op[4])]
+    if kind == "agent":
+        return [kind, op[1], _encode_value(op[2]), _encode_value(op[3])]
+    return op
+
+def _encode_value(v):
+    return _MISSING_JSON if v is MISSING else v
+
+def _decode_op(op):
+    kind = op[0]
+    if kind == "node_attr":
+        old, new = _decode_value(op[3]), _decode_value(op[4])
+        if op[2] == "pos":
+            old, new = _decode_pos(old), _decode_pos(new)
+        return (kind, op[1], op[2], old, new)
+    if kind == "agent":
+        return (kind, op[1], _decode_value(op[2]), _decode_value(op[3]))
+    if kind in ("add_node", "remove_node"):
+        op[2] = _decode_attrs(op[2])
+    return tuple(op)
+
+def _decode_value(v):
+    return MISSING if v == _MISSING_JSON else v
+
+def _decode_pos(v):
+    return tuple(v) if isinstance(v, list) else v
+
+def _decode_attrs(d):
+    if "pos" in d:
+        d["pos"] = _decode_pos(d["pos"])
+    return d
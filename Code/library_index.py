@@ -0,0 +1,163 @@
+# library_index.py
+# Cached summaries of the architecture files in a directory, for the library
+# picker. Each file is loaded and measured once; afterwards the summary is
+# reused until the file changes. Changes are detected from the modification
+# time and size first, and confirmed with a hash of the content, so touched,
+# copied or renamed files are not measured again.
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+
+import config
+import graph_io
+from utils import calculate_metric
+
+CACHE_VERSION = 1
+
+def file_hash(path):
+    """SHA-1 of a file's content, read in 1 MB blocks."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def summarize(path):
+    """Loads one architecture and returns its summary dict (JSON-serializable)."""
+    G, agents = graph_io.load_architecture(path)
+    used = Counter(d.get('agent', 'Unassigned') for _, d in G.nodes(data=True))
+    layers = Counter(graph_io.node_layer(d) for _, d in G.nodes(data=True))
+    return {
+        "nodes": G.number_of_nodes(),
+        "edges": G.number_of_edges(),
+        "agents": sorted(set(agents) | set(used)),
+        "layers": {name: layers[name] for name in config.LAYER_ORDER if layers[name]},
+        "metrics": {m: calculate_metric(G, m) for m in config.LIBRARY_METRICS},
+    }
+
+class LibraryIndex:
+    """
+    Summaries of the .json/.jsatb files in 'directory', keyed by absolute path.
+    The cache file is shared by every directory indexed; entries look like
+    {"mtime", "size", "hash", "summary"} or {"mtime", "size", "hash", "error"}.
+
+    entries() is available right away from the cache; refresh() (or start_refresh()
+    for a background thread) brings it up to date. 'version' increases whenever an
+    entry changes, so a window can poll it.
+    """
+    def __init__(self, directory, cache_path=None):
+        self.directory = os.path.abspath(directory)
+        self.cache_path = cache_path or config.LIBRARY_CACHE_PATH
+        self.lock = threading.Lock()
+        self.cache = self._read_cache()
+        self.version = 0
+        self.refreshing = False
+        self.thread = None
+        self.cancelled = threading.Event()
+
+    def files(self):
+        """Architecture files currently in the directory."""
+        try:
+            return graph_io.list_architecture_files(self.directory)
+        except OSError:
+            return []
+
+    def entries(self):
+        """(path, entry) for every file in the directory that has been indexed."""
+        with self.lock:
+            return [(p, self.cache[p]) for p in self.files() if p in self.cache]
+
+    # --- Refresh ---
+
+    def refresh(self):
+        """Re-indexes files that are new or changed and drops the ones that are gone."""
+        files = self.files()
+        with self.lock:
+            by_hash = {e["hash"]: e for e in self.cache.values() if "summary" in e}
+        changed = False
+
+        for path in files:
+            if self.cancelled.is_set(): break
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            with self.lock:
+                old = self.cache.get(path)
+            if old and old["mtime"] == st.st_mtime and old["size"] == st.st_size:
+                continue # Unchanged
+
+            entry = {"mtime": st.st_mtime, "size": st.st_size}
+            try:
+                entry["hash"] = file_hash(path)
+                # Same content as a file indexed before (touched, copied or renamed)
+                known = old if old and old.get("hash") == entry["hash"] and "summary" in old else by_hash.get(entry["hash"])
+                entry["summary"] = known["summary"] if known else summarize(path)
+                by_hash[entry["hash"]] = entry
+            except Exception as e:
+                entry.setdefault("hash", None)
+                entry["error"] = str(e)
+
+            with self.lock:
+                self.cache[path] = entry
+                self.version += 1
+            changed = True
+
+        # Forget files removed from this directory (other directories' entries stay)
+        present = set(files)
+        with self.lock:
+            gone = [p for p in self.cache if os.path.dirname(p) == self.directory and p not in present]
+            for p in gone:
+                del self.cache[p]
+            if gone:
+                self.version += 1
+        if changed or gone:
+            self._write_cache()
+
+    def start_refresh(self):
+        """Runs refresh() on a background thread unless one is already running."""
+        if self.refreshing: return
+        self.refreshing = True
+        self.cancelled.clear()
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Library index refresh failed: {e}")
+            finally:
+                self.refreshing = False
+
+        self.thread = threading.Thread(target=run, name="library-index", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Asks a background refresh to stop after the file it is on."""
+        self.cancelled.set()
+
+    # --- Cache file ---
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION:
+            return {} # Summaries of an older layout are rebuilt
+        return data.get("files", {})
+
+    def _write_cache(self):
+        with self.lock:
+            data = {"version": CACHE_VERSION, "files": dict(self.cache)}
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            print(f"Could not write library index: {e}")
@@ -5,4 +5,5 @@ from app import GraphBuilderApp
 if __name__ == "__main__":
     root = tk.Tk()
     app = GraphBuilderApp(root)
+    app.start_journal()
     root.mainloop()
\ No newline at end of file
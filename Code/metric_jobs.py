@@ -0,0 +1,98 @@
+# metric_jobs.py
+# Runs expensive analytics (cycles, modularity, efficiency, centrality) off the Tk thread.
+# Jobs work on a private snapshot of the graph; results are handed back to the
+# Tk thread by polling a queue with root.after, since Tk widgets must only be
+# touched from the thread that created them.
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+class MetricJobScheduler:
+    """
+    Jobs are keyed by (owner, name) and tagged with the graph revision
+    (structural fingerprint) they were computed for.
+    - Submitting a key again for a NEW revision cancels the old job.
+    - Submitting it again for the SAME revision keeps the running job and only swaps the callback.
+    - retire(owner, revision) cancels every job of 'owner' computed for another revision.
+    Cancelled jobs that have not started never run; running ones finish but their result is dropped.
+    """
+    def __init__(self, root, workers=1, poll_ms=30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metric-job")
+        self.results = queue.Queue()
+        self.jobs = {}      # key -> [token, revision, future, on_done]
+        self.next_token = 0
+        self.polling = False
+
+    def submit(self, key, revision, fn, on_done):
+        """Runs fn() on the worker and calls on_done(result) on the Tk thread (None if fn raised)."""
+        job = self.jobs.get(key)
+        if job is not None and job[1] == revision:
+            job[3] = on_done
+            return
+        self.cancel(key)
+
+        self.next_token += 1
+        token = self.next_token
+        future = self.executor.submit(self._run, key, token, fn)
+        self.jobs[key] = [token, revision, future, on_done]
+        self._ensure_polling()
+
+    def _run(self, key, token, fn):
+        # Worker thread: never touch Tk here
+        try:
+            result = fn()
+        except Exception as e:
+            print(f"Metric job {key} failed: {e}")
+            result = None
+        self.results.put((key, token, result))
+
+    def cancel(self, key):
+        job = self.jobs.pop(key, None)
+        if job: job[2].cancel()
+
+    def retire(self, owner, revision):
+        """Cancels jobs of 'owner' that belong to a different graph revision."""
+        for key, job in list(self.jobs.items()):
+            if key[0] == owner and job[1] != revision:
+                self.cancel(key)
+
+    def cancel_owner(self, owner):
+        for key in [k for k in self.jobs if k[0] == owner]:
+            self.cancel(key)
+
+    def pending(self):
+        return len(self.jobs)
+
+    def _ensure_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                key, token, result = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            job = self.jobs.get(key)
+            if job is None or job[0] != token:
+                continue # Cancelled or superseded
+            del self.jobs[key]
+
+            try:
+                job[3](result)
+            except Exception as e:
+                print(f"Metric job callback {key} failed: {e}")
+
+        if self.jobs:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self.polling = False
+
+    def shutdown(self):
+        for key in list(self.jobs):
+            self.cancel(key)
+        self.executor.shutdown(wait=False)
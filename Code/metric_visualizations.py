@@ -1,13 +1,13 @@
-import networkx as nx
-import random
+from cycles import get_cycle_index
+from communities import get_partition
 
-def get_cycle_highlights(G):
+def get_cycle_highlights(G, fingerprint=None):
     """
     Identifies all simple cycles and assigns a distinct neon color to each.
     Returns a list of dictionaries containing node/edge sets and colors.
     """
     try:
-        cycles = list(nx.simple_cycles(G))
+        index = get_cycle_index(G, fingerprint)
     except ImportError:
         return []
 
@@ -24,39 +24,29 @@ def get_cycle_highlights(G):
         "#1E90FF", # DodgerBlue
     ]
 
-    for i, path in enumerate(cycles):
+    for i, path in enumerate(index.paths):
         color = neon_colors[i % len(neon_colors)]
-        
-        # Build the edge list for this specific cycle
-        cycle_edges = []
-        for j in range(len(path)):
-            u = path[j]
-            v = path[(j + 1) % len(path)] # Connect last node back to first
-            cycle_edges.append((u, v))
             
         highlights.append({
             "nodes": path,
-            "edges": cycle_edges,
+            "edges": index.edges[i],
             "color": color,
             "width": 8 # Offset width slightly so overlapping cycles are visible
         })
         
     return highlights
 
-# metric_visualizations.py (formerly visual_analytics.py)
-import networkx as nx
-
-def get_single_cycle_highlight(G, cycle_index):
+def get_single_cycle_highlight(G, cycle_index, fingerprint=None):
     """
     Highlights ONLY the cycle at the specified index, using a distinct color.
     """
     try:
-        cycles = list(nx.simple_cycles(G))
+        # O(1) lookup in the shared per-revision index
+        index = get_cycle_index(G, fingerprint)
+        path = index.cycle(cycle_index)
         
-        if cycle_index < 0 or cycle_index >= len(cycles):
+        if path is None:
             return [] 
-            
-        path = cycles[cycle_index]
         
         # Same palette as 'get_cycle_highlights' for consistency
         neon_colors = [
@@ -73,15 +63,9 @@ def get_single_cycle_highlight(G, cycle_index):
         # Pick color based on index so it matches the button
         color = neon_colors[cycle_index % len(neon_colors)]
         
-        cycle_edges = []
-        for j in range(len(path)):
-            u = path[j]
-            v = path[(j + 1) % len(path)]
-            cycle_edges.append((u, v))
-            
         return [{
             "nodes": path,
-            "edges": cycle_edges,
+            "edges": index.cycle_edges(cycle_index),
             "color": color, 
             "width": 10
         }]
@@ -90,7 +74,7 @@ def get_single_cycle_highlight(G, cycle_index):
         print(f"Error highlighting cycle {cycle_index}: {e}")
         return []
 
-def get_interdependence_highlights(G):
+def get_interdependence_highlights(G, fingerprint=None):
     """
     Identifies edges that cross agent boundaries (the drivers of interdependence).
     """
@@ -115,17 +99,15 @@ def get_interdependence_highlights(G):
         "color": "#FF0000", # Bright Red for critical dependencies
         "width": 8
     }]
-# metric_visualizations.py
 
-def get_modularity_highlights(G):
+def get_modularity_highlights(G, fingerprint=None):
     """
     Detects communities and assigns a unique color to each group.
     Colors nodes and 'intra-community' edges (edges within the same group).
     """
     try:
-        # 1. Detect Communities
-        # Returns a list of sets: [{n1, n2}, {n3, n4}...]
-        communities = nx.community.greedy_modularity_communities(G.to_undirected())
+        # 1. Shared partition (largest group first, same order as the dashboard)
+        partition = get_partition(G, fingerprint)
         
         highlights = []
         
@@ -141,21 +123,13 @@ def get_modularity_highlights(G):
             "#B2BABB", # Gray
         ]
 
-        for i, community_set in enumerate(communities):
+        for i, nodes_list in enumerate(partition.groups):
             color = community_colors[i % len(community_colors)]
-            nodes_list = list(community_set)
-            
-            # Find edges that stay COMPLETELY within this community
-            intra_edges = []
-            for u in nodes_list:
-                for v in nodes_list:
-                    if G.has_edge(u, v):
-                        intra_edges.append((u, v))
             
             # Create Highlight Group
             highlights.append({
                 "nodes": nodes_list,
-                "edges": intra_edges,
+                "edges": partition.intra_edges[i],
                 "color": color,
                 "width": 10 # Thick highlight for groups
             })
@@ -166,21 +140,18 @@ def get_modularity_highlights(G):
         print(f"Modularity Vis Error: {e}")
         return []
     
-def get_single_modularity_highlight(G, group_index):
+def get_single_modularity_highlight(G, group_index, fingerprint=None):
     """
     Highlights ONLY the specific community group at the given index.
     """
     try:
-        # 1. Detect Communities (Must use same method as the main visualizer)
-        communities = list(nx.community.greedy_modularity_communities(G.to_undirected()))
-        
-        # Sort by size (largest first) to keep UI consistent
-        communities.sort(key=len, reverse=True)
+        # 1. Shared partition (Same groups and order as the main visualizer)
+        partition = get_partition(G, fingerprint)
         
-        if group_index < 0 or group_index >= len(communities):
+        if group_index < 0 or group_index >= len(partition):
             return []
             
-        target_group = list(communities[group_index])
+        target_group = partition.groups[group_index]
         
         # 2. Match Colors (Use same palette as full view for consistency)
         community_colors = [
@@ -189,20 +160,38 @@ def get_single_modularity_highlight(G, group_index):
         ]
         color = community_colors[group_index % len(community_colors)]
         
-        # 3. Find edges within this group
-        intra_edges = []
-        for u in target_group:
-            for v in target_group:
-                if G.has_edge(u, v):
-                    intra_edges.append((u, v))
-                    
         return [{
             "nodes": target_group,
-            "edges": intra_edges,
+            "edges": partition.intra_edges[group_index],
             "color": color,
             "width": 10
         }]
 
     except Exception as e:
         print(f"Modularity Single Error: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def get_inter_community_highlights(G, fingerprint=None):
+    """
+    Highlights the edges that connect different modularity groups (the bridges between modules).
+    """
+    try:
+        partition = get_partition(G, fingerprint)
+        if not partition.inter_edges:
+            return []
+
+        involved_nodes = set()
+        for u, v in partition.inter_edges:
+            involved_nodes.add(u)
+            involved_nodes.add(v)
+
+        return [{
+            "nodes": list(involved_nodes),
+            "edges": partition.inter_edges,
+            "color": "#FF8C00", # Dark Orange, distinct from the group palette
+            "width": 8
+        }]
+
+    except Exception as e:
+        print(f"Inter-Community Vis Error: {e}")
+        return []
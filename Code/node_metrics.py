@@ -0,0 +1,158 @@
+# node_metrics.py
+# Per-node metrics for a whole graph revision.
+# Centralities are whole-graph computations, so they are computed once per
+# structural fingerprint for every node and then served by lookup to the
+# main inspector and the comparison inspector.
+
+import math
+import random
+from array import array
+from collections import deque
+import networkx as nx
+
+import config
+from graph_cache import structural_fingerprint, LRUCache
+
+def sampled_betweenness(G, nodes, index, k, seed=None):
+    """
+    Estimates normalized betweenness from k random source pivots (Brandes accumulation
+    from each pivot, scaled by n/k). Returns (estimate, error) arrays aligned with 'nodes',
+    where error is the standard error of the estimate, with a finite population
+    correction since pivots are drawn without replacement. It is not a confidence bound:
+    the pivot samples are heavily skewed, so the true value can lie several standard
+    errors away. A node that fewer than two pivots have paths through gets NaN, since
+    the spread of its samples says nothing there (it would often be 0).
+    """
+    n = len(nodes)
+    estimate = array('d', bytes(8 * n))
+    error = array('d', bytes(8 * n))
+    if n < 3 or k <= 0: return estimate, error
+    k = min(k, n)
+
+    # Same scaling as nx.betweenness_centrality(normalized=True)
+    scale = 1.0 / ((n - 1) * (n - 2))
+
+    succ = [[index[w] for w in G.neighbors(v)] for v in nodes]
+    totals = [0.0] * n
+    squares = [0.0] * n
+    hits = [0] * n # Pivots with a nonzero dependency on each node
+
+    for s in random.Random(seed).sample(range(n), k):
+        # Single-source shortest paths (BFS, unweighted)
+        order = []
+        preds = {s: []}
+        sigma = {s: 1.0}
+        dist = {s: 0}
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            order.append(v)
+            for w in succ[v]:
+                if w not in dist:
+                    dist[w] = dist[v] + 1
+                    queue.append(w)
+                    preds[w] = []
+                    sigma[w] = 0.0
+                if dist[w] == dist[v] + 1:
+                    sigma[w] += sigma[v]
+                    preds[w].append(v)
+
+        # Dependency accumulation in reverse BFS order
+        delta = dict.fromkeys(order, 0.0)
+        while order:
+            w = order.pop()
+            coeff = (1.0 + delta[w]) / sigma[w]
+            for v in preds[w]:
+                delta[v] += sigma[v] * coeff
+            if w != s:
+                if delta[w]:
+                    totals[w] += delta[w]
+                    squares[w] += delta[w] * delta[w]
+                    hits[w] += 1
+
+    # Each pivot gives an unbiased sample X_s = n * scale * delta_s(v)
+    fpc = (n - k) / (n - 1)
+    for i in range(n):
+        mean = totals[i] / k
+        estimate[i] = n * scale * mean
+        if not succ[i] or not G.in_degree(nodes[i]):
+            continue # No path can pass through a node without in- or out-edges: 0 is exact
+        if k > 1 and hits[i] >= 2:
+            var = max(0.0, (squares[i] - k * mean * mean) / (k - 1))
+            error[i] = n * scale * math.sqrt(var / k * fpc)
+        elif k < n:
+            error[i] = math.nan
+    return estimate, error
+
+class NodeMetricsTable:
+    """
+    In/out degree and degree, eigenvector and betweenness centrality for every node.
+    Values live in arrays indexed by the node's position in 'nodes'; 'index' maps node -> position.
+    Above config.BETWEENNESS_APPROX_THRESHOLD nodes betweenness is sampled: row() reports
+    'betweenness_exact' False and 'betweenness_error' holds the standard errors (NaN where
+    too few pivots reached the node) until use_exact_betweenness() swaps in exact values.
+    Tables are shared through the cache and read from several threads, so the betweenness
+    column, its errors and the exact flag are one tuple that is only ever replaced whole.
+    """
+    def __init__(self, G, approximate=None):
+        self.nodes = list(G.nodes)
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+
+        self.in_degree = array('l', (G.in_degree(n) for n in self.nodes))
+        self.out_degree = array('l', (G.out_degree(n) for n in self.nodes))
+        self.degree_c = self._column(lambda: nx.degree_centrality(G))
+        self.eigenvector = self._column(lambda: nx.eigenvector_centrality(G, max_iter=500, tol=1e-04))
+
+        # Betweenness finds "Bottlenecks"; exact is O(n*m), so sample on big graphs
+        if approximate is None:
+            approximate = len(self.nodes) > config.BETWEENNESS_APPROX_THRESHOLD
+        if approximate:
+            estimate, error = sampled_betweenness(
+                G, self.nodes, self.index, config.BETWEENNESS_SAMPLES, config.BETWEENNESS_SEED)
+            self.betweenness = (estimate, error, False) # (values, errors, exact)
+        else:
+            self.use_exact_betweenness(self.exact_betweenness(G))
+
+    def exact_betweenness(self, G):
+        """Exact betweenness column for this table's nodes (O(n*m)). Does not change the table."""
+        return self._column(lambda: nx.betweenness_centrality(G))
+
+    def use_exact_betweenness(self, column):
+        """Replaces the sampled betweenness with a column from exact_betweenness()."""
+        self.betweenness = (column, array('d', bytes(8 * len(self.nodes))), True)
+
+    def _column(self, compute):
+        """Runs a whole-graph centrality and stores it as an array (0.0 when it fails to converge)."""
+        try:
+            values = compute()
+        except Exception:
+            values = {}
+        return array('d', (values.get(n, 0.0) for n in self.nodes))
+
+    def row(self, node):
+        """All metrics of one node as a dict, or None if the node is not in this revision."""
+        i = self.index.get(node)
+        if i is None: return None
+        values, errors, exact = self.betweenness
+        return {
+            "in_degree": self.in_degree[i],
+            "out_degree": self.out_degree[i],
+            "degree": self.degree_c[i],
+            "eigenvector": self.eigenvector[i],
+            "betweenness": values[i],
+            "betweenness_error": errors[i],
+            "betweenness_exact": exact,
+        }
+
+_table_cache = LRUCache(config.NODE_METRICS_CACHE_SIZE)
+
+def get_node_metrics(G, fingerprint=None, compute=True):
+    """
+    Returns the NodeMetricsTable for G's current structure, computing only on a cache miss.
+    With compute=False, returns None on a miss instead.
+    """
+    if fingerprint is None:
+        fingerprint = structural_fingerprint(G)
+    if not compute:
+        return _table_cache.peek(fingerprint)
+    return _table_cache.get_or_compute(fingerprint, lambda: NodeMetricsTable(G))
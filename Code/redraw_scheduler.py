@@ -0,0 +1,66 @@
+# redraw_scheduler.py
+# Coalesces repaint requests into at most one render pass per display frame.
+# Callers mark regions dirty ("canvas", "highlights", "nodes", "dashboard");
+# the pass runs from Tk's idle queue, after pending mouse events are handled.
+
+import time
+
+import config
+
+class RedrawScheduler:
+    """
+    request(region, *details) marks a region dirty, optionally with details such as
+    node ids or dashboard change kinds. render(dirty) is called later with a dict
+    region -> set of details, once for all requests made since the last pass.
+    'requested' and 'executed' count requests and actual render passes.
+    """
+    def __init__(self, widget, render, frame_ms=None):
+        self.widget = widget
+        self.render = render
+        self.frame_ms = config.REDRAW_FRAME_MS if frame_ms is None else frame_ms
+        self.dirty = {}
+        self.pending = None
+        self.last_frame = 0.0
+        self.requested = 0
+        self.executed = 0
+        self.delayed = {} # region -> pending after() id of request_later()
+
+    def request(self, region, *details):
+        self.requested += 1
+        self.dirty.setdefault(region, set()).update(details)
+        if self.pending is not None: return
+
+        # Render when idle, but not sooner than one frame after the previous pass
+        wait_ms = self.frame_ms - (time.perf_counter() - self.last_frame) * 1000
+        if wait_ms > 0:
+            self.pending = self.widget.after(int(wait_ms) + 1, self._run)
+        else:
+            self.pending = self.widget.after_idle(self._run)
+
+    def request_later(self, region, delay_ms, *details):
+        """Requests region once no further request_later() for it came in for delay_ms (e.g. after a zoom gesture)."""
+        pending = self.delayed.pop(region, None)
+        if pending is not None:
+            self.widget.after_cancel(pending)
+        def fire():
+            del self.delayed[region]
+            self.request(region, *details)
+        self.delayed[region] = self.widget.after(delay_ms, fire)
+
+    def flush(self):
+        """Renders pending work now (e.g. before grabbing the canvas as an image)."""
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+        self._run()
+
+    def _run(self):
+        self.pending = None
+        dirty, self.dirty = self.dirty, {}
+        if not dirty or not self.widget.winfo_exists(): return # Window closed meanwhile
+        self.last_frame = time.perf_counter()
+        self.executed += 1
+        self.render(dirty)
+
+    def stats(self):
+        return {"requested": self.requested, "executed": self.executed,
+                "coalesced": self.requested - self.executed}
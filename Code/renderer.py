@@ -0,0 +1,531 @@
+# renderer.py
+# Retained-mode drawing of a graph on a Tk canvas.
+# Canvas items are created once and then kept in step with the graph through
+# canvas.coords / itemconfig, so a redraw only touches the items that changed.
+# Shared by the main editor canvas and the comparison panels.
+
+import math
+import tkinter as tk
+
+import config
+from spatial_index import GridIndex, point_segment_distance, segment_intersects_rect
+
+# Level-of-detail tiers, from most to least detailed (thresholds in config.LOD_*)
+LOD_FULL = 0       # Everything
+LOD_NO_LABELS = 1  # No node labels
+LOD_SIMPLE = 2     # Also no arrowheads or node outlines
+LOD_AGGREGATE = 3  # One blob per agent/layer, linked by edge counts
+
+class GraphRenderer:
+    """
+    Keeps one canvas item per node shape, node label, edge, layer guide and highlight.
+    Items are stored by key, e.g. ("node", n), ("label", n), ("edge", u, v), ("hl", i),
+    and tagged so they can be found on the canvas:
+      "node"/"label"/"edge"/"layer"/"highlight", plus f"n{n}" on a node's shape and label
+      and f"e{u}_{v}" on an edge. Aggregate-tier items are also tagged "aggregate".
+
+    get_pos(n) returns a node's world position and to_screen(wx, wy) maps it to the canvas,
+    so each owner keeps its own view logic (JSAT snapping, pan, zoom).
+
+    With a viewport (world rectangle) only the nodes and edges found there by the
+    spatial index have canvas items; edges crossing the viewport are included.
+
+    Zoomed out or with many nodes in view, labels, then arrowheads and outlines are
+    dropped (see the LOD_* tiers). In the last tier the nodes are replaced by one
+    blob per agent, or per layer when get_layer is given and layers are shown.
+    """
+    def __init__(self, canvas, node_radius, get_pos, to_screen, shorten_edges=False, get_layer=None):
+        self.canvas = canvas
+        self.node_radius = node_radius
+        self.get_pos = get_pos
+        self.to_screen = to_screen
+        self.shorten_edges = shorten_edges # Stop arrows at the node outline
+        self.get_layer = get_layer
+
+        self.items = {}   # key -> [item id, kind, coords, opts]
+        self.keys = {}    # item id -> key
+        self.stats = {"created": 0, "coords": 0, "itemconfig": 0, "deleted": 0}
+
+        # World geometry of the whole graph, kept in step incrementally
+        self.node_index = GridIndex(config.SPATIAL_CELL_SIZE) # node -> its circle's box
+        self.edge_index = GridIndex(config.SPATIAL_CELL_SIZE) # (u, v) -> the segment's box
+        self.node_pos = {}         # node -> world position stored in the index
+        self.indexed_edges = set()
+
+        # Inputs of the last render(), reused by render_view() and update_nodes()
+        self.G = None
+        self.zoom = 1.0
+        self.agents = {}
+        self.selected = None
+        self.inspected = None
+        self.layers = False
+        self.viewport = None       # World rectangle (x0, y0, x1, y1); None draws everything
+        self.visible_nodes = None  # Nodes/edges found in the viewport (None = all)
+        self.visible_edges = None
+        self.hl_specs = []   # (kind, nodes, color, width, offset) per highlight item
+        self.hl_by_node = {} # node -> highlight slots that depend on its position
+        self.lod = LOD_FULL
+        self._groups = None  # Aggregate tier: (groups, links), rebuilt after edits
+        self._transform = (1.0, 0.0, 0.0) # Native pan/zoom (scale, dx, dy) not yet in the stored coords
+        self._created = False
+
+    # --- Public API ---
+
+    def render(self, G, zoom, agents, highlights=(), layers=False, selected=None, inspected=None, viewport=None):
+        """Brings the canvas in line with G. Unchanged items are not touched."""
+        self.G, self.agents = G, agents
+        self.selected, self.inspected = selected, inspected
+        self.layers = layers
+        self._groups = None # Agents or layers may have changed
+        self._apply_transform()
+        self._sync_index()
+        old_count = len(self.hl_specs)
+        self._build_highlight_specs(highlights)
+        self._sync_visible(zoom, viewport, old_count)
+
+    def render_view(self, zoom, viewport):
+        """Pan/zoom: re-syncs what is visible. The graph must be unchanged since render()."""
+        if self.G is None: return
+        self._apply_transform()
+        self._sync_visible(zoom, viewport, len(self.hl_specs))
+
+    def render_highlights(self, highlights):
+        """Re-syncs only the highlight items, e.g. when a metric visualization is toggled."""
+        self._created = False
+        self._apply_transform()
+        old_count = len(self.hl_specs)
+        self._build_highlight_specs(highlights)
+        self._sync_highlights(old_count)
+        self._restack()
+
+    def update_nodes(self, nodes):
+        """
+        Re-syncs only the given nodes, their incident edges and the highlights that touch them.
+        Used while dragging; the graph structure must be unchanged since the last render().
+        """
+        G = self.G
+        self._created = False
+        self._apply_transform()
+        if self.lod == LOD_AGGREGATE:
+            for n in nodes:
+                self._index_node(n)
+                for e in list(G.in_edges(n)) + list(G.out_edges(n)):
+                    self._index_edge(*e)
+            self._groups = None
+            self._sync_aggregates()
+            self._restack()
+            return
+
+        for n in nodes:
+            self._index_node(n)
+            self._show(self._node_in_view(n), self.visible_nodes, n, lambda: self._sync_node(n), (("node", n), ("label", n)))
+            for e in list(G.in_edges(n)) + list(G.out_edges(n)):
+                self._index_edge(*e)
+                self._show(self._edge_in_view(*e), self.visible_edges, e, lambda: self._sync_edge(*e), (("edge",) + e,))
+            for slot in self.hl_by_node.get(n, ()):
+                if self._slot_visible(slot): self._sync_highlight(slot)
+                else: self._delete(("hl", slot))
+        self._restack()
+
+    def pan(self, dx, dy):
+        """Shifts all items with one native canvas call; call render_view() once the gesture ends."""
+        self.canvas.move("all", dx, dy)
+        s, tx, ty = self._transform
+        self._transform = (s, tx + dx, ty + dy)
+
+    def scale(self, factor, cx, cy):
+        """
+        Zooms all items natively around the screen point (cx, cy). Line widths, fonts and
+        the level of detail stay as they are until the next render_view().
+        """
+        self.canvas.scale("all", cx, cy, factor, factor)
+        s, tx, ty = self._transform
+        self._transform = (s * factor, (tx - cx) * factor + cx, (ty - cy) * factor + cy)
+
+    def clear(self):
+        self._apply_transform()
+        for key in list(self.items):
+            self._delete(key)
+
+    def node_at(self, wx, wy):
+        """
+        Node whose circle contains the world point, from the spatial index. Where nodes
+        overlap the one drawn on top wins (nodes without an item, e.g. off-screen, rank last).
+        """
+        best, best_rank = None, None
+        for n in self.node_index.query(wx, wy, wx, wy):
+            x, y = self.node_pos[n]
+            dist = math.hypot(wx - x, wy - y)
+            if dist > self.node_radius: continue
+            item = self.items.get(("node", n))
+            # Later items are stacked above earlier ones; then the nearer centre wins
+            rank = (item[0] if item else -1, -dist, str(n))
+            if best_rank is None or rank > best_rank:
+                best, best_rank = n, rank
+        return best
+
+    def edge_at(self, wx, wy, max_dist):
+        """Edge nearest to the world point, if its centre line passes within max_dist."""
+        best, best_dist = None, max_dist
+        for e in self.edge_index.query(wx - max_dist, wy - max_dist, wx + max_dist, wy + max_dist):
+            dist = point_segment_distance(wx, wy, *self.node_pos[e[0]], *self.node_pos[e[1]])
+            if dist < best_dist or (dist == best_dist and best is not None and str(e) < str(best)):
+                best, best_dist = e, dist
+        return best
+
+    def key_of(self, item_id):
+        """Maps a canvas item id back to its key, e.g. ("node", 3)."""
+        return self.keys.get(item_id)
+
+    def _apply_transform(self):
+        """Folds a pending native pan/zoom into the stored coords, so they match the canvas again."""
+        if self._transform == (1.0, 0.0, 0.0): return
+        s, tx, ty = self._transform
+        for item in self.items.values():
+            c = item[2]
+            item[2] = tuple(v * s + (ty if i % 2 else tx) for i, v in enumerate(c))
+        self._transform = (1.0, 0.0, 0.0)
+
+    # --- Spatial index and culling ---
+
+    def _sync_index(self):
+        """Re-indexes nodes whose position changed, their edges, and added/removed elements."""
+        G = self.G
+        moved = set()
+        for n in G.nodes:
+            if self.node_pos.get(n) != self.get_pos(n):
+                self._index_node(n)
+                moved.add(n)
+        for n in [n for n in self.node_pos if n not in G]:
+            del self.node_pos[n]
+            self.node_index.remove(n)
+
+        edges = set(G.edges())
+        for e in self.indexed_edges - edges:
+            self.edge_index.remove(e)
+        for e in edges:
+            if e not in self.indexed_edges or e[0] in moved or e[1] in moved:
+                self._index_edge(*e)
+        self.indexed_edges = edges
+
+    def _index_node(self, n):
+        x, y = self.node_pos[n] = self.get_pos(n)
+        r = self.node_radius
+        self.node_index.insert_box(n, x-r, y-r, x+r, y+r)
+
+    def _index_edge(self, u, v):
+        self.edge_index.insert_segment((u, v), *self.node_pos[u], *self.node_pos[v])
+
+    def _padded_viewport(self):
+        """Viewport grown by a node's radius and label height, so partly visible nodes are kept."""
+        x0, y0, x1, y1 = self.viewport
+        pad = self.node_radius + 20 + 15 / self.zoom
+        return x0 - pad, y0 - pad, x1 + pad, y1 + pad
+
+    def _node_in_view(self, n):
+        return self.viewport is None or self.node_index.intersects(n, *self._padded_viewport())
+
+    def _edge_in_view(self, u, v):
+        return self.viewport is None or segment_intersects_rect(*self.node_pos[u], *self.node_pos[v], *self._padded_viewport())
+
+    def _show(self, inside, visible, element, sync, item_keys):
+        """Syncs element's items if it is inside the viewport, otherwise removes them."""
+        if self.viewport is None:
+            sync()
+        elif inside:
+            visible.add(element)
+            sync()
+        else:
+            visible.discard(element)
+            for k in item_keys: self._delete(k)
+
+    def _slot_visible(self, slot):
+        if self.lod == LOD_AGGREGATE: return False
+        if self.visible_nodes is None: return True
+        kind, nodes = self.hl_specs[slot][:2]
+        if any(n in self.visible_nodes for n in nodes): return True
+        return kind == "line" and (nodes in self.visible_edges or nodes[::-1] in self.visible_edges)
+
+    def _sync_visible(self, zoom, viewport, old_hl_count):
+        """Creates/updates the items of everything in the viewport and deletes the rest."""
+        G = self.G
+        self.zoom, self.viewport = zoom, viewport
+        self._created = False
+
+        if zoom < config.LOD_AGGREGATE_MIN_ZOOM:
+            # The view covers most of the graph anyway; no need to look up what is in it
+            nodes, edges = (), ()
+            self.visible_nodes, self.visible_edges = set(), set()
+        elif viewport is None:
+            self.visible_nodes = self.visible_edges = None
+            nodes, edges = G.nodes, G.edges()
+        else:
+            rect = self._padded_viewport()
+            nodes = list(self.node_index.query(*rect))
+            # Edges are indexed by bounding box; keep only those actually crossing the view
+            edges = [e for e in self.edge_index.query(*rect)
+                     if segment_intersects_rect(*self.node_pos[e[0]], *self.node_pos[e[1]], *rect)]
+            self.visible_nodes, self.visible_edges = set(nodes), set(edges)
+
+        self.lod = self._pick_lod(zoom, len(nodes))
+        if self.lod == LOD_AGGREGATE:
+            nodes, edges = (), ()
+            self.visible_nodes, self.visible_edges = set(), set()
+
+        seen = set(self._sync_highlights(old_hl_count))
+
+        if self.layers:
+            for layer_name in config.LAYER_ORDER:
+                world_y = config.JSAT_LAYERS[layer_name]
+                _, screen_y = self.to_screen(0, world_y)
+                if viewport is None:
+                    sx0, sx1, text_x = 0, 20000, 10
+                else:
+                    # Guide spans just the viewport instead of a fixed 20,000 px
+                    left, top, right, bottom = self._padded_viewport()
+                    if not top <= world_y <= bottom: continue
+                    sx0, sx1 = self.to_screen(left, world_y)[0], self.to_screen(right, world_y)[0]
+                    text_x = self.to_screen(viewport[0], world_y)[0] + 10
+                seen.add(self._sync(("layer", layer_name), "line", (sx0, screen_y, sx1, screen_y),
+                                    {"fill": "#ddd", "dash": (4, 4)}, ("layer",)))
+                seen.add(self._sync(("layer_text", layer_name), "text", (text_x, screen_y - 10),
+                                    {"text": layer_name, "anchor": "w", "fill": "#888", "font": ("Arial", 8, "italic")},
+                                    ("layer",)))
+
+        if self.lod == LOD_AGGREGATE:
+            seen.update(self._sync_aggregates())
+
+        for u, v in edges:
+            key = self._sync_edge(u, v)
+            if key: seen.add(key)
+
+        for n in nodes:
+            seen.update(self._sync_node(n))
+
+        for key in [k for k in self.items if k not in seen]:
+            self._delete(key)
+        self._restack()
+
+    def _pick_lod(self, zoom, visible_count):
+        if zoom < config.LOD_AGGREGATE_MIN_ZOOM or visible_count > config.LOD_AGGREGATE_MAX_NODES:
+            return LOD_AGGREGATE
+        if zoom < config.LOD_DETAIL_MIN_ZOOM or visible_count > config.LOD_DETAIL_MAX_NODES:
+            return LOD_SIMPLE
+        if zoom < config.LOD_LABEL_MIN_ZOOM or visible_count > config.LOD_LABEL_MAX_NODES:
+            return LOD_NO_LABELS
+        return LOD_FULL
+
+    # --- Aggregate tier ---
+
+    def _build_groups(self):
+        """Node count, position sum and inner edge count per group, and edge counts between groups."""
+        G = self.G
+        by_layer = self.layers and self.get_layer is not None
+        group_of = {}
+        groups = {} # name -> [count, sum_x, sum_y, inner_edges]
+        for n, d in G.nodes(data=True):
+            name = self.get_layer(n) if by_layer else d.get('agent', "Unassigned")
+            group_of[n] = name
+            x, y = self.node_pos[n]
+            g = groups.get(name)
+            if g is None:
+                groups[name] = [1, x, y, 0]
+            else:
+                g[0] += 1; g[1] += x; g[2] += y
+
+        links = {} # (name, name) in sorted order -> edge count, both directions together
+        for u, v in G.edges():
+            a, b = group_of[u], group_of[v]
+            if a == b:
+                groups[a][3] += 1
+            else:
+                pair = (a, b) if a < b else (b, a)
+                links[pair] = links.get(pair, 0) + 1
+        return groups, links
+
+    def _sync_aggregates(self):
+        """Draws a blob per group at its nodes' centroid and a line per linked pair of groups."""
+        if self._groups is None:
+            self._groups = self._build_groups()
+        groups, links = self._groups
+        by_layer = self.layers and self.get_layer is not None
+
+        centers = {}
+        keys = []
+        for name, (count, sum_x, sum_y, inner) in groups.items():
+            sx, sy = centers[name] = self.to_screen(sum_x / count, sum_y / count)
+            # Screen-space size, so blobs stay readable however far out the view is
+            r = min(90, 12 + 3 * math.sqrt(count))
+            fill = "#e8e8e8" if by_layer else self.agents.get(name, "white")
+            keys.append(self._sync(("blob", name), "oval", (sx-r, sy-r, sx+r, sy+r),
+                                   {"fill": fill, "outline": "#555", "width": 2}, ("node", "aggregate")))
+            keys.append(self._sync(("blob_text", name), "text", (sx, sy),
+                                   {"text": f"{name}\n{count} nodes, {inner} edges", "font": ("Arial", 9, "bold"),
+                                    "justify": tk.CENTER}, ("label", "aggregate")))
+
+        for (a, b), count in links.items():
+            (sx1, sy1), (sx2, sy2) = centers[a], centers[b]
+            keys.append(self._sync(("link", a, b), "line", (sx1, sy1, sx2, sy2),
+                                   {"fill": "#999", "width": min(12, 1 + math.log2(count))}, ("edge", "aggregate")))
+            keys.append(self._sync(("link_text", a, b), "text", ((sx1 + sx2) / 2, (sy1 + sy2) / 2),
+                                   {"text": str(count), "font": ("Arial", 8), "fill": "#555"}, ("label", "aggregate")))
+        return keys
+
+    # --- Per-element geometry and style ---
+
+    def _sync_node(self, n):
+        d = self.G.nodes[n]
+        r = self.node_radius * self.zoom
+        sx, sy = self.to_screen(*self.get_pos(n))
+
+        fill = d.get('_color_cache') or self.agents.get(d.get('agent'), "white")
+        outline, width = ("black", 1) if self.lod < LOD_SIMPLE else ("", 0)
+        if n == self.selected:
+            outline, width = "blue", 3
+        elif n == self.inspected:
+            outline, width = "orange", 3
+
+        kind = "rectangle" if d.get('type') == "Function" else "oval"
+        tag = f"n{n}"
+        shape = self._sync(("node", n), kind, (sx-r, sy-r, sx+r, sy+r),
+                           {"fill": fill, "outline": outline, "width": width}, ("node", tag))
+        if self.lod >= LOD_NO_LABELS:
+            self._delete(("label", n))
+            return (shape,)
+
+        font_size = max(15, int(10 * self.zoom))
+        label_offset = r + (5 * self.zoom)
+        label = self._sync(("label", n), "text", (sx, sy - label_offset),
+                           {"text": d.get('label', ''), "font": ("Arial", font_size, "bold"), "anchor": "s"},
+                           ("label", tag))
+        return shape, label
+
+    def _sync_edge(self, u, v):
+        key = ("edge", u, v)
+        sx1, sy1 = self.to_screen(*self.get_pos(u))
+        sx2, sy2 = self.to_screen(*self.get_pos(v))
+
+        if self.shorten_edges:
+            dx, dy = sx2 - sx1, sy2 - sy1
+            dist = math.hypot(dx, dy)
+            if dist == 0:
+                self._delete(key)
+                return None
+            # Shorten line so arrow doesn't overlap node
+            gap = self.node_radius * self.zoom + 2
+            sx2 -= (dx/dist)*gap
+            sy2 -= (dy/dist)*gap
+
+        arrow = tk.LAST if self.lod < LOD_SIMPLE else tk.NONE
+        return self._sync(key, "line", (sx1, sy1, sx2, sy2),
+                          {"arrow": arrow, "width": 2*self.zoom}, ("edge", f"e{u}_{v}"))
+
+    def _sync_highlights(self, old_count):
+        """Syncs the visible highlight slots and drops the others, including slots beyond the new count."""
+        keys = []
+        for slot in range(len(self.hl_specs)):
+            if self._slot_visible(slot):
+                keys.append(self._sync_highlight(slot))
+            else:
+                self._delete(("hl", slot))
+        for slot in range(len(self.hl_specs), old_count):
+            self._delete(("hl", slot))
+        return keys
+
+    def _build_highlight_specs(self, highlights):
+        """Flattens the highlight dicts into one spec per canvas item, keeping the overlap offsets."""
+        self.hl_specs = []
+        self.hl_by_node = {}
+        edge_counts = {}
+        for h in highlights:
+            color = h.get('color', 'yellow')
+            width = h.get('width', 8)
+
+            # Halos first so parallel highlight lines sit on top of them
+            for n in h.get('nodes', []):
+                self.hl_by_node.setdefault(n, []).append(len(self.hl_specs))
+                self.hl_specs.append(("halo", (n,), color, width, 0))
+
+            # Overlapping highlight edges are offset side by side
+            for u, v in h.get('edges', []):
+                edge_key = tuple(sorted((u, v)))
+                count = edge_counts.get(edge_key, 0)
+                edge_counts[edge_key] = count + 1
+                slot = len(self.hl_specs)
+                self.hl_by_node.setdefault(u, []).append(slot)
+                self.hl_by_node.setdefault(v, []).append(slot)
+                self.hl_specs.append(("line", (u, v), color, width, count))
+
+    def _sync_highlight(self, slot):
+        kind, nodes, color, width, count = self.hl_specs[slot]
+        key = ("hl", slot)
+        width = width * self.zoom
+
+        if kind == "halo":
+            sx, sy = self.to_screen(*self.get_pos(nodes[0]))
+            rad = (self.node_radius * self.zoom) + (width/2)
+            return self._sync(key, "oval", (sx-rad, sy-rad, sx+rad, sy+rad),
+                              {"fill": color, "outline": color}, ("highlight",))
+
+        sx1, sy1 = self.to_screen(*self.get_pos(nodes[0]))
+        sx2, sy2 = self.to_screen(*self.get_pos(nodes[1]))
+        dx, dy = sx2 - sx1, sy2 - sy1
+        length = math.hypot(dx, dy)
+        if length == 0:
+            # Keep the slot but collapse the line until the endpoints separate
+            coords = (sx1, sy1, sx1, sy1)
+        else:
+            current_offset = (count * width) - (width / 2)
+            os_x = -dy / length * current_offset
+            os_y = dx / length * current_offset
+            coords = (sx1+os_x, sy1+os_y, sx2+os_x, sy2+os_y)
+        return self._sync(key, "line", coords,
+                          {"fill": color, "width": width, "capstyle": tk.ROUND, "joinstyle": tk.ROUND},
+                          ("highlight",))
+
+    # --- Item bookkeeping ---
+
+    def _sync(self, key, kind, coords, opts, tags):
+        """Creates the item for key, or updates only the coords/options that differ."""
+        item = self.items.get(key)
+        if item is not None and item[1] != kind:
+            self._delete(key)
+            item = None
+
+        if item is None:
+            create = getattr(self.canvas, f"create_{kind}")
+            iid = create(*coords, tags=tags, **opts)
+            self.items[key] = [iid, kind, coords, opts]
+            self.keys[iid] = key
+            self.stats["created"] += 1
+            self._created = True
+            return key
+
+        iid, _, old_coords, old_opts = item
+        if old_coords != coords:
+            self.canvas.coords(iid, *coords)
+            item[2] = coords
+            self.stats["coords"] += 1
+        if old_opts != opts:
+            changed = {k: v for k, v in opts.items() if old_opts.get(k) != v}
+            self.canvas.itemconfig(iid, **changed)
+            item[3] = opts
+            self.stats["itemconfig"] += 1
+        return key
+
+    def _delete(self, key):
+        item = self.items.pop(key, None)
+        if item is None: return
+        self.canvas.delete(item[0])
+        self.keys.pop(item[0], None)
+        self.stats["deleted"] += 1
+
+    def _restack(self):
+        """New items land on top; put the layers back in drawing order when any were created."""
+        if not self._created: return
+        # Each tag_lower goes to the very bottom, so the lowest layer is lowered last
+        self.canvas.tag_lower("highlight")
+        self.canvas.tag_lower("layer")
+        self.canvas.tag_raise("node")
+        self.canvas.tag_raise("label")
+        self._created = False
@@ -0,0 +1,122 @@
+# spatial_index.py
+# Grid over world coordinates for "what is near this rectangle/point" queries.
+# Used by the renderer to cull items outside the viewport; entries are moved
+# one at a time, so dragging a node only updates that node and its edges.
+
+import math
+
+class GridIndex:
+    """
+    Maps keys to the grid cells their bounding box overlaps.
+    The grid has levels: level k uses cells of cell_size * 2**k, and every box is
+    stored on the first level where it spans at most 2x2 cells. Small nodes and
+    long edges therefore both cost O(1) to insert or move.
+    Queries are conservative: they return every key sharing a cell with the
+    rectangle, which can include items just outside it.
+    """
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.levels = {}    # level -> {(cx, cy): set of keys}
+        self.key_cells = {} # key -> (level, cells)
+
+    def __len__(self):
+        return len(self.key_cells)
+
+    def __contains__(self, key):
+        return key in self.key_cells
+
+    def insert_box(self, key, x0, y0, x1, y1):
+        """Adds key over the rectangle, replacing any previous entry for it."""
+        if key in self.key_cells:
+            self.remove(key)
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+
+        size = max(x1 - x0, y1 - y0)
+        level = max(0, math.ceil(math.log2(size / self.cell_size))) if size > self.cell_size else 0
+        c = self.cell_size * (1 << level)
+        cells = [(cx, cy)
+                 for cx in range(math.floor(x0 / c), math.floor(x1 / c) + 1)
+                 for cy in range(math.floor(y0 / c), math.floor(y1 / c) + 1)]
+
+        self.key_cells[key] = (level, cells)
+        grid = self.levels.setdefault(level, {})
+        for cell in cells:
+            bucket = grid.get(cell)
+            if bucket is None: grid[cell] = {key}
+            else: bucket.add(key)
+
+    def insert_segment(self, key, x1, y1, x2, y2):
+        """Adds a segment by its bounding box (see segment_intersects_rect for an exact test)."""
+        self.insert_box(key, x1, y1, x2, y2)
+
+    def remove(self, key):
+        entry = self.key_cells.pop(key, None)
+        if entry is None: return
+        level, cells = entry
+        grid = self.levels[level]
+        for cell in cells:
+            bucket = grid.get(cell)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket: del grid[cell]
+
+    def clear(self):
+        self.levels.clear()
+        self.key_cells.clear()
+
+    def query(self, x0, y0, x1, y1):
+        """Keys sharing at least one cell with the rectangle."""
+        found = set()
+        for level, grid in self.levels.items():
+            cx0, cy0, cx1, cy1 = self._cell_range(level, x0, y0, x1, y1)
+            # Zoomed far out the rectangle can span more cells than are occupied
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(grid):
+                for (cx, cy), bucket in grid.items():
+                    if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                        found.update(bucket)
+            else:
+                for cx in range(cx0, cx1 + 1):
+                    for cy in range(cy0, cy1 + 1):
+                        bucket = grid.get((cx, cy))
+                        if bucket: found.update(bucket)
+        return found
+
+    def intersects(self, key, x0, y0, x1, y1):
+        """True if key occupies a cell overlapping the rectangle."""
+        entry = self.key_cells.get(key)
+        if entry is None: return False
+        level, cells = entry
+        cx0, cy0, cx1, cy1 = self._cell_range(level, x0, y0, x1, y1)
+        return any(cx0 <= cx <= cx1 and cy0 <= cy <= cy1 for cx, cy in cells)
+
+    def _cell_range(self, level, x0, y0, x1, y1):
+        c = self.cell_size * (1 << level)
+        return (math.floor(min(x0, x1) / c), math.floor(min(y0, y1) / c),
+                math.floor(max(x0, x1) / c), math.floor(max(y0, y1) / c))
+
+def point_segment_distance(px, py, x1, y1, x2, y2):
+    """Distance from a point to the closest point of a segment."""
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return math.hypot(px - x1, py - y1)
+    t = ((px - x1) * dx + (py - y1) * dy) / (dx*dx + dy*dy)
+    t = max(0, min(1, t))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+def segment_intersects_rect(x1, y1, x2, y2, rx0, ry0, rx1, ry1):
+    """Liang-Barsky clip test: does the segment pass through the rectangle?"""
+    t0, t1 = 0.0, 1.0
+    dx, dy = x2 - x1, y2 - y1
+    for p, q in ((-dx, x1 - rx0), (dx, rx1 - x1), (-dy, y1 - ry0), (dy, ry1 - y1)):
+        if p == 0:
+            if q < 0: return False # Parallel to this edge and outside
+        else:
+            t = q / p
+            if p < 0:
+                if t > t1: return False
+                t0 = max(t0, t)
+            else:
+                if t < t0: return False
+                t1 = min(t1, t)
+    return True
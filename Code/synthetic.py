@@ -0,0 +1,153 @@
+# synthetic.py
+# Seeded generator for large JSAT architectures (load and stress testing).
+# Produces either an nx.DiGraph with the same node attributes the editor sets,
+# or GraphData JSON streamed straight to a file.
+#
+# Usage:
+#   python synthetic.py 100000 -o big.json --agents 5 --bidirectional 0.2 --cycles 0.05
+
+import argparse
+import random
+import sys
+from array import array
+import networkx as nx
+
+import config
+
+AGENT_PALETTE = ["#8DD3C7", "#FFFFB3", "#BEBADA", "#FB8072", "#80B1D3",
+                 "#FDB462", "#B3DE69", "#FCCDE5", "#BC80BD", "#CCEBC5"]
+
+class SyntheticArchitecture:
+    """
+    A reproducible random architecture. Nodes are kept as compact arrays; edges are
+    regenerated from the seed on every pass, so even 100k-node models stay cheap.
+
+    Edges always join a Function and a Resource (the rule handle_click enforces).
+    Each node links from up to 'edges_per_node' earlier nodes of the other type,
+    chosen within the last 'window' of them, which keeps the forward edges acyclic.
+    Then:
+      - bidirectional_ratio: share of those edges that also get the reverse edge
+      - cycle_density: share of nodes that add one back edge to an earlier node,
+        closing longer loops through the forward edges
+    """
+    def __init__(self, n_nodes, seed=0, agents=3, bidirectional_ratio=0.1,
+                 cycle_density=0.05, edges_per_node=1.5, window=64):
+        self.n_nodes = n_nodes
+        self.seed = seed
+        self.bidirectional_ratio = bidirectional_ratio
+        self.cycle_density = cycle_density
+        self.edges_per_node = edges_per_node
+        self.window = window
+
+        self.agent_names = list(config.DEFAULT_AGENTS) + [f"Agent {i + 1}" for i in range(agents)]
+        rng = random.Random(seed)
+
+        # Per-node type (0 = Function, 1 = Resource), layer and agent as indices
+        self.types = array('b', (rng.random() < 0.5 for _ in range(n_nodes)))
+        self.layers = array('b', (rng.randrange(len(config.LAYER_ORDER)) for _ in range(n_nodes)))
+        self.agents = array('h', (rng.randrange(len(self.agent_names)) for _ in range(n_nodes)))
+
+    def agent_colors(self):
+        colors = config.DEFAULT_AGENTS.copy()
+        for i, name in enumerate(self.agent_names[len(config.DEFAULT_AGENTS):]):
+            colors[name] = AGENT_PALETTE[i % len(AGENT_PALETTE)]
+        return colors
+
+    def label(self, i):
+        return f"{'R' if self.types[i] else 'F'}{i}"
+
+    def nodes(self):
+        """Yields (id, attrs) in id order, laid out like graph_io.parse_graph_data does."""
+        layer_x = {l: 100 for l in config.LAYER_ORDER}
+        for i in range(self.n_nodes):
+            layer = config.LAYER_ORDER[self.layers[i]]
+            x = layer_x[layer]
+            layer_x[layer] += 120
+            yield i, {"pos": (x, config.JSAT_LAYERS[layer]),
+                      "type": "Resource" if self.types[i] else "Function",
+                      "agent": self.agent_names[self.agents[i]],
+                      "label": self.label(i),
+                      "layer": layer}
+
+    def edges(self):
+        """Yields (u, v) pairs. Every pair is produced once, so no deduplication is needed."""
+        rng = random.Random(self.seed + 1)
+        seen = ([], []) # Earlier node ids per type
+        whole = int(self.edges_per_node)
+        frac = self.edges_per_node - whole
+
+        for i in range(self.n_nodes):
+            others = seen[1 - self.types[i]]
+            if others:
+                candidates = others[-self.window:]
+                k = whole + (rng.random() < frac)
+                preds = rng.sample(candidates, min(k, len(candidates)))
+                for j in preds:
+                    yield j, i
+                    if rng.random() < self.bidirectional_ratio:
+                        yield i, j
+
+                # Back edge to an earlier node that is not already a predecessor
+                if rng.random() < self.cycle_density and len(candidates) > len(preds):
+                    j = rng.choice(candidates)
+                    while j in preds:
+                        j = rng.choice(candidates)
+                    yield i, j
+            seen[self.types[i]].append(i)
+
+    def to_graph(self):
+        """Returns (G, agents) just as graph_io.parse_graph_data would for the written file."""
+        G = nx.DiGraph()
+        G.add_nodes_from(self.nodes())
+        G.add_edges_from(self.edges())
+        return G, self.agent_colors()
+
+    def write_graph_data(self, f):
+        """Streams the architecture as GraphData JSON to an open text file."""
+        # Labels are generated ("F12", "R7") and agent names are plain, so no escaping is needed
+        f.write('{\n    "GraphData": {\n        "Agents": {')
+        authority = [[] for _ in self.agent_names]
+        for i in range(self.n_nodes):
+            authority[self.agents[i]].append(i)
+        for a, name in enumerate(self.agent_names):
+            labels = ", ".join(f'"{self.label(i)}"' for i in authority[a])
+            f.write(f'{"," if a else ""}\n            "{name}": {{"Authority": [{labels}]}}')
+
+        f.write('\n        },\n        "Nodes": {')
+        for i in range(self.n_nodes):
+            lbl = self.label(i)
+            combined = config.LAYER_ORDER[self.layers[i]].replace(" ", "") + ("Resource" if self.types[i] else "Function")
+            f.write(f'{"," if i else ""}\n            "{lbl}": {{"Type": "{combined}", "UserData": "{lbl}"}}')
+
+        f.write('\n        },\n        "Edges": [')
+        for k, (u, v) in enumerate(self.edges()):
+            f.write(f'{"," if k else ""}\n            {{"Source": "{self.label(u)}", "Target": "{self.label(v)}", "UserData": {{"QOS": ""}}}}')
+        f.write('\n        ]\n    }\n}\n')
+
+def generate(n_nodes, seed=0, **options):
+    """Shortcut for SyntheticArchitecture(n_nodes, seed, **options).to_graph()."""
+    return SyntheticArchitecture(n_nodes, seed, **options).to_graph()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic JSAT architecture file.")
+    parser.add_argument("nodes", type=int)
+    parser.add_argument("-o", "--output", help="GraphData JSON file (default: stdout)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--agents", type=int, default=3, help="Agents besides 'Unassigned'")
+    parser.add_argument("--bidirectional", type=float, default=0.1, help="Share of edges that are mutual")
+    parser.add_argument("--cycles", type=float, default=0.05, help="Share of nodes adding a loop-closing back edge")
+    parser.add_argument("--edges-per-node", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    arch = SyntheticArchitecture(args.nodes, args.seed, agents=args.agents,
+                                 bidirectional_ratio=args.bidirectional,
+                                 cycle_density=args.cycles, edges_per_node=args.edges_per_node)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            arch.write_graph_data(f)
+    else:
+        arch.write_graph_data(sys.stdout)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,16 @@
 # utils.py
 import networkx as nx
+import config
+from graph_cache import agent_fingerprint, structural_fingerprint, metric_cache
+from cycles import get_cycle_index
+from communities import get_partition
 
-def calculate_metric(G, metric_name):
+def calculate_metric(G, metric_name, fingerprint=None):
     """
     Calculates metrics. Includes:
     Originals: Density, Clustering, Cycles, Interdependence, etc.
     New: Global Efficiency, Modularity.
+    fingerprint: optional structural fingerprint of G, reused by the shared analysis caches.
     """
     try:
         n = G.number_of_nodes()
@@ -28,12 +33,10 @@ def calculate_metric(G, metric_name):
         
         if metric_name == "Avg Cycle Length":
             try:
-                cycles = list(nx.simple_cycles(G))
-                if not cycles: return "0.0 (None)"
-                lengths = [len(c) for c in cycles]
-                avg = sum(lengths) / len(lengths)
-                return f"{avg:.2f} {lengths}"
-            except: return "Err"
+                index = get_cycle_index(G, fingerprint)
+                if not len(index): return "0.0 (None)"
+                return f"{index.average_label()} {index.lengths}"
+            except Exception: return "Err"
         
         if metric_name == "Interdependence":
             try:
@@ -45,29 +48,25 @@ def calculate_metric(G, metric_name):
                     agent_v = G.nodes[v].get('agent', 'Unassigned')
                     if agent_u != agent_v: cross_boundary_edges += 1
                 return f"{(cross_boundary_edges / m):.3f}"
-            except: return "Err"
+            except Exception: return "Err"
             
         if metric_name == "Cyclomatic Number":
             try:
                 e = G.number_of_edges()
                 p = nx.number_weakly_connected_components(G)
                 return str(e - n + p)
-            except: return "Err"
+            except Exception: return "Err"
 
         if metric_name == "Critical Loop Nodes":
             try:
                 fvs = nx.approximation.min_weighted_feedback_vertex_set(G)
                 return str(len(fvs))
-            except: return "0"
+            except Exception: return "0"
 
         if metric_name == "Total Cycles":
             try:
-                count = 0
-                for _ in nx.simple_cycles(G):
-                    count += 1
-                    if count > 100: return "100+"
-                return str(count)
-            except: return "Err"
+                return get_cycle_index(G, fingerprint).count_label()
+            except Exception: return "Err"
 
         # --- NEW METRICS ONLY ---
 
@@ -77,19 +76,33 @@ def calculate_metric(G, metric_name):
                 # Treated as undirected to measure potential for information flow
                 eff = nx.global_efficiency(G.to_undirected())
                 return f"{eff:.3f}"
-            except: return "Err"
+            except Exception: return "Err"
 
         if metric_name == "Modularity":
             # Detects if system splits into distinct groups (Q-Score)
             try:
-                communities = nx.community.greedy_modularity_communities(G.to_undirected())
-                num_communities = len(communities)
-                q_score = nx.community.modularity(G.to_undirected(), communities)
-                return f"Q={q_score:.2f} ({num_communities} Grps)"
-            except: return "Err"
+                return get_partition(G, fingerprint).label()
+            except Exception: return "Err"
             
     except Exception as e:
         print(f"Error calculating {metric_name}: {e}")
         return "Err"
     
-    return ""
\ No newline at end of file
+    return ""
+
+def cached_metric(G, metric_name, fingerprint=None, compute=True, agent_key=None):
+    """
+    Same as calculate_metric, but memoized on the graph's structural fingerprint.
+    Pass a precomputed fingerprint when reading several metrics of one graph.
+    Metrics in config.AGENT_METRICS are also keyed on the agent assignment
+    (agent_key, or agent_fingerprint(G) when not given).
+    With compute=False, returns None instead of calculating on a cache miss.
+    """
+    if fingerprint is None:
+        fingerprint = structural_fingerprint(G)
+    key = (fingerprint, metric_name)
+    if metric_name in config.AGENT_METRICS:
+        key += (agent_key if agent_key is not None else agent_fingerprint(G),)
+    if not compute:
+        return metric_cache.peek(key)
+    return metric_cache.get_or_compute(key, lambda: calculate_metric(G, metric_name, fingerprint))